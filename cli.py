@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Headless batch runner, see src/aceinna/cli.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+if __name__ == '__main__':
+    import multiprocessing
+    from aceinna.cli import main
+
+    # Job and decode worker processes re-enter this module in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
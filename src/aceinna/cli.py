@@ -0,0 +1,272 @@
+"""
+Headless batch runner: converts one or many data files with a Convertor and a
+DataSourceFetchRule from config.json, without PySide6 or a display.
+
+    python cli.py --convertor NAME --fetch-rule NAME [--jobs N] [--summary FILE] INPUT [INPUT ...]
+
+INPUT is a data file, a glob pattern or a directory (its files of the fetch
+rule's file type). Files convert concurrently in a pool of --jobs processes.
+Progress goes to stderr; a JSON summary with the status of every file goes to
+--summary (stdout when '-').
+
+With --incremental, a file converted before is continued from where the last run
+stopped: only the lines appended since are parsed and decoded, the new rows are
+appended to the data lists and the plots are redrawn (CSV files only).
+
+Parsed logs are kept in a frame cache in the user's cache folder, so converting
+the same file again skips the parse; --no-cache bypasses it for this run.
+
+Per-file exit codes: 0 converted, 1 conversion error, 2 some results failed.
+The process exits with 0 when every file converted, 1 otherwise.
+
+    python cli.py --convertor NAME --fetch-rule NAME --watch FOLDER [--once]
+
+Watch mode keeps running and converts every new or changed file of FOLDER once
+its size stopped changing for --settle seconds. Converted files are recorded in
+a ledger (FOLDER/.can_parser_ledger.json by default) and skipped after a restart.
+Ctrl+C stops the watcher after the files in progress.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+
+from aceinna.core.config_store import ConfigStore
+from aceinna.core.conversion import Conversion, run_job, EXIT_OK, EXIT_ERROR
+from aceinna.core.folder_watcher import FolderWatcher
+from aceinna.core.frame_cache import FrameCache
+from aceinna.models.convertor import Convertor
+from aceinna.models.fetch_rule import DataSourceFetchRule
+
+def collect_files(inputs: List[str], file_type: str, recursive: bool = False) -> List[str]:
+    """
+    Expands files, glob patterns and directories into a sorted list of unique files.
+    Directories contribute the files with the fetch rule's extension.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**' if recursive else '', f"*.{file_type}")
+            files.extend(glob.glob(pattern, recursive=recursive))
+        elif glob.has_magic(item):
+            files.extend(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+        else:
+            # Missing files are reported as failed jobs
+            files.append(item)
+    return sorted({os.path.abspath(path) for path in files})
+
+
+def output_folders(convertor: Convertor, files: List[str], output: Optional[str]) -> Dict[str, str]:
+    """
+    Result folder of every file: the --output or convertor folder (or the GUI's
+    fallback next to the file), with one subfolder per file when there are several.
+    """
+    folders = {}
+    used = set()
+    for path in files:
+        base = output or Conversion.output_folder(convertor, path)
+        if len(files) == 1:
+            folders[path] = base
+            continue
+        stem = os.path.splitext(os.path.basename(path))[0]
+        folder, n = os.path.join(base, stem), 1
+        while folder in used:
+            n += 1
+            folder = os.path.join(base, f"{stem}_{n}")
+        used.add(folder)
+        folders[path] = folder
+    return folders
+
+
+def find(items, name: str, kind: str):
+    for item in items:
+        if item.name == name:
+            return item
+    names = ', '.join(repr(item.name) for item in items) or 'none'
+    raise ValueError(f"{kind} '{name}' not found in config (available: {names})")
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description='Convert CAN log files without the GUI.',
+        epilog='Per-file exit codes in the summary: 0 converted, 1 error, 2 some results failed.')
+    parser.add_argument('inputs', nargs='*', help='data files, glob patterns or directories')
+    parser.add_argument('-c', '--config', default='config.json', help='configuration file (default: config.json)')
+    parser.add_argument('--convertor', help='name of the Convertor to run')
+    parser.add_argument('--fetch-rule', help='name of the DataSourceFetchRule to read the files with')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='files converted concurrently (default: CPU count)')
+    parser.add_argument('--decode-workers', type=int, default=1,
+                        help='decode and plot processes per file (default: 1)')
+    parser.add_argument('-o', '--output', help='result folder, overrides the convertor setting')
+    parser.add_argument('-r', '--recursive', action='store_true', help='search directories recursively')
+    parser.add_argument('--summary', default='-', help="JSON summary file, '-' for stdout (default)")
+    parser.add_argument('--incremental', action='store_true',
+                        help='only convert the lines appended to CSV files since the last run')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the frame cache of parsed logs')
+    parser.add_argument('--list', action='store_true', help='list the convertors and fetch rules and exit')
+    watch = parser.add_argument_group('watch mode')
+    watch.add_argument('--watch', metavar='FOLDER', help='keep converting new files dropped into FOLDER')
+    watch.add_argument('--interval', type=float, default=5.0, help='seconds between folder scans (default: 5)')
+    watch.add_argument('--settle', type=float, default=10.0,
+                       help='seconds a file must stay unchanged before it is converted (default: 10)')
+    watch.add_argument('--ledger', help='ledger of converted files (default: FOLDER/.can_parser_ledger.json)')
+    watch.add_argument('--retry-failed', action='store_true', help='convert files that failed before again')
+    watch.add_argument('--once', action='store_true', help='convert the files in FOLDER now and exit')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not os.path.exists(args.config):
+        print(f"Config file not found: {args.config}", file=sys.stderr)
+        return EXIT_ERROR
+    config = ConfigStore(args.config)
+    FrameCache.set_enabled(config.frame_cache and not args.no_cache)
+
+    if args.list:
+        print("Convertors:")
+        for convertor in config.convertors:
+            print(f"  {convertor.name}")
+        print("Fetch rules:")
+        for rule in config.fetch_rules:
+            print(f"  {rule.name} ({rule.file_type})")
+        return EXIT_OK
+
+    try:
+        if not args.convertor or not args.fetch_rule:
+            raise ValueError("--convertor and --fetch-rule are required")
+        convertor = find(config.convertors, args.convertor, 'Convertor')
+        fetch_rule = find(config.fetch_rules, args.fetch_rule, 'Fetch rule')
+        if args.watch:
+            if not os.path.isdir(args.watch):
+                raise ValueError(f"Watch folder not found: {args.watch}")
+            return watch_folder(convertor, fetch_rule, args)
+        files = collect_files(args.inputs, fetch_rule.file_type, args.recursive)
+        if not files:
+            raise ValueError("No input files")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    folders = output_folders(convertor, files, args.output)
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"Converting {len(files)} files with '{convertor.name}', {jobs} at a time", file=sys.stderr)
+
+    started = time.time()
+    entries = run_queue(convertor, fetch_rule, files, folders, jobs, max(1, args.decode_workers), args.incremental)
+    summary = {
+        'convertor': convertor.name,
+        'fetch_rule': fetch_rule.name,
+        'files': entries,
+        'converted': sum(1 for entry in entries if entry['exit_code'] == EXIT_OK),
+        'failed': sum(1 for entry in entries if entry['exit_code'] != EXIT_OK),
+        'seconds': round(time.time() - started, 3)
+    }
+
+    text = json.dumps(summary, indent=2)
+    if args.summary == '-':
+        print(text)
+    else:
+        with open(args.summary, 'w') as f:
+            f.write(text + '\n')
+    return EXIT_OK if summary['failed'] == 0 else EXIT_ERROR
+
+
+def run_queue(convertor: Convertor, fetch_rule: DataSourceFetchRule, files: List[str],
+              folders: Dict[str, str], jobs: int, workers: int, incremental: bool = False) -> List[Dict]:
+    """
+    Converts the files in a pool of `jobs` processes. At most 2 * jobs files are
+    queued at a time, so a huge input list does not pile up pickled jobs.
+    Returns the summary entries in input order.
+    """
+    if jobs == 1:
+        entries = []
+        for i, path in enumerate(files, 1):
+            entries.append(run_job(convertor, fetch_rule, path, folders[path], workers, incremental))
+            _log_done(i, len(files), entries[-1])
+        return entries
+
+    entries: Dict[str, Dict] = {}
+    queue = iter(files)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        def submit_next() -> bool:
+            path = next(queue, None)
+            if path is None:
+                return False
+            pending[pool.submit(run_job, convertor, fetch_rule, path, folders[path], workers, incremental)] = path
+            return True
+
+        while len(pending) < 2 * jobs and submit_next():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # The job process itself died (e.g. out of memory)
+                    entry = {'file': path, 'output_folder': folders[path], 'status': 'error',
+                             'exit_code': EXIT_ERROR, 'error': f"{type(e).__name__}: {e}"}
+                entries[path] = entry
+                _log_done(len(entries), len(files), entry)
+                submit_next()
+    return [entries[path] for path in files]
+
+
+def watch_folder(convertor: Convertor, fetch_rule: DataSourceFetchRule, args: argparse.Namespace) -> int:
+    """
+    Runs the watch mode until Ctrl+C / SIGTERM, or until the folder is done with --once.
+    """
+    stop = []
+
+    def request_stop(signum, frame):
+        print("Stopping after the files in progress...", file=sys.stderr)
+        stop.append(signum)
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    converted = []
+    failed = []
+
+    def report(entry: Dict):
+        (converted if entry['exit_code'] == EXIT_OK else failed).append(entry['file'])
+        _log_done(len(converted) + len(failed), 0, entry)
+
+    watcher = FolderWatcher(convertor, fetch_rule, args.watch, output=args.output, ledger_path=args.ledger,
+                            jobs=max(1, args.jobs), workers=max(1, args.decode_workers),
+                            recursive=args.recursive, settle=args.settle,
+                            retry_failed=args.retry_failed, incremental=args.incremental, report=report)
+    print(f"Watching {watcher.folder} for *.{fetch_rule.file_type} files with '{convertor.name}', "
+          f"{watcher.jobs} at a time (ledger: {watcher.ledger.path})", file=sys.stderr)
+    watcher.run(stop_check=lambda: bool(stop), interval=max(0.1, args.interval), once=args.once)
+    print(f"Watch stopped: {len(converted)} converted, {len(failed)} failed", file=sys.stderr)
+    return EXIT_OK if not failed else EXIT_ERROR
+
+
+def _log_done(done: int, total: int, entry: Dict):
+    if entry['exit_code'] == EXIT_OK:
+        detail = f"{entry['frames']} frames"
+    else:
+        detail = entry.get('error') or f"{len(entry['failures'])} results failed"
+    # total is 0 in watch mode, where the number of files is open-ended
+    progress = f"{done}/{total}" if total else str(done)
+    print(f"[{progress}] {entry['status']}: {entry['file']} ({detail}, {entry.get('seconds', 0)}s)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    # Job and decode worker processes re-enter this module in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,635 @@
+import mmap
+import struct
+import zlib
+import numpy as np
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
+from ..utils.id_parser import CAN_EFF_FLAG, MAX_STANDARD_ID
+from .frame_batch import FrameBatch
+
+# Vector BLF: file header "LOGG", then objects "LOBJ" - in practice log containers holding
+# zlib compressed runs of the actual objects, which may continue in the next container
+_BLF_FILE_HEADER = struct.Struct('<4sL')
+# signature, header size, header version, object size, object type
+_BLF_OBJECT = struct.Struct('<4sHHLL')
+# compression method, uncompressed size (after the 16 byte base header)
+_BLF_CONTAINER = struct.Struct('<H6xL4x')
+_BLF_CONTAINER_DATA = _BLF_OBJECT.size + _BLF_CONTAINER.size
+_BLF_SIGNATURE = np.frombuffer(b'LOBJ', dtype=np.uint8)
+
+BLF_LOG_CONTAINER = 10
+BLF_CAN_MESSAGE = 1
+BLF_CAN_MESSAGE2 = 86
+BLF_CAN_FD_MESSAGE = 100
+BLF_CAN_FD_MESSAGE_64 = 101
+_BLF_CAN_TYPES = (BLF_CAN_MESSAGE, BLF_CAN_MESSAGE2, BLF_CAN_FD_MESSAGE, BLF_CAN_FD_MESSAGE_64)
+# Object header flag: timestamps in 10 us units instead of nanoseconds
+_BLF_TIME_TEN_MICS = 1
+
+# ASAM MDF 4: every block starts with id, reserved, length and link count
+_MDF_BLOCK = struct.Struct('<4s4xQQ')
+# cn_type, sync_type, data_type, bit_offset, byte_offset, bit_count
+_MDF_CN = struct.Struct('<BBBBLL')
+# record_id, cycle_count, flags, path separator, data_bytes, inval_bytes
+_MDF_CG = struct.Struct('<QQHH4xLL')
+# original block type, zip type, zip parameter, original length, compressed length
+_MDF_DZ = struct.Struct('<2sBxLQQ')
+_MDF_DL = struct.Struct('<B3xL')
+_MDF_CC = struct.Struct('<BBHHH')
+
+MDF_CN_VLSD = 1
+MDF_CN_MASTER = 2
+MDF_CN_VIRTUAL_MASTER = 3
+MDF_SYNC_TIME = 1
+MDF_CG_VLSD = 0x1
+# Data types: little / big endian unsigned and signed integers, floats, byte arrays
+_MDF_BIG_ENDIAN = (1, 3, 5)
+_MDF_FLOAT = (4, 5)
+_MDF_ZIP_TRANSPOSED = 1
+# CAN FD DLC code -> payload length
+_FD_LENGTHS = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64], dtype=np.int64)
+
+
+@dataclass
+class _Mf4Channel:
+    name: str
+    cn_type: int
+    sync_type: int
+    data_type: int
+    bit_offset: int
+    byte_offset: int
+    bit_count: int
+    # Signal data of VLSD channels (SD, DZ or DL block)
+    data_link: int = 0
+    # Linear conversion a + b * x, None for 1:1
+    linear: Optional[Tuple[float, float]] = None
+
+
+@dataclass
+class _Mf4Group:
+    record_id: int
+    flags: int
+    record_bytes: int
+    # Channels by the last part of their name ("CAN_DataFrame.ID" -> "ID"), master as 'time'
+    channels: Dict[str, _Mf4Channel] = field(default_factory=dict)
+
+
+class BinaryTraceReader:
+    """
+    Streaming readers for binary bus logging files:
+      'blf' - Vector Binary Logging Format (CANoe / CANalyzer, Vector loggers), CAN and CAN FD messages
+      'mf4' - ASAM MDF 4 bus logging files (CAN_DataFrame channel groups), sorted or unsorted
+
+    The file is memory-mapped; compressed blocks (BLF log containers, MDF DZ blocks) are
+    inflated and concatenated into buffers of about BLOCK_BYTES, and every buffer is
+    parsed as a whole: object and record positions are located with array operations
+    and the frame fields are gathered column by column, so no Python work is done per
+    frame. An object or record cut by the end of a buffer is carried into the next one.
+    Timestamps are in seconds from the start of the measurement; remote frames are skipped.
+    """
+    FILE_TYPES = ('blf', 'mf4')
+    BLOCK_BYTES = 16 << 20
+
+    @staticmethod
+    def iter_batches(file_path: str, file_type: str,
+                     chunk_rows: Optional[int] = None) -> Generator[FrameBatch, None, None]:
+        """
+        Yields the frames of a binary trace as FrameBatches of at most chunk_rows frames
+        (one per parsed buffer when None).
+        """
+        if file_type == 'blf':
+            batches = BinaryTraceReader._blf_batches(file_path)
+        elif file_type == 'mf4':
+            batches = BinaryTraceReader._mf4_batches(file_path)
+        else:
+            raise ValueError(f"Unsupported binary trace type: {file_type}")
+
+        for batch in batches:
+            if not len(batch):
+                continue
+            if chunk_rows is None or len(batch) <= chunk_rows:
+                yield batch
+                continue
+            for start in range(0, len(batch), chunk_rows):
+                yield batch.slice(start, start + chunk_rows)
+
+    # ---- BLF ----
+
+    @staticmethod
+    def _blf_batches(file_path: str) -> Iterator[FrameBatch]:
+        with _mapped(file_path) as mm:
+            if len(mm) < _BLF_FILE_HEADER.size or mm[:4] != b'LOGG':
+                raise ValueError(f"Not a BLF file: {file_path}")
+            header_size = _BLF_FILE_HEADER.unpack_from(mm, 0)[1]
+            # Decompressed container data, starting with the tail of the previous buffer
+            pieces, size = [], 0
+            for data in BinaryTraceReader._blf_containers(mm, header_size, file_path):
+                pieces.append(data)
+                size += len(data)
+                if size >= BinaryTraceReader.BLOCK_BYTES:
+                    buffer = b''.join(pieces)
+                    batch, consumed = BinaryTraceReader._parse_blf_objects(buffer)
+                    pieces, size = [buffer[consumed:]], len(buffer) - consumed
+                    yield batch
+            if size:
+                # An object cut by the end of the file (still being written) is dropped
+                yield BinaryTraceReader._parse_blf_objects(b''.join(pieces))[0]
+
+    @staticmethod
+    def _blf_containers(mm: mmap.mmap, position: int, file_path: str) -> Iterator[bytes]:
+        # Walks the top level objects; only the log containers hold frames
+        with memoryview(mm) as view:
+            while position + _BLF_OBJECT.size <= len(mm):
+                signature, _, _, obj_size, obj_type = _BLF_OBJECT.unpack_from(mm, position)
+                if signature != b'LOBJ' or obj_size < _BLF_OBJECT.size:
+                    raise ValueError(f"Broken BLF object at byte {position} of {file_path}")
+                end = position + obj_size
+                if end > len(mm):
+                    return
+                if obj_type == BLF_LOG_CONTAINER:
+                    method, _ = _BLF_CONTAINER.unpack_from(mm, position + _BLF_OBJECT.size)
+                    data = view[position + _BLF_CONTAINER_DATA:end]
+                    if method == 2:
+                        yield zlib.decompress(data)
+                    elif method == 0:
+                        yield bytes(data)
+                    else:
+                        raise ValueError(f"Unsupported BLF compression method {method} in {file_path}")
+                # Top level objects are followed by obj_size % 4 padding bytes
+                position = end + obj_size % 4
+
+    @staticmethod
+    def _parse_blf_objects(buffer: bytes) -> Tuple[FrameBatch, int]:
+        """
+        Parses the objects of a run of decompressed container data.
+        Returns the frames and the number of bytes consumed; the rest starts with
+        an object that continues in the next container.
+        """
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        size = len(data)
+        if size < _BLF_OBJECT.size:
+            return FrameBatch.empty(), 0
+
+        # Every "LOBJ" is a candidate object start; payload bytes can spell it too,
+        # so the real objects are the chain from the first one, each followed by
+        # the first candidate after its end (inner objects have type specific padding)
+        starts = np.flatnonzero(data[:-3] == _BLF_SIGNATURE[0])
+        for k in range(1, 4):
+            starts = starts[data[starts + k] == _BLF_SIGNATURE[k]]
+        if not len(starts):
+            return FrameBatch.empty(), max(0, size - 3)
+        obj_size = _gather(data, starts + 8, '<u4').astype(np.int64)
+        ends = starts + np.maximum(obj_size, _BLF_OBJECT.size)
+        complete = (starts + _BLF_OBJECT.size <= size) & (ends <= size)
+        successor = np.where(complete, np.searchsorted(starts, ends), len(starts))
+        chain = _chain(successor)
+
+        last = chain[-1]
+        consumed = int(ends[last]) if complete[last] else int(starts[last])
+        objects = starts[chain[complete[chain]]]
+        obj_type = _gather(data, objects + 12, '<u4')
+        objects = objects[np.isin(obj_type, _BLF_CAN_TYPES)]
+        return BinaryTraceReader._blf_frames(data, objects), consumed
+
+    @staticmethod
+    def _blf_frames(data: np.ndarray, objects: np.ndarray) -> FrameBatch:
+        obj_type = _gather(data, objects + 12, '<u4')
+        header_size = _gather(data, objects + 4, '<u2').astype(np.int64)
+        time_flags = _gather(data, objects + 16, '<u4')
+        raw_time = _gather(data, objects + 24, '<u8')
+        # Start of the message body after the object header (v1 or v2)
+        body = objects + header_size
+
+        fd = obj_type == BLF_CAN_FD_MESSAGE
+        fd64 = obj_type == BLF_CAN_FD_MESSAGE_64
+        raw_id = _gather(data, body + 4, '<u4')
+
+        # CAN / CAN2 / CAN FD: flags at +2, DLC at +3; CAN FD 64: flags at +12, DLC at +1
+        remote = np.where(fd64, _gather(data, body + 12, '<u4') & 0x10,
+                          _gather(data, body + 2, 'u1') & 0x80) != 0
+        length = np.minimum(_gather(data, body + 3, 'u1'), 8).astype(np.int64)
+        length = np.where(fd, np.minimum(_gather(data, body + 14, 'u1'), 64), length)
+        if fd64.any():
+            # Valid payload length, limited to the bytes actually stored in the object
+            obj_size = _gather(data, objects + 8, '<u4').astype(np.int64)
+            ext_offset = _gather(data, body + 35, 'u1').astype(np.int64)
+            stored = np.where(ext_offset > 0, ext_offset, obj_size) - header_size - 40
+            valid = np.clip(np.minimum(_gather(data, body + 2, 'u1'), stored), 0, 64)
+            length = np.where(fd64, valid, length)
+        payload_start = body + np.where(fd64, 40, np.where(fd, 20, 8))
+
+        keep = ~remote
+        width = max(8, -(-int(length[keep].max(initial=0)) // 8) * 8)
+        payload = _gather_bytes(data, payload_start[keep], width, length[keep])
+
+        raw_id = raw_id[keep]
+        ids = raw_id & np.uint32(0x1FFFFFFF)
+        # Dividing by the units per second keeps e.g. 13 ms at exactly 0.013 s
+        units = np.where(time_flags[keep] == _BLF_TIME_TEN_MICS, 1e5, 1e9)
+        return FrameBatch(timestamp=raw_time[keep].astype(np.float64) / units,
+                          message_id=ids, payload=payload, dlc=length[keep],
+                          extended=((raw_id & np.uint32(CAN_EFF_FLAG)) != 0) | (ids > MAX_STANDARD_ID))
+
+    # ---- MF4 ----
+
+    @staticmethod
+    def _mf4_batches(file_path: str) -> Iterator[FrameBatch]:
+        with _mapped(file_path) as mm:
+            file_id = bytes(mm[:8])
+            if file_id.startswith(b'UnFinMF'):
+                raise ValueError(f"MDF file was not finalized by the logger, finalize it first: {file_path}")
+            if not file_id.startswith(b'MDF') or len(mm) < 64 + _MDF_BLOCK.size:
+                raise ValueError(f"Not an MDF file: {file_path}")
+            version = struct.unpack_from('<H', mm, 28)[0]
+            if version < 400:
+                raise ValueError(f"MDF {version / 100:.2f} files are not supported, only MDF 4: {file_path}")
+
+            found = False
+            hd_links = _mdf_block(mm, 64, b'##HD')[0]
+            dg = hd_links[0]
+            while dg:
+                dg_links, dg_data = _mdf_block(mm, dg, b'##DG')
+                record_id_size = mm[dg_data]
+                groups = []
+                cg = dg_links[1]
+                while cg:
+                    cg_links, cg_data = _mdf_block(mm, cg, b'##CG')
+                    record_id, _, flags, _, data_bytes, inval_bytes = _MDF_CG.unpack_from(mm, cg_data)
+                    group = _Mf4Group(record_id, flags, data_bytes + inval_bytes)
+                    if not flags & MDF_CG_VLSD:
+                        _mdf_channels(mm, cg_links[1], group.channels)
+                    groups.append(group)
+                    cg = cg_links[0]
+
+                frames = [g for g in groups if _is_data_frame_group(g)]
+                if frames:
+                    found = True
+                    for group in frames:
+                        _check_data_frame_group(mm, group, file_path)
+                    stream = _Mf4Stream(mm, dg_links[2])
+                    if record_id_size == 0:
+                        if len(groups) > 1:
+                            raise ValueError(f"MDF data group without record ids holds several channel groups: {file_path}")
+                        batches = BinaryTraceReader._mf4_sorted(mm, stream, frames[0])
+                    else:
+                        batches = BinaryTraceReader._mf4_unsorted(mm, stream, groups, frames, record_id_size, file_path)
+                    yield from batches
+                dg = dg_links[0]
+            if not found:
+                raise ValueError(f"No CAN_DataFrame channel group in MDF file: {file_path}")
+
+    @staticmethod
+    def _mf4_sorted(mm: mmap.mmap, stream: '_Mf4Stream', group: _Mf4Group) -> Iterator[FrameBatch]:
+        record_bytes = group.record_bytes
+        carry = b''
+        for piece in stream.pieces(BinaryTraceReader.BLOCK_BYTES):
+            buffer = carry + piece if carry else piece
+            count = len(buffer) // record_bytes
+            # Whole records as a (count, record_bytes) view, of the mapped file when uncompressed
+            records = np.frombuffer(buffer, dtype=np.uint8, count=count * record_bytes).reshape(count, record_bytes)
+            carry = bytes(buffer[count * record_bytes:])
+            yield BinaryTraceReader._mf4_frames(mm, group, records)
+
+    @staticmethod
+    def _mf4_unsorted(mm: mmap.mmap, stream: '_Mf4Stream', groups: List[_Mf4Group], frames: List[_Mf4Group],
+                      record_id_size: int, file_path: str) -> Iterator[FrameBatch]:
+        # Records of all channel groups interleaved, each starting with its record id;
+        # VLSD channel group records carry their own length
+        sizes = {g.record_id: (g.record_bytes, bool(g.flags & MDF_CG_VLSD)) for g in groups}
+        id_dtype = {1: 'u1', 2: '<u2', 4: '<u4', 8: '<u8'}[record_id_size]
+        carry = b''
+        for piece in stream.pieces(BinaryTraceReader.BLOCK_BYTES):
+            buffer = carry + bytes(piece) if carry else piece
+            data = np.frombuffer(buffer, dtype=np.uint8)
+            size = len(data)
+            if size < record_id_size:
+                carry = bytes(buffer)
+                continue
+
+            # Candidate record starts: positions holding a known record id
+            first_bytes = np.array([record_id & 0xFF for record_id in sizes], dtype=np.uint8)
+            starts = np.flatnonzero(np.isin(data[:size - record_id_size + 1], first_bytes))
+            ids = _gather(data, starts, id_dtype)
+            known = np.isin(ids, list(sizes))
+            starts, ids = starts[known], ids[known]
+            if not len(starts) or starts[0] != 0:
+                raise ValueError(f"Unknown MDF record id at byte 0 of a data block of {file_path}")
+
+            ends = np.zeros(len(starts), dtype=np.int64)
+            for record_id, (record_bytes, vlsd) in sizes.items():
+                of_group = ids == record_id
+                if vlsd:
+                    length = _gather(data, starts[of_group] + record_id_size, '<u4').astype(np.int64)
+                    ends[of_group] = starts[of_group] + record_id_size + 4 + length
+                else:
+                    ends[of_group] = starts[of_group] + record_id_size + record_bytes
+            complete = ends <= size
+            successor = np.searchsorted(starts, ends)
+            exact = successor < len(starts)
+            exact[exact] = starts[successor[exact]] == ends[exact]
+            chain = _chain(np.where(complete & exact, successor, len(starts)))
+
+            last = chain[-1]
+            if complete[last] and ends[last] + record_id_size <= size:
+                raise ValueError(f"Unknown MDF record id at byte {ends[last]} of a data block of {file_path}")
+            consumed = int(ends[last]) if complete[last] else int(starts[last])
+            carry = bytes(buffer[consumed:])
+
+            chain = chain[complete[chain]]
+            batches = []
+            for group in frames:
+                positions = starts[chain[ids[chain] == group.record_id]] + record_id_size
+                records = data[positions[:, None] + np.arange(group.record_bytes)]
+                batches.append((positions, BinaryTraceReader._mf4_frames(mm, group, records)))
+            yield _merge_in_file_order(batches)
+
+    @staticmethod
+    def _mf4_frames(mm: mmap.mmap, group: _Mf4Group, records: np.ndarray) -> FrameBatch:
+        channels = group.channels
+        timestamps = _mf4_values(records, channels['time'])
+        raw_id = _mf4_values(records, channels['ID']).astype(np.uint32)
+        ids = raw_id & np.uint32(0x1FFFFFFF)
+        if 'IDE' in channels:
+            extended = _mf4_values(records, channels['IDE']) != 0
+        else:
+            extended = (raw_id & np.uint32(CAN_EFF_FLAG)) != 0
+        extended |= ids > MAX_STANDARD_ID
+
+        data_bytes = channels['DataBytes']
+        if data_bytes.cn_type == MDF_CN_VLSD:
+            offsets = _mf4_values(records, data_bytes, as_integer=True)
+            content, stored = _Mf4Stream(mm, data_bytes.data_link).signal_data(offsets)
+        else:
+            start = data_bytes.byte_offset
+            content = records[:, start:start + data_bytes.bit_count // 8]
+            stored = np.full(len(records), content.shape[1], dtype=np.int64)
+
+        if 'DataLength' in channels:
+            length = _mf4_values(records, channels['DataLength'], as_integer=True)
+        elif 'DLC' in channels:
+            length = _FD_LENGTHS[np.minimum(_mf4_values(records, channels['DLC'], as_integer=True), 15)]
+        else:
+            length = stored
+        length = np.clip(np.minimum(length, stored), 0, 64).astype(np.int64)
+
+        width = max(8, -(-int(length.max(initial=0)) // 8) * 8)
+        payload = np.zeros((len(records), width), dtype=np.uint8)
+        columns = min(width, content.shape[1])
+        payload[:, :columns] = content[:, :columns]
+        payload[np.arange(width) >= length[:, None]] = 0
+        return FrameBatch(timestamp=timestamps.astype(np.float64), message_id=ids, payload=payload,
+                          dlc=length, extended=extended)
+
+
+class _Mf4Stream:
+    """
+    The logical byte stream of an MDF data link: a DT / SD block, a DZ block or a
+    DL list (possibly under an HL block) of such blocks. Uncompressed blocks are
+    served as views of the mapped file.
+    """
+
+    def __init__(self, mm: mmap.mmap, address: int):
+        self.mm = mm
+        # (address of the block, logical start, logical length)
+        self.fragments: List[Tuple[int, int, int]] = []
+        self.length = 0
+        self._inflated: Tuple[int, bytes] = (-1, b'')
+        self._add(address)
+
+    def _add(self, address: int):
+        if not address:
+            return
+        block_id, length = _MDF_BLOCK.unpack_from(self.mm, address)[:2]
+        if block_id in (b'##DT', b'##SD', b'##RD'):
+            self._append(address, length - _MDF_BLOCK.size)
+        elif block_id == b'##DZ':
+            self._append(address, _MDF_DZ.unpack_from(self.mm, address + _MDF_BLOCK.size)[3])
+        elif block_id == b'##HL':
+            self._add(_mdf_block(self.mm, address, b'##HL')[0][0])
+        elif block_id == b'##DL':
+            while address:
+                links, data = _mdf_block(self.mm, address, b'##DL')
+                count = _MDF_DL.unpack_from(self.mm, data)[1]
+                for item in links[1:1 + count]:
+                    self._add(item)
+                address = links[0]
+        else:
+            raise ValueError(f"Unsupported MDF data block {block_id.decode('latin-1')} at byte {address}")
+
+    def _append(self, address: int, length: int):
+        self.fragments.append((address, self.length, length))
+        self.length += length
+
+    def _fragment(self, address: int):
+        # Bytes of one block: a view of the mapped file, or the inflated DZ data
+        if self.mm[address + 2:address + 4] != b'DZ':
+            return memoryview(self.mm)[address + _MDF_BLOCK.size:address + _MDF_BLOCK.size +
+                                       _MDF_BLOCK.unpack_from(self.mm, address)[1] - _MDF_BLOCK.size]
+        if self._inflated[0] == address:
+            return self._inflated[1]
+        _, zip_type, columns, original, compressed = _MDF_DZ.unpack_from(self.mm, address + _MDF_BLOCK.size)
+        start = address + _MDF_BLOCK.size + _MDF_DZ.size
+        data = zlib.decompress(memoryview(self.mm)[start:start + compressed])
+        if zip_type == _MDF_ZIP_TRANSPOSED and columns > 1:
+            # Stored column by column: undo the transposition of the whole rows
+            rows = original // columns
+            matrix = np.frombuffer(data, dtype=np.uint8, count=rows * columns)
+            data = matrix.reshape(columns, rows).T.tobytes() + data[rows * columns:]
+        elif zip_type not in (0, _MDF_ZIP_TRANSPOSED):
+            raise ValueError(f"Unsupported MDF zip type {zip_type}")
+        self._inflated = (address, data)
+        return data
+
+    def pieces(self, max_bytes: int) -> Iterator:
+        for address, _, length in self.fragments:
+            data = self._fragment(address)
+            for start in range(0, length, max_bytes):
+                yield data[start:start + max_bytes]
+
+    def read(self, start: int, stop: int):
+        """
+        Bytes [start, stop) of the stream.
+        """
+        parts = []
+        for address, begin, length in self.fragments:
+            if begin + length <= start or begin >= stop:
+                continue
+            data = self._fragment(address)
+            parts.append(data[max(start - begin, 0):min(stop - begin, length)])
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def signal_data(self, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Values of a VLSD channel: every offset points to a 4 byte length and the bytes.
+        Returns a (N, W) zero padded byte matrix and the length of every value.
+        """
+        if not len(offsets):
+            return np.zeros((0, 8), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+        offsets = offsets.astype(np.int64)
+        low = int(offsets.min())
+        heads = np.frombuffer(self.read(low, int(offsets.max()) + 4), dtype=np.uint8)
+        lengths = _gather(heads, offsets - low, '<u4').astype(np.int64)
+        data = np.frombuffer(self.read(low, int((offsets + 4 + lengths).max())), dtype=np.uint8)
+        width = max(8, int(lengths.max()))
+        return _gather_bytes(data, offsets - low + 4, width, lengths), lengths
+
+
+@contextmanager
+def _mapped(file_path: str):
+    with open(file_path, 'rb') as f:
+        if not f.seek(0, 2):
+            raise ValueError(f"Empty file: {file_path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mm
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # Arrays of an abandoned read still view the mapping, it closes with them
+            pass
+
+
+def _chain(successor: np.ndarray) -> np.ndarray:
+    """
+    Indices of the nodes on the path from node 0 following successor, which points
+    to a later node or to len(successor) at the end. The path is found by pointer
+    doubling in O(N log N) array operations instead of a loop over the nodes.
+    """
+    count = len(successor)
+    if np.array_equal(successor, np.arange(1, count + 1)):
+        return np.arange(count)
+    jump = np.append(successor, count)
+    on_path = np.zeros(count + 1, dtype=bool)
+    on_path[[0, count]] = True
+    path = np.zeros(1, dtype=np.int64)
+    while True:
+        reached = jump[path]
+        reached = reached[~on_path[reached]]
+        if not len(reached):
+            return np.sort(path)
+        on_path[reached] = True
+        path = np.concatenate((path, reached))
+        jump = jump[jump]
+
+
+def _gather(data: np.ndarray, positions: np.ndarray, dtype: str) -> np.ndarray:
+    # One little / big endian value at every position of a byte array
+    dtype = np.dtype(dtype)
+    positions = np.minimum(positions, len(data) - dtype.itemsize)
+    if dtype.itemsize == 1:
+        return data[positions].view(dtype)
+    matrix = data[positions[:, None] + np.arange(dtype.itemsize)]
+    return matrix.view(dtype).ravel()
+
+
+def _gather_bytes(data: np.ndarray, positions: np.ndarray, width: int, lengths: np.ndarray) -> np.ndarray:
+    # (N, width) payload matrix of length bytes at every position, zero padded
+    columns = np.arange(width)
+    matrix = data[np.minimum(positions[:, None] + columns, len(data) - 1)]
+    matrix[columns >= lengths[:, None]] = 0
+    return matrix
+
+
+def _merge_in_file_order(batches: List[Tuple[np.ndarray, FrameBatch]]) -> FrameBatch:
+    # Frames of several channel groups of one data group, back in record order
+    if len(batches) == 1:
+        return batches[0][1]
+    order = np.argsort(np.concatenate([positions for positions, _ in batches]), kind='stable')
+    return FrameBatch.concat([batch for _, batch in batches]).take(order)
+
+
+def _mdf_block(mm: mmap.mmap, address: int, expected: bytes) -> Tuple[Tuple[int, ...], int]:
+    # Links and the start of the data section of a block
+    block_id, _, link_count = _MDF_BLOCK.unpack_from(mm, address)
+    if block_id != expected:
+        raise ValueError(f"Expected MDF block {expected.decode('latin-1')} at byte {address}, "
+                         f"found {block_id.decode('latin-1')}")
+    links = struct.unpack_from(f'<{link_count}Q', mm, address + _MDF_BLOCK.size)
+    return links, address + _MDF_BLOCK.size + 8 * link_count
+
+
+def _mdf_text(mm: mmap.mmap, address: int) -> str:
+    if not address:
+        return ''
+    block_id, length, _ = _MDF_BLOCK.unpack_from(mm, address)
+    text = bytes(mm[address + _MDF_BLOCK.size:address + length])
+    return text.split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+
+def _mdf_channels(mm: mmap.mmap, address: int, channels: Dict[str, _Mf4Channel]):
+    # Channels of a group, including the members of structures (CAN_DataFrame.ID, ...)
+    while address:
+        links, data = _mdf_block(mm, address, b'##CN')
+        cn_type, sync_type, data_type, bit_offset, byte_offset, bit_count = _MDF_CN.unpack_from(mm, data)
+        name = _mdf_text(mm, links[2])
+        channel = _Mf4Channel(name, cn_type, sync_type, data_type, bit_offset, byte_offset, bit_count,
+                              data_link=links[5], linear=_mdf_conversion(mm, links[4], name))
+        if cn_type in (MDF_CN_MASTER, MDF_CN_VIRTUAL_MASTER) and sync_type == MDF_SYNC_TIME:
+            channels['time'] = channel
+        else:
+            channels.setdefault(name.rsplit('.', 1)[-1], channel)
+        if links[1] and _MDF_BLOCK.unpack_from(mm, links[1])[0] == b'##CN':
+            _mdf_channels(mm, links[1], channels)
+        address = links[0]
+
+
+def _mdf_conversion(mm: mmap.mmap, address: int, name: str) -> Optional[Tuple[float, float]]:
+    if not address:
+        return None
+    _, data = _mdf_block(mm, address, b'##CC')
+    cc_type, _, _, _, value_count = _MDF_CC.unpack_from(mm, data)
+    if cc_type == 0:
+        return None
+    if cc_type == 1 and value_count >= 2:
+        # phy_min and phy_max come before the values
+        return struct.unpack_from('<2d', mm, data + _MDF_CC.size + 16)
+    raise ValueError(f"Unsupported MDF conversion type {cc_type} of channel {name}")
+
+
+def _is_data_frame_group(group: _Mf4Group) -> bool:
+    return 'ID' in group.channels and 'DataBytes' in group.channels and \
+        any(channel.name.startswith('CAN_DataFrame') for channel in group.channels.values())
+
+
+def _check_data_frame_group(mm: mmap.mmap, group: _Mf4Group, file_path: str):
+    if 'time' not in group.channels or group.channels['time'].cn_type == MDF_CN_VIRTUAL_MASTER:
+        raise ValueError(f"CAN_DataFrame group without a stored time master channel in {file_path}")
+    data_bytes = group.channels['DataBytes']
+    if data_bytes.cn_type == MDF_CN_VLSD and data_bytes.data_link and \
+            _MDF_BLOCK.unpack_from(mm, data_bytes.data_link)[0] == b'##CG':
+        raise ValueError(f"DataBytes stored in a VLSD channel group are not supported, "
+                         f"save the file with signal data blocks: {file_path}")
+
+
+def _mf4_values(records: np.ndarray, channel: _Mf4Channel, as_integer: bool = False) -> np.ndarray:
+    """
+    Values of one channel for every record, with its linear conversion applied
+    unless as_integer is set.
+    """
+    start = channel.byte_offset
+    size = (channel.bit_offset + channel.bit_count + 7) // 8
+    if channel.data_type in _MDF_FLOAT and channel.bit_count in (32, 64):
+        byte_order = '>' if channel.data_type in _MDF_BIG_ENDIAN else '<'
+        raw = np.ascontiguousarray(records[:, start:start + size]).view(f'{byte_order}f{size}').ravel()
+        values = raw.astype(np.float64)
+    else:
+        columns = records[:, start:start + min(size, 8)]
+        if channel.data_type in _MDF_BIG_ENDIAN:
+            columns = columns[:, ::-1]
+        padded = np.zeros((len(records), 8), dtype=np.uint8)
+        padded[:, :columns.shape[1]] = columns
+        values = padded.view('<u8').ravel() >> np.uint64(channel.bit_offset)
+        if channel.bit_count < 64:
+            values &= np.uint64((1 << channel.bit_count) - 1)
+        if as_integer:
+            return values.astype(np.int64)
+    if channel.linear is None or as_integer:
+        return values
+    offset, factor = channel.linear
+    values = values.astype(np.float64)
+    if 0 < factor < 1 and abs(1 / factor - round(1 / factor)) < 1e-6:
+        # Dividing by the units per second keeps e.g. 13 ms at exactly 0.013 s
+        return values / round(1 / factor) + offset
+    return values * factor + offset
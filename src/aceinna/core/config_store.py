@@ -6,6 +6,7 @@ from ..models.convertor import Convertor
 from ..models.fetch_rule import DataSourceFetchRule
 from ..models.data_source import CommonCANDataSource, J1939DataSource, MessageMapping, FieldSetting
 from ..models.convert_rule import PlotRule, DataListRule, AxisBinding, DataListField
+from .decode_plan import DecodePlan
 
 # Helper to serialize/deserialize complex nested objects
 class ConfigStore:
@@ -13,6 +14,8 @@ class ConfigStore:
         self.config_file = config_file
         self.convertors: List[Convertor] = []
         self.fetch_rules: List[DataSourceFetchRule] = []
+        # Persistent frame cache of parsed logs (see FrameCache)
+        self.frame_cache = True
         self._observers = []
         self.load()
 
@@ -35,6 +38,7 @@ class ConfigStore:
                 data = json.load(f)
                 self.convertors = [self._dict_to_convertor(c) for c in data.get('convertors', [])]
                 self.fetch_rules = [self._dict_to_fetch_rule(r) for r in data.get('fetch_rules', [])]
+                self.frame_cache = bool(data.get('frame_cache', True))
                 self.notify_observers()
             except Exception as e:
                 print(f"Failed to load config from {path}: {e}")
@@ -45,14 +49,20 @@ class ConfigStore:
     def save_to_file(self, path: str):
         data = {
             'convertors': [asdict(c) for c in self.convertors],
-            'fetch_rules': [asdict(r) for r in self.fetch_rules]
+            'fetch_rules': [asdict(r) for r in self.fetch_rules],
+            'frame_cache': self.frame_cache
         }
         with open(path, 'w') as f:
             json.dump(data, f, indent=4)
 
+        # Drop compiled decode plans of mappings that no longer exist
+        DecodePlan.invalidate(c.data_source for c in self.convertors)
+
     def _dict_to_convertor(self, d: Dict) -> Convertor:
         # Reconstruct objects from dict (since dataclasses generic init might not handle nested conversion automatically)
-        c = Convertor(name=d['name'], result_folder=d.get('result_folder', ''))
+        c = Convertor(name=d['name'], result_folder=d.get('result_folder', ''),
+                      decode_all=d.get('decode_all', False),
+                      compact_signals=d.get('compact_signals', True))
         
         # Restore Data Source
         ds_data = d.get('data_source')
@@ -86,7 +96,11 @@ class ConfigStore:
                     tick_labelsize=rd.get('tick_labelsize', 8),
                     legend_label=rd.get('legend_label', 'legend1'),
                     legend_loc=rd.get('legend_loc', 'best'),
-                    legend_fontsize=rd.get('legend_fontsize', 8)
+                    legend_fontsize=rd.get('legend_fontsize', 8),
+                    downsample=rd.get('downsample', 'none'),
+                    backend=rd.get('backend', 'matplotlib'),
+                    xy_pairing=rd.get('xy_pairing', 'nearest'),
+                    xy_tolerance=rd.get('xy_tolerance')
                 )
                 if rd.get('x_axis'):
                     rule.x_axis = AxisBinding(binding=rd['x_axis']['binding'])
@@ -97,7 +111,12 @@ class ConfigStore:
                 rule = DataListRule(
                     title=rd.get('title', ''),
                     delimiter=rd.get('delimiter', ','),
-                    include_header=rd.get('include_header', True)
+                    include_header=rd.get('include_header', True),
+                    align_mode=rd.get('align_mode', 'union'),
+                    resample_rate=rd.get('resample_rate', 10.0),
+                    reference=rd.get('reference', ''),
+                    tolerance=rd.get('tolerance'),
+                    emit=rd.get('emit', 'every_row')
                 )
                 if rd.get('fields'):
                     rule.fields = [DataListField(binding=f['binding']) for f in rd['fields']]
@@ -0,0 +1,200 @@
+import contextlib
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from ..models.convertor import Convertor
+from ..models.fetch_rule import DataSourceFetchRule
+from .data_loader import DataLoader
+from .frame_batch import FrameBatch
+from .incremental_state import IncrementalState
+from .parallel_decoder import ParallelDecoder
+from .result_generator import ResultGenerator, ResultFailure
+from .signal_store import SignalStore
+
+# Progress callback: (message, percent)
+ProgressReport = Callable[[str, int], None]
+
+# Exit codes of a conversion job
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_RESULTS_FAILED = 2
+
+
+@dataclass
+class ConversionResult:
+    """
+    Outcome of converting one data file.
+    """
+    data_file_path: str
+    output_folder: str = ""
+    frames: int = 0
+    malformed_ids: int = 0
+    signals: int = 0
+    failures: List[ResultFailure] = field(default_factory=list)
+    cancelled: bool = False
+
+
+class Conversion:
+    """
+    The load -> decode -> generate pipeline of one data file, without any UI.
+    Used by the GUI worker thread and by the headless batch runner.
+    """
+    @staticmethod
+    def output_folder(convertor: Convertor, data_file_path: str) -> str:
+        if convertor.result_folder:
+            return convertor.result_folder
+        # Fallback: next to the data file
+        return os.path.join(os.path.dirname(data_file_path), f"{convertor.name}_results")
+
+    @staticmethod
+    def run(convertor: Convertor, fetch_rule: DataSourceFetchRule, data_file_path: str,
+            workers: int = 1, output_folder: Optional[str] = None,
+            cancel_check: Optional[Callable[[], bool]] = None,
+            report: Optional[ProgressReport] = None) -> ConversionResult:
+        """
+        Converts one data file with `workers` decode and plot processes (1 works in this process).
+        Results go to output_folder, or the convertor's folder when None.
+        Returns early with cancelled=True when cancel_check() becomes True.
+        """
+        report = report or (lambda message, percent: None)
+        cancelled = cancel_check or (lambda: False)
+        result = ConversionResult(data_file_path)
+
+        # 1. Load and 2. Decode, chunk by chunk so memory stays bounded
+        if cancelled():
+            result.cancelled = True
+            return result
+        report("Loading data...", 10)
+        batches = Conversion._track_batches(DataLoader.iter_batches(data_file_path, fetch_rule), result, report)
+        if convertor.data_source:
+            # Only the fields the rules bind, unless the convertor asks for everything
+            signals = None if convertor.decode_all else ResultGenerator.required_signals(convertor.convert_rules)
+            results = ParallelDecoder.decode_stream(batches, convertor.data_source, workers,
+                                                    cancel_check=cancel_check, signals=signals,
+                                                    compact=convertor.compact_signals)
+        else:
+            results = SignalStore()
+        result.signals = len(results)
+        if result.malformed_ids:
+            report(f"Decoding complete, {result.malformed_ids} malformed rows skipped.", 70)
+        else:
+            report("Decoding complete.", 70)
+
+        # 3. Generate Results
+        if cancelled():
+            result.cancelled = True
+            return result
+        report("Generating results...", 80)
+        result.output_folder = output_folder or Conversion.output_folder(convertor, data_file_path)
+        result.failures = ResultGenerator.generate(results, convertor.convert_rules, result.output_folder,
+                                                   workers=workers)
+        return result
+
+    @staticmethod
+    def refresh(convertor: Convertor, fetch_rule: DataSourceFetchRule, data_file_path: str,
+                workers: int = 1, output_folder: Optional[str] = None,
+                cancel_check: Optional[Callable[[], bool]] = None,
+                report: Optional[ProgressReport] = None) -> ConversionResult:
+        """
+        Incremental run() for a CSV log that keeps growing: parses and decodes only the
+        lines appended since the last refresh, appends the new rows to the data lists
+        and redraws the plots. The checkpoint and decoded signals are kept in the result
+        folder (see IncrementalState); a changed convertor, fetch rule or rewritten log
+        starts over from the beginning. result.frames counts the new frames only.
+        """
+        report = report or (lambda message, percent: None)
+        cancelled = cancel_check or (lambda: False)
+        result = ConversionResult(data_file_path)
+        result.output_folder = output_folder or Conversion.output_folder(convertor, data_file_path)
+
+        key = IncrementalState.key_of(convertor, fetch_rule, data_file_path)
+        state = IncrementalState.load(result.output_folder)
+        resumed = state is not None and state.key == key and state.checkpoint.matches(data_file_path)
+        if not resumed:
+            if state is not None:
+                report("Data file or convertor changed, converting from the start...", 5)
+            state = IncrementalState(key)
+        previous_end = state.checkpoint.last_timestamp
+
+        # 1. Load and 2. Decode the appended lines
+        if cancelled():
+            result.cancelled = True
+            return result
+        report("Loading new data...", 10)
+        batches = Conversion._track_batches(
+            DataLoader.iter_appended_batches(data_file_path, fetch_rule, state.checkpoint), result, report)
+        if convertor.data_source:
+            signals = None if convertor.decode_all else ResultGenerator.required_signals(convertor.convert_rules)
+            new_results = ParallelDecoder.decode_stream(batches, convertor.data_source, workers,
+                                                        cancel_check=cancel_check, signals=signals,
+                                                        compact=convertor.compact_signals)
+        else:
+            new_results = SignalStore()
+            for _ in batches:
+                pass
+        if cancelled():
+            # The checkpoint on disk still points before the new lines
+            result.cancelled = True
+            return result
+        if resumed and result.frames == 0:
+            report("No new data.", 100)
+            result.signals = len(state.store)
+            return result
+
+        firsts = [columns.timestamps[0] for columns in new_results.messages.values()
+                  if columns.size and columns.timestamps.dtype != object]
+        if previous_end is not None and firsts and min(firsts) < previous_end:
+            # Frames older than the rows written before: rewrite the data lists instead of appending
+            state.data_list_ends.clear()
+        state.extend(new_results)
+        results = state.store.trim()
+        if convertor.compact_signals:
+            results.compact()
+        result.signals = len(results)
+        report(f"Decoding complete, {result.frames} new frames.", 70)
+
+        # 3. Generate Results
+        report("Generating results...", 80)
+        result.failures = ResultGenerator.generate(results, convertor.convert_rules, result.output_folder,
+                                                   workers=workers, data_list_ends=state.data_list_ends)
+        state.save(result.output_folder)
+        return result
+
+    @staticmethod
+    def _track_batches(batches: Iterable[FrameBatch], result: ConversionResult,
+                       report: ProgressReport) -> Iterator[FrameBatch]:
+        for batch in batches:
+            result.frames += len(batch)
+            result.malformed_ids += batch.malformed_id_count
+            report(f"Decoding data... ({result.frames} frames)", 40)
+            yield batch
+
+
+def run_job(convertor: Convertor, fetch_rule: DataSourceFetchRule, data_file_path: str,
+            output_folder: str, workers: int = 1, incremental: bool = False) -> Dict:
+    """
+    Job queue side: converts one file (Conversion.refresh when incremental) and returns
+    its summary entry (file, output_folder, status, exit_code, counts, failures or error, seconds).
+    Never raises, so one bad file does not stop the others.
+    """
+    started = time.time()
+    entry = {'file': data_file_path, 'output_folder': output_folder}
+    try:
+        # Messages of the pipeline go to stderr, stdout is reserved for machine-readable output
+        with contextlib.redirect_stdout(sys.stderr):
+            convert = Conversion.refresh if incremental else Conversion.run
+            result = convert(convertor, fetch_rule, data_file_path, workers, output_folder=output_folder)
+        entry.update(
+            status='results_failed' if result.failures else 'ok',
+            exit_code=EXIT_RESULTS_FAILED if result.failures else EXIT_OK,
+            frames=result.frames,
+            malformed_ids=result.malformed_ids,
+            signals=result.signals,
+            failures=[asdict(failure) for failure in result.failures]
+        )
+    except Exception as e:
+        entry.update(status='error', exit_code=EXIT_ERROR, error=f"{type(e).__name__}: {e}")
+    entry['seconds'] = round(time.time() - started, 3)
+    return entry
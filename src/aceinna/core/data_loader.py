@@ -1,78 +1,491 @@
 import pandas as pd
-from typing import Tuple, Generator
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Tuple, Generator, Iterator, Optional, Union
+import hashlib
+import io
 import os
+import openpyxl
 from ..models.fetch_rule import DataSourceFetchRule
-from ..utils.hex_parser import parse_hex_string
+from ..utils.hex_parser import parse_hex_matrix
+from ..utils.id_parser import parse_id_column, detect_hex_notation
+from .frame_batch import FrameBatch
+from .frame_cache import FrameCache
+from .trace_reader import TraceReader
+from .binary_trace_reader import BinaryTraceReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+@dataclass
+class LoadCheckpoint:
+    """
+    Where the incremental load of a growing CSV file stopped.
+    offset is the end of the last complete line read; a line still being written
+    is left for the next load. The fingerprint hashes the bytes around the start
+    and the end of the read part, so a replaced or truncated file is detected.
+    """
+    offset: int = 0
+    fingerprint: str = ""
+    # Last timestamp read, None for text timestamps
+    last_timestamp: Optional[float] = None
+    # Id notation detected on the first chunk of the file
+    hex_ids: Optional[bool] = None
+    frames: int = 0
+
+    # Bytes hashed at each end of the read part
+    FINGERPRINT_BYTES = 4096
+
+    def matches(self, file_path: str) -> bool:
+        """
+        True when the file still starts with the part this checkpoint has read.
+        """
+        if self.offset == 0:
+            return True
+        try:
+            if os.path.getsize(file_path) < self.offset:
+                return False
+            return LoadCheckpoint.fingerprint_of(file_path, self.offset) == self.fingerprint
+        except OSError:
+            return False
+
+    @staticmethod
+    def fingerprint_of(file_path: str, offset: int) -> str:
+        size = LoadCheckpoint.FINGERPRINT_BYTES
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(min(size, offset)))
+            f.seek(max(0, offset - size))
+            digest.update(f.read(min(size, offset)))
+        return digest.hexdigest()
+
+
+class _FileRange(io.RawIOBase):
+    """
+    Read-only stream over the bytes [start, end) of a file, for the CSV readers.
+    """
+    def __init__(self, file_path: str, start: int, end: int):
+        super().__init__()
+        self._file = open(file_path, 'rb')
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self._left)
+        if count <= 0:
+            return 0
+        count = self._file.readinto(memoryview(buffer)[:count])
+        self._left -= count
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
 
 class DataLoader:
+    # Rows per chunk in streaming mode; a chunk of classic CAN frames stays well below 100 MB
+    DEFAULT_CHUNK_ROWS = 500_000
+    # Bytes read per block by the pyarrow CSV reader
+    ARROW_BLOCK_SIZE = 16 << 20
+
     @staticmethod
-    def load_data(file_path: str, rule: DataSourceFetchRule) -> pd.DataFrame:
+    def load_data(file_path: str, rule: DataSourceFetchRule) -> FrameBatch:
         """
         Load data from file based on the rule.
-        Returns a DataFrame with columns: ['timestamp', 'message_id', 'data']
+        Returns a FrameBatch with timestamp, message_id, payload matrix and dlc arrays.
+        """
+        DataLoader._check_file(file_path)
+        return FrameBatch.concat(list(DataLoader._cached_batches(file_path, rule, chunk_rows=None)))
+
+    @staticmethod
+    def iter_batches(file_path: str, rule: DataSourceFetchRule,
+                     chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Generator[FrameBatch, None, None]:
+        """
+        Streaming variant of load_data: yields FrameBatches of at most chunk_rows frames,
+        so peak memory is bounded by the chunk size instead of the file size.
+        """
+        DataLoader._check_file(file_path)
+        yield from DataLoader._cached_batches(file_path, rule, chunk_rows)
+
+    @staticmethod
+    def iter_appended_batches(file_path: str, rule: DataSourceFetchRule, checkpoint: LoadCheckpoint,
+                              chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Generator[FrameBatch, None, None]:
+        """
+        Incremental variant of iter_batches for CSV files that keep growing, e.g. during
+        endurance runs: yields only the frames of the complete lines after checkpoint.offset.
+        The checkpoint is advanced once the new lines are read completely, so a cancelled
+        load reads the same lines again next time. The checkpoint must match the file
+        (see LoadCheckpoint.matches); the frame cache is not used.
         """
+        DataLoader._check_file(file_path)
+        if rule.file_type != 'csv':
+            raise ValueError(f"Incremental loading supports CSV files only, not {rule.file_type}")
+
+        start = checkpoint.offset
+        end = DataLoader._complete_lines_end(file_path, start)
+        if end <= start:
+            return
+
+        hex_ids = checkpoint.hex_ids
+        frames = 0
+        last_timestamp = checkpoint.last_timestamp
+        for frame in DataLoader._read_csv_frames(file_path, rule, chunk_rows, byte_range=(start, end)):
+            hex_ids = DataLoader._id_notation(frame['message_id'], hex_ids, file_path)
+            batch = DataLoader._to_batch(frame, file_path, hex_ids)
+            frames += len(batch)
+            if len(batch) and batch.timestamp.dtype != object and not np.isnan(batch.timestamp).all():
+                last_timestamp = float(np.nanmax(batch.timestamp))
+            yield batch
+
+        checkpoint.offset = end
+        checkpoint.fingerprint = LoadCheckpoint.fingerprint_of(file_path, end)
+        checkpoint.last_timestamp = last_timestamp
+        checkpoint.hex_ids = hex_ids
+        checkpoint.frames += frames
+
+    @staticmethod
+    def _complete_lines_end(file_path: str, start: int, block_size: int = 1 << 16) -> int:
+        # Offset just past the last newline of the file, searched backwards from its current end
+        with open(file_path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            while position > start:
+                size = min(block_size, position - start)
+                f.seek(position - size)
+                newline = f.read(size).rfind(b'\n')
+                if newline >= 0:
+                    return position - size + newline + 1
+                position -= size
+        return start
+
+    @staticmethod
+    def _check_file(file_path: str):
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Determine indices from rule (Assuming 0-based index from rule for now)
-        # If the UI provides 1-based, we might need to subtract 1. 
-        # For now, let's assume the rule stores 0-based indices.
-        col_indices = [
-            rule.timestamp_col_index,
-            rule.message_id_col_index,
-            rule.message_data_col_index
-        ]
-        
+    @staticmethod
+    def _cached_batches(file_path: str, rule: DataSourceFetchRule,
+                        chunk_rows: Optional[int]) -> Generator[FrameBatch, None, None]:
+        """
+        Serves the batches from the frame cache when the file was loaded before
+        with the same rule columns, otherwise parses the file and fills the cache.
+        """
+        if not FrameCache.enabled:
+            yield from DataLoader._read_batches(file_path, rule, chunk_rows)
+            return
+
+        key = FrameCache.key_of(file_path, rule)
+        cached = FrameCache.read(key)
+        if cached is None:
+            yield from FrameCache.write_through(key, DataLoader._read_batches(file_path, rule, chunk_rows))
+            return
+
+        for batch in cached:
+            if chunk_rows is None or len(batch) <= chunk_rows:
+                yield batch
+                continue
+            # Re-cut to the requested chunk size; slices of the mapped arrays are views
+            for start in range(0, len(batch), chunk_rows):
+                chunk = batch.slice(start, start + chunk_rows)
+                if start == 0:
+                    chunk.malformed_id_count = batch.malformed_id_count
+                yield chunk
+
+    @staticmethod
+    def _read_batches(file_path: str, rule: DataSourceFetchRule,
+                      chunk_rows: Optional[int]) -> Iterator[FrameBatch]:
+        if rule.file_type in TraceReader.FILE_TYPES:
+            # Text traces of CAN tools are tokenized straight into frame arrays, the rule columns do not apply
+            return TraceReader.iter_batches(file_path, rule.file_type, chunk_rows)
+        if rule.file_type in BinaryTraceReader.FILE_TYPES:
+            # Binary bus logging files are parsed block by block from the mapped file
+            return BinaryTraceReader.iter_batches(file_path, rule.file_type, chunk_rows)
+        return DataLoader._to_batches(DataLoader._read_frames(file_path, rule, chunk_rows), file_path)
+
+    @staticmethod
+    def _read_frames(file_path: str, rule: DataSourceFetchRule,
+                     chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+        """
+        Yields DataFrames with only the ['timestamp', 'message_id', 'data'] columns.
+        Only the three columns of the rule are parsed; chunk_rows=None reads the file at once.
+        """
         # Read file
         if rule.file_type == 'xlsx':
-            df = pd.read_excel(file_path, header=None) # Assuming no header or we handle it by index
+            return DataLoader._read_xlsx_frames(file_path, rule, chunk_rows)
         elif rule.file_type == 'csv':
-            df = pd.read_csv(file_path, header=None)
+            return DataLoader._read_csv_frames(file_path, rule, chunk_rows)
         else:
             raise ValueError(f"Unsupported file type: {rule.file_type}")
 
-        # Select relevant columns
+    @staticmethod
+    def _column_indices(rule: DataSourceFetchRule) -> Tuple[int, int, int]:
+        # Determine indices from rule (Assuming 0-based index from rule for now)
+        # If the UI provides 1-based, we might need to subtract 1.
+        # For now, let's assume the rule stores 0-based indices.
+        return rule.timestamp_col_index, rule.message_id_col_index, rule.message_data_col_index
+
+    @staticmethod
+    def _read_xlsx_frames(file_path: str, rule: DataSourceFetchRule,
+                          chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+        """
+        Streams the first worksheet row by row and keeps only the rule columns,
+        so the workbook is never built in memory.
+        """
+        columns = DataLoader._column_indices(rule)
+        if python_calamine is not None:
+            rows = DataLoader._calamine_rows(file_path, columns)
+        else:
+            rows = DataLoader._openpyxl_rows(file_path, columns)
+
+        pending = []
+        for row in rows:
+            pending.append(row)
+            if chunk_rows is not None and len(pending) >= chunk_rows:
+                yield DataLoader._xlsx_frame(pending)
+                pending = []
+        if pending:
+            yield DataLoader._xlsx_frame(pending)
+
+    @staticmethod
+    def _calamine_rows(file_path: str, columns: Tuple[int, int, int]) -> Iterator[Tuple]:
+        # Rust based reader, several times faster than openpyxl
+        workbook = python_calamine.CalamineWorkbook.from_path(file_path)
+        sheet = workbook.get_sheet_by_index(0)
+        # The sheet range starts at the first used cell, not necessarily at column A
+        first_col = sheet.start[1] if sheet.start else 0
+        if max(columns) >= first_col + sheet.width:
+            raise ValueError(f"Column index out of range for file: {file_path}")
+
+        positions = [c - first_col for c in columns]
+        for row in sheet.iter_rows():
+            yield tuple(row[p] if p >= 0 else None for p in positions)
+
+    @staticmethod
+    def _openpyxl_rows(file_path: str, columns: Tuple[int, int, int]) -> Iterator[Tuple]:
+        # Read-only mode parses the sheet XML lazily instead of building every cell object
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            if sheet.max_column is not None and max(columns) >= sheet.max_column:
+                raise ValueError(f"Column index out of range for file: {file_path}")
+
+            first_col = min(columns)
+            positions = [c - first_col for c in columns]
+            for row in sheet.iter_rows(min_col=first_col + 1, max_col=max(columns) + 1, values_only=True):
+                yield tuple(row[p] if p < len(row) else None for p in positions)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _xlsx_frame(rows: List[Tuple]) -> pd.DataFrame:
+        timestamps, ids, data = zip(*rows)
+        return DataLoader._select(
+            pd.Series(timestamps, dtype=object),
+            DataLoader._xlsx_text_column(ids, keep_numbers=True),
+            DataLoader._xlsx_text_column(data, keep_numbers=False)
+        )
+
+    @staticmethod
+    def _xlsx_text_column(values: Tuple, keep_numbers: bool) -> pd.Series:
+        """
+        Cells hold numbers or strings. A column of numbers stays numeric when keep_numbers
+        is set; otherwise numbers become text, without the ".0" Excel adds to whole numbers.
+        """
+        is_number = [isinstance(v, (int, float)) and not isinstance(v, bool) for v in values]
+        if keep_numbers and all(n or v is None for n, v in zip(is_number, values)):
+            return pd.Series(values, dtype=np.float64)
+        return pd.Series([
+            (str(int(v)) if float(v).is_integer() else str(v)) if number else v
+            for v, number in zip(values, is_number)
+        ], dtype=object)
+
+    @staticmethod
+    def _read_csv_frames(file_path: str, rule: DataSourceFetchRule, chunk_rows: Optional[int],
+                         byte_range: Optional[Tuple[int, int]] = None) -> Iterator[pd.DataFrame]:
+        """
+        byte_range limits the read to the complete lines in [start, end) of the file.
+        """
+        if byte_range is None or byte_range[0] == 0:
+            DataLoader._check_csv_columns(file_path, rule)
+
+        source: Union[str, io.BufferedReader] = file_path
+        if byte_range is not None:
+            source = io.BufferedReader(_FileRange(file_path, *byte_range), buffer_size=1 << 20)
+        yield from DataLoader._csv_reader(file_path, rule, chunk_rows, source)
+
+    @staticmethod
+    def _check_csv_columns(file_path: str, rule: DataSourceFetchRule):
+        first_line = pd.read_csv(file_path, header=None, nrows=1)
+        if max(DataLoader._column_indices(rule)) >= first_line.shape[1]:
+            raise ValueError(f"Column index out of range for file: {file_path}")
+
+    @staticmethod
+    def _csv_reader(file_path: str, rule: DataSourceFetchRule, chunk_rows: Optional[int],
+                    source=None) -> Iterator[pd.DataFrame]:
+        # source: the file path or an open binary stream of part of the file.
+        # Timestamps are read as text and converted chunk by chunk (see _select), so a header
+        # line or a non-numeric timestamp anywhere in the file does not stop the stream
+        source = file_path if source is None else source
+        if pa is not None:
+            return DataLoader._arrow_csv_reader(file_path, rule, chunk_rows, source)
+        return DataLoader._pandas_csv_reader(file_path, rule, chunk_rows, source)
+
+    @staticmethod
+    def _pandas_csv_reader(file_path: str, rule: DataSourceFetchRule, chunk_rows: Optional[int],
+                           source) -> Iterator[pd.DataFrame]:
+        ts_col, id_col, data_col = DataLoader._column_indices(rule)
+        # Keep ids and payloads as text, so a chunk of digit-only hex ids is not read as numbers
+        dtype = {ts_col: str, id_col: str, data_col: str}
+
+        try:
+            reader = pd.read_csv(source, header=None, usecols=sorted(dtype.keys()), dtype=dtype,
+                                 chunksize=chunk_rows, engine='c')
+            for df in ([reader] if chunk_rows is None else reader):
+                yield DataLoader._select(df[ts_col], df[id_col], df[data_col])
+        finally:
+            DataLoader._close_source(source)
+
+    @staticmethod
+    def _arrow_csv_reader(file_path: str, rule: DataSourceFetchRule, chunk_rows: Optional[int],
+                          source) -> Iterator[pd.DataFrame]:
+        ts_col, id_col, data_col = DataLoader._column_indices(rule)
+        column_types = {
+            f"f{ts_col}": pa.string(),
+            f"f{id_col}": pa.string(),
+            f"f{data_col}": pa.string()
+        }
+        skipped = []
+
+        def skip_invalid_row(row):
+            skipped.append(row.number)
+            return 'skip'
+
+        read_options = pa_csv.ReadOptions(autogenerate_column_names=True, block_size=DataLoader.ARROW_BLOCK_SIZE)
+        parse_options = pa_csv.ParseOptions(invalid_row_handler=skip_invalid_row)
+        convert_options = pa_csv.ConvertOptions(include_columns=list(column_types.keys()),
+                                                column_types=column_types, strings_can_be_null=True)
+
+        # Number of skipped rows already attached to a chunk
+        reported = [0]
+
+        def to_frame(table):
+            # Strings stay in Arrow memory; the parsers read the buffers directly
+            df = table.to_pandas(types_mapper=lambda t: pd.ArrowDtype(t) if pa.types.is_string(t) else None)
+            frame = DataLoader._select(df[f"f{ts_col}"], df[f"f{id_col}"], df[f"f{data_col}"])
+            # Rows skipped since the previous chunk are reported with this one (see _to_batch)
+            frame.attrs['skipped_rows'] = len(skipped) - reported[0]
+            reported[0] = len(skipped)
+            return frame
+
+        try:
+            if chunk_rows is None:
+                yield to_frame(pa_csv.read_csv(source, read_options, parse_options, convert_options))
+            else:
+                reader = pa_csv.open_csv(source, read_options, parse_options, convert_options)
+                pending = []
+                pending_rows = 0
+                for record_batch in reader:
+                    pending.append(record_batch)
+                    pending_rows += record_batch.num_rows
+                    while pending_rows >= chunk_rows:
+                        table = pa.Table.from_batches(pending)
+                        yield to_frame(table.slice(0, chunk_rows))
+                        pending = table.slice(chunk_rows).to_batches()
+                        pending_rows -= chunk_rows
+                if pending_rows or len(skipped) > reported[0]:
+                    yield to_frame(pa.Table.from_batches(pending, schema=reader.schema))
+        finally:
+            DataLoader._close_source(source)
+
+    @staticmethod
+    def _close_source(source):
+        # Streams over part of a file are opened by the loader, paths by the reader itself
+        if not isinstance(source, str):
+            source.close()
+
+    @staticmethod
+    def _select(timestamps: pd.Series, ids: pd.Series, data: pd.Series) -> pd.DataFrame:
+        # Timestamps arrive as text (CSV) or cells (XLSX) and are converted per chunk
         try:
-           selected_df = df.iloc[:, col_indices].copy()
-        except IndexError:
-             raise ValueError(f"Column index out of range for file: {file_path}")
+            timestamps = timestamps.astype(np.float64).to_numpy(na_value=np.nan)
+        except (ValueError, TypeError):
+            # A header line or non-numeric timestamps: use numbers when the chunk holds any,
+            # otherwise keep the text (e.g. "10:22:33.123")
+            numbers = pd.to_numeric(timestamps, errors='coerce')
+            if numbers.notna().any():
+                timestamps = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                timestamps = timestamps.to_numpy(dtype=object)
+        return pd.DataFrame({'timestamp': timestamps, 'message_id': ids.values, 'data': data.values})
+
+    @staticmethod
+    def _to_batches(frames: Iterator[pd.DataFrame], file_path: str) -> Generator[FrameBatch, None, None]:
+        hex_ids = None
+        for frame in frames:
+            hex_ids = DataLoader._id_notation(frame['message_id'], hex_ids, file_path)
+            yield DataLoader._to_batch(frame, file_path, hex_ids)
 
-        # Rename columns standard names
-        selected_df.columns = ['timestamp', 'message_id', 'data']
-        
+    @staticmethod
+    def _id_notation(ids: pd.Series, hex_ids: Optional[bool], file_path: str) -> Optional[bool]:
+        """
+        Id notation (hex or decimal) of a chunk: detected on the first chunk with text ids
+        and kept for the file. Hex ids in a later chunk of a file read as decimal raise,
+        since the rows before were already parsed in the wrong notation.
+        """
+        if hex_ids is None:
+            return detect_hex_notation(ids.dropna())
+        if not hex_ids and detect_hex_notation(ids.dropna()):
+            raise ValueError(f"Message ids in {file_path} were read as decimal, but later rows hold hex ids; "
+                             f"write the ids with a 0x prefix or in one notation")
+        return hex_ids
+
+    @staticmethod
+    def _to_batch(selected_df: pd.DataFrame, file_path: str, hex_ids: Optional[bool] = None) -> FrameBatch:
         # Clean and parse data
         # Ensure timestamp is numeric if possible, or keep as is? Usually timestamp is float.
         # Ensure message_id is int.
         # Ensure data is bytes.
-        
-        # Drop rows with NaN in critical columns
-        selected_df.dropna(subset=['message_id', 'data'], inplace=True)
-
-        # Convert message_id to int (handle hex strings if necessary, but usually CSVs have dec or hex)
-        # If message_id is string and hex, we need to convert. 
-        # Let's assume it might be hex string or int.
-        
-        def parse_id(val):
-            if isinstance(val, int):
-                return val
-            if isinstance(val, str):
-                val = val.strip()
-                if val.lower().startswith('0x'):
-                    return int(val, 16)
-                try:
-                    return int(val)
-                except ValueError:
-                    # Try hex without prefix if int fails? Or just return None/Error?
-                    try:
-                        return int(val, 16)
-                    except ValueError:
-                         return 0 # Or -1
-            return 0
 
-        selected_df['message_id'] = selected_df['message_id'].apply(parse_id)
-        
-        # Convert data column to bytes
-        selected_df['data'] = selected_df['data'].apply(lambda x: parse_hex_string(str(x)))
-        
-        return selected_df
+        # Rows the CSV reader skipped for a different number of columns
+        incomplete = selected_df.attrs.get('skipped_rows', 0)
+
+        # Drop rows with NaN in critical columns; rows cut short count as incomplete, blank lines do not
+        missing = selected_df['message_id'].isna() | selected_df['data'].isna()
+        if missing.any():
+            blank = selected_df['message_id'].isna() & selected_df['data'].isna() & selected_df['timestamp'].isna()
+            incomplete += int((missing & ~blank).sum())
+            selected_df = selected_df[~missing]
+        if incomplete:
+            print(f"Skipped {incomplete} incomplete rows in {file_path}")
+
+        # Convert message_id to int (dec or hex strings, detected once for the column)
+        ids, extended, valid = parse_id_column(selected_df['message_id'], hex_ids)
+        malformed = int((~valid).sum())
+        if malformed:
+            print(f"Skipped {malformed} rows with malformed message id in {file_path}")
+            selected_df = selected_df[valid]
+            ids = ids[valid]
+            extended = extended[valid]
+
+        # Convert the whole data column to a padded payload matrix in one pass
+        payload, dlc = parse_hex_matrix(selected_df['data'])
 
+        return FrameBatch(
+            timestamp=selected_df['timestamp'].to_numpy(),
+            message_id=ids,
+            payload=payload,
+            dlc=dlc,
+            extended=extended,
+            malformed_id_count=malformed + incomplete
+        )
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import numpy as np
+from dataclasses import asdict
+from typing import Dict, List, Iterable, Optional, Set
+from ..models.data_source import DataSource, CommonCANDataSource, J1939DataSource, MessageMapping, FieldSetting
+from ..utils.j1939 import normalize_pgn
+
+
+class MessagePlan:
+    """
+    Precompiled extraction constants for the fields of one MessageMapping
+    (all of them, or the given subset).
+    All arrays are indexed by field position in `names`.
+    """
+    def __init__(self, mapping: MessageMapping, order: int = 0, fields: Optional[List[FieldSetting]] = None):
+        self.identifier = mapping.identifier
+        # Position of the mapping in the data source
+        self.order = order
+        fields = mapping.fields if fields is None else fields
+        self.names: List[str] = [f.name for f in fields]
+
+        start_bits = np.array([f.start_bit for f in fields], dtype=np.int64)
+        lengths = np.array([f.length for f in fields], dtype=np.int64)
+
+        # Byte span: each field is read from one uint64 window starting at its first byte
+        self.byte_offsets = start_bits // 8
+        self.shifts = (start_bits % 8).astype(np.uint64)
+        self.window_offsets, self.window_index = np.unique(self.byte_offsets, return_inverse=True)
+
+        # A 57..64 bit field with a non-zero shift spills into a ninth byte
+        self.spills = np.flatnonzero(start_bits % 8 + lengths > 64)
+
+        self.masks = np.array([(1 << int(n)) - 1 if n < 64 else 0xFFFFFFFFFFFFFFFF for n in lengths], dtype=np.uint64)
+        # Sign bits are 0 for unsigned fields and for 64 bit signed fields (a plain int64 view)
+        self.sign_bits = np.array(
+            [1 << (f.length - 1) if f.value_type == 'signed' and f.length < 64 else 0 for f in fields],
+            dtype=np.int64
+        )
+        self.signed = np.flatnonzero([f.value_type == 'signed' for f in fields])
+
+        self.factors = np.array([f.factor for f in fields], dtype=np.float64)
+        self.offsets = np.array([f.offset for f in fields], dtype=np.float64)
+
+        # Narrowest integer type that holds the raw value of each field
+        self.raw_dtypes = [MessagePlan._raw_dtype(f.length, f.value_type == 'signed') for f in fields]
+
+    @staticmethod
+    def _raw_dtype(length: int, signed: bool) -> np.dtype:
+        for bits in (8, 16, 32):
+            if length <= bits:
+                return np.dtype(f"{'i' if signed else 'u'}{bits // 8}")
+        return np.dtype('i8' if signed else 'u8')
+
+    def extract_raw(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Extracts the raw (unscaled, unsigned) value of every field.
+        Returns an (N, K) uint64 array for an (N, W) payload matrix.
+        """
+        rows, width = matrix.shape
+        words = np.zeros((rows, len(self.window_offsets)), dtype=np.uint64)
+        for i, first_byte in enumerate(self.window_offsets):
+            if first_byte == 0 and width == 8 and matrix.flags['C_CONTIGUOUS']:
+                # Fast path: the row is already one uint64 word
+                words[:, i] = matrix.view('<u8')[:, 0]
+                continue
+            window = np.zeros((rows, 8), dtype=np.uint8)
+            available = max(0, min(8, width - first_byte))
+            window[:, :available] = matrix[:, first_byte:first_byte + available]
+            words[:, i] = window.view('<u8')[:, 0]
+
+        raw = words[:, self.window_index] >> self.shifts
+
+        for k in self.spills:
+            spill_byte = self.byte_offsets[k] + 8
+            if spill_byte < width:
+                high = matrix[:, spill_byte].astype(np.uint64)
+                raw[:, k] |= high << (np.uint64(64) - self.shifts[k])
+
+        raw &= self.masks
+        return raw
+
+    def decode_raw(self, matrix: np.ndarray) -> List[np.ndarray]:
+        """
+        Decodes every field to its raw integer, sign-extended for signed fields.
+        Returns one array per field, in the field's raw_dtype.
+        """
+        raw = self.extract_raw(matrix)
+        columns = [raw[:, k] for k in range(len(self.names))]
+
+        if len(self.signed):
+            signed = raw[:, self.signed].view(np.int64)
+            sign_bits = self.sign_bits[self.signed]
+            # Two's complement: subtract 2^length when the sign bit is set
+            signed = signed - ((signed & sign_bits) << 1)
+            for j, k in enumerate(self.signed):
+                columns[k] = signed[:, j]
+
+        return [column.astype(dtype) for column, dtype in zip(columns, self.raw_dtypes)]
+
+    def decode(self, matrix: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """
+        Decodes every field to physical values.
+        Returns an (N, K) float64 array; rows with an empty payload are 0.0.
+        """
+        values = np.empty((len(matrix), len(self.names)), dtype=np.float64)
+        for k, column in enumerate(self.decode_raw(matrix)):
+            values[:, k] = column
+
+        values *= self.factors
+        values += self.offsets
+        values[lengths == 0] = 0.0
+        return values
+
+
+class DecodePlan:
+    """
+    Compiled decode constants for a DataSource, keyed by message id (CAN) or PGN (J1939).
+    A plan can be limited to a set of signal names: only those fields are
+    compiled, and messages without any of them are left out entirely.
+    Plans are cached by a hash of the DataSource configuration and the signal
+    set, so a changed mapping always gets a fresh plan.
+    """
+    _cache: Dict[str, 'DecodePlan'] = {}
+
+    def __init__(self, data_source: DataSource, config_hash: str, signals: Optional[Set[str]] = None):
+        self.config_hash = config_hash
+        j1939 = isinstance(data_source, J1939DataSource)
+        if j1939:
+            mappings = data_source.pgn_mappings
+        elif isinstance(data_source, CommonCANDataSource):
+            mappings = data_source.message_mappings
+        else:
+            mappings = []
+
+        self.message_plans: List[MessagePlan] = []
+        for i, mapping in enumerate(mappings):
+            fields = [f for f in mapping.fields if signals is None or f.name in signals]
+            if fields:
+                self.message_plans.append(MessagePlan(mapping, i, fields))
+
+        # First mapping wins for duplicated identifiers, whether or not it has a needed field.
+        # PGNs are keyed without the PDU1 destination address, like the frames they are looked up with
+        def key_of(identifier: int) -> int:
+            return normalize_pgn(identifier) if j1939 else identifier
+
+        first: Dict[int, int] = {}
+        for i, mapping in enumerate(mappings):
+            first.setdefault(key_of(mapping.identifier), i)
+        self.by_identifier: Dict[int, MessagePlan] = {}
+        for plan in self.message_plans:
+            if not j1939 or first[key_of(plan.identifier)] == plan.order:
+                self.by_identifier.setdefault(key_of(plan.identifier), plan)
+        self.identifiers = np.array(sorted(self.by_identifier.keys()), dtype=np.uint32)
+
+    def get(self, identifier: int) -> Optional[MessagePlan]:
+        return self.by_identifier.get(identifier)
+
+    @staticmethod
+    def config_hash_of(data_source: DataSource) -> str:
+        payload = json.dumps(asdict(data_source), sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def for_source(cls, data_source: DataSource, signals: Optional[Iterable[str]] = None) -> 'DecodePlan':
+        """
+        Returns the compiled plan for the data source, building it on first use.
+        signals limits the plan to those signal names; None compiles every field.
+        """
+        config_hash = cls.config_hash_of(data_source)
+        signals = None if signals is None else set(signals)
+        key = config_hash if signals is None else f"{config_hash}:{json.dumps(sorted(signals))}"
+        plan = cls._cache.get(key)
+        if plan is None:
+            plan = cls(data_source, config_hash, signals)
+            cls._cache[key] = plan
+        return plan
+
+    @classmethod
+    def invalidate(cls, data_sources: Iterable[DataSource]):
+        """
+        Drops every cached plan that does not belong to one of the given data sources.
+        """
+        keep = {cls.config_hash_of(ds) for ds in data_sources if ds}
+        for key, plan in list(cls._cache.items()):
+            if plan.config_hash not in keep:
+                del cls._cache[key]
@@ -1,214 +1,135 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
-from ..models.data_source import DataSource, CommonCANDataSource, J1939DataSource, MessageMapping, FieldSetting
+from typing import Union, Iterable, Optional, Callable
+from ..models.data_source import DataSource, CommonCANDataSource, J1939DataSource
+from .decode_plan import DecodePlan
+from .frame_batch import FrameBatch
+from .frame_store import FrameStore
+from .signal_store import SignalStore
+from ..utils.j1939 import split_ids
 
 class Decoder:
     @staticmethod
-    def decode(data: pd.DataFrame, data_source: DataSource) -> Dict[str, pd.Series]:
+    def decode(data: Union[FrameBatch, pd.DataFrame], data_source: DataSource,
+               signals: Optional[Iterable[str]] = None, compact: bool = True) -> SignalStore:
         """
         Decodes the raw data based on the data source configuration.
-        Returns a dictionary mapping 'SignalName' -> Series (indexed by timestamp).
+        Accepts a FrameBatch from DataLoader, or a legacy DataFrame with
+        ['timestamp', 'message_id', 'data'] columns.
+        signals limits decoding to those signal names (see ResultGenerator.required_signals);
+        None decodes every mapped field.
+        compact stores slowly varying signals as value changes only (see SignalStore.compact).
+        Returns a SignalStore of the decoded signals, keyed by (message, SA, signal).
         """
-        results = {}
-        
-        # Ensure we work with a copy and standardise column names
-        df = data.copy()
-        
-        # Group by Message ID to optimize processing
-        # message_id in df is int.
-        
-        if data_source.type == 'common_can':
-            results = Decoder._decode_common_can(df, data_source)
-        elif data_source.type == 'j1939':
-            results = Decoder._decode_j1939(df, data_source)
-            
-        return results
+        if isinstance(data, pd.DataFrame):
+            data = FrameBatch.from_dataframe(data)
+        return Decoder.decode_stream([data], data_source, signals=signals, compact=compact)
 
     @staticmethod
-    def _decode_common_can(df: pd.DataFrame, source: CommonCANDataSource) -> Dict[str, pd.Series]:
-        results = {}
-        grouped = df.groupby('message_id')
-        
-        for mapping in source.message_mappings:
-            msg_id = mapping.identifier
-            if msg_id in grouped.groups:
-                group_df = grouped.get_group(msg_id)
-                time_series = group_df['timestamp']
-                data_series = group_df['data']
-                
-                for field_setting in mapping.fields:
-                    values = Decoder._unpack_signal(data_series, field_setting)
-                    # Create a series with timestamp index
-                    s = pd.Series(values, index=time_series.values, name=field_setting.name)
-                    results[field_setting.name] = s
-                    
-        return results
+    def decode_stream(batches: Iterable[FrameBatch], data_source: DataSource,
+                      cancel_check: Optional[Callable[[], bool]] = None,
+                      signals: Optional[Iterable[str]] = None, compact: bool = True) -> SignalStore:
+        """
+        Decodes frame batches one after another, e.g. the chunks of DataLoader.iter_batches.
+        Decoded frames are appended to per-message growable columns, so each batch can be
+        released as soon as it is decoded. Returns the same store as decode().
+        Returns an empty store if cancel_check() becomes True between batches.
+        """
+        store = Decoder.decode_columns(batches, data_source, cancel_check, signals)
+        if store is None:
+            return SignalStore()
+        store.trim()
+        if compact:
+            # Slowly varying signals are kept as value transitions only
+            store.compact()
+        return store
 
     @staticmethod
-    def _decode_j1939(df: pd.DataFrame, source: J1939DataSource) -> Dict[str, pd.Series]:
-        results = {}
-        
-        # J1939 extraction
-        # PGN = (ID >> 8) & 0x1FFFF
-        # SA = ID & 0xFF
+    def decode_columns(batches: Iterable[FrameBatch], data_source: DataSource,
+                       cancel_check: Optional[Callable[[], bool]] = None,
+                       signals: Optional[Iterable[str]] = None) -> Optional[SignalStore]:
+        """
+        decode_stream without releasing the spare capacity of the columns,
+        or None when cancelled.
+        """
+        # Masks, shifts and scaling constants are compiled once per configuration and signal set
+        plan = DecodePlan.for_source(data_source, signals)
+        store = SignalStore()
         
-        # We process the whole dataframe to extract PGN and SA first? 
-        # Or Just iterate groupings of raw ID and check?
-        # Since multiple Raw IDs can map to same PGN (different SA), 
-        # we can't just group by Raw ID and look up PGN directly once.
-        # But grouping by Raw ID is still efficient.
+        for batch in batches:
+            if cancel_check and cancel_check():
+                return None
+            
+            # Group by Message ID to optimize processing
+            # message_id in the batch is int.
+            if data_source.type == 'common_can':
+                Decoder._decode_common_can(batch, data_source, plan, store)
+            elif data_source.type == 'j1939':
+                Decoder._decode_j1939(batch, data_source, plan, store)
         
-        grouped = df.groupby('message_id')
-
-        for raw_id, group_df in grouped:
-            
-            pgn = (raw_id >> 8) & 0x1FFFF
-            sa = raw_id & 0xFF
-            
-            # Check if this PGN is interesting
-            # Find generic mapping for this PGN
-            relevant_mapping = None
-            for mapping in source.pgn_mappings:
-                if mapping.identifier == pgn:
-                    relevant_mapping = mapping
-                    break
-            
-            if not relevant_mapping:
-                continue
-
-                
-            # Check SA filter
-            if source.source_address_filters and sa not in source.source_address_filters:
-                continue
-
-                
-            # Decode fields
-            time_series = group_df['timestamp']
-            data_series = group_df['data']
-            
-            for field_setting in relevant_mapping.fields:
-                values = Decoder._unpack_signal(data_series, field_setting)
-                s = pd.Series(values, index=time_series.values, name=field_setting.name)
-                
-                # Append J1939 SA to key to support splitting by SA in results
-                # Format: SignalName#SA
-                key = f"{field_setting.name}#{sa}"
-                
-                if key in results:
-                    results[key] = pd.concat([results[key], s]).sort_index()
-                else:
-                    results[key] = s
-                    
-        return results
+        return store
 
     @staticmethod
-    def _unpack_signal(data_series: pd.Series, setting: FieldSetting) -> np.ndarray:
-        # data_series is a series of bytes objects.
-        
-        def extract_value(data_bytes):
-            if not data_bytes: 
-                return 0
-                
-            # Convert bytes to int
-            # need to handle byte order and bit extraction
-            # This is slow if done row-by-row in python. 
-            # But for correct implementation of bit unpacking, python logic is easiest to write first.
-            
-            # Construct a huge integer from bytes?
-            # Or work with the specific bytes.
-            
-            # setting.start_bit and length. 
-            # Start bit definition varies (Intel vs Motorola).
-            
-            # Let's use cantools-like logic (or just reuse cantools logic if we could?)
-            # But here we are implementing it manually as per previous thought.
-            
-            # Simple implementation for now (Intel/Little Endian primarily?)
-            # If length is small (<= 64), we can convert to int.
-            
-            full_int = int.from_bytes(data_bytes, byteorder='little') # Assuming little endian for the whole frame? 
-            # CAN data is usually array of bytes. 
-            
-            # Intel (Little Endian): Start bit is LSB. 
-            # Motorola (Big Endian): Start bit is MSB? 
-            
-            # Let's rely on standard CAN definitions. 
-            # If Byte Order is Little Endian (Intel):
-            #   Bits count from 0 (LSB of Byte 0) upwards.
-            
-            # If Byte Order is Big Endian (Motorola):
-            #   It's more complex mapping.
-            
-            # Given keeping it simple and robust, and "cantools" is a dependency
-            # Maybe I should just create a temporary DBC definition and use cantools to decode!
-            # It handles all edge cases of bit numbering.
-            return 0
+    def decode_store(store: FrameStore, data_source: DataSource, start_time: Optional[float] = None,
+                     end_time: Optional[float] = None, signals: Optional[Iterable[str]] = None,
+                     compact: bool = True) -> SignalStore:
+        """
+        Decodes a memory-mapped FrameStore, optionally limited to a time range.
+        Only the message ids the data source maps (for the wanted signals) are read;
+        each id is a zero-copy slice of the store.
+        """
+        plan = DecodePlan.for_source(data_source, signals)
+        ids = store.message_ids()
+        if data_source.type == 'common_can':
+            wanted = ids[np.isin(ids, plan.identifiers)]
+        elif data_source.type == 'j1939':
+            wanted = ids[np.isin(split_ids(ids)[0], plan.identifiers)]
+        else:
+            wanted = ids[:0]
+        return Decoder.decode_stream(store.iter_batches(wanted, start_time, end_time), data_source,
+                                     signals=signals, compact=compact)
 
-        # REVISION: Using cantools is much safer.
-        # But we don't want to create a DB object for every row.
-        # We can creating a DB object ONCE for the mapping, then use it.
-        
-        # However, `decode_message` expects a frame ID.
-        # Here we just want to decode signals from bytes.
-        
-        # Let's use a custom bit unpacker optimised for pandas/numpy if possible, 
-        # or just row iteration with a robust unpacker.
+    @staticmethod
+    def _decode_common_can(batch: FrameBatch, source: CommonCANDataSource, plan: DecodePlan,
+                           store: SignalStore):
+        grouped = dict(batch.group_by_id())
         
-        return np.array([Decoder._extract_raw_value(b, setting) for b in data_series])
+        # Messages without a needed field have no plan and are skipped entirely
+        for message_plan in plan.message_plans:
+            msg_id = message_plan.identifier
+            if msg_id in grouped:
+                rows = grouped[msg_id]
+                timestamps = batch.timestamp[rows]
+                raw = message_plan.decode_raw(batch.payload[rows])
+                # Signal names shared by several mappings are resolved by the store (last mapping wins)
+                store.columns(message_plan.order, msg_id, None, message_plan).append(timestamps, raw, batch.dlc[rows] == 0)
 
     @staticmethod
-    def _extract_raw_value(data: bytes, setting: FieldSetting) -> float:
-        if not data: return 0.0
-        
-        # Start bit: 0-63
-        start_bit = setting.start_bit
-        length = setting.length
-        byte_order = setting.byte_order # 'little_endian' or 'big_endian'
-        
-        # Convert to int (always little endian view of the byte array for easy indexing?)
-        # Or standard bit extraction.
-        
-        if byte_order == 'little_endian':
-            # Intel
-            # We can convert the whole byte array to a giant integer (little endian)
-            # Then shift and mask.
-            val_int = int.from_bytes(data, 'little')
-            raw = (val_int >> start_bit) & ((1 << length) - 1)
-        else:
-            # Motorola (Big Endian)
-            # This is tricky.
-            # Start bit usually refers to the MSB of the signal in Motorola? 
-            # Or LSB? In cantools/Kvaser/Vector, it varies.
-            # Usually in DBC:
-            # Intel: Start bit is LSB.
-            # Motorola: Start bit is MSB (or LSB depending on format).
-            # Let's assume standard DBC convention:
-            # Big Endian: Start bit is the MSB of the signal.
-            # We need to reverse bytes or carefully extract.
-            
-            # For this prototype, let's implement Little Endian correctly first.
-            # And use a basic Big Endian implementation where we treat data as big endian int.
-            # But bit numbering in CAN is usually byte-based.
-            
-            # Let's punt on complex Motorola bit numbering for a manual implementation 
-            # and stick to a simplified view or rely on `cantools` logic if we were using it.
-            # Actually, `cantools` code is open source, I could check how they do it.
-            # But wait, looking at `requirements.txt`, we HAVE `cantools`.
-            # Why not use `cantools` internals? `cantools.database.can.signal.Signal.decode`
-            
-            pass 
-            # Placeholder for Motorola
-            val_int = int.from_bytes(data, 'little') # Fallback
-            raw = (val_int >> start_bit) & ((1 << length) - 1)
+    def _decode_j1939(batch: FrameBatch, source: J1939DataSource, plan: DecodePlan,
+                      store: SignalStore):
+        # J1939 extraction for the whole id column at once:
+        # PGN = (ID >> 8) & 0x3FFFF, without the destination address for PDU1 formats
+        # SA = ID & 0xFF
+        pgn, sa = split_ids(batch.message_id)
+
+        # Keep the rows of mapped PGNs and accepted source addresses only
+        relevant = np.isin(pgn, plan.identifiers)
+        if source.source_address_filters:
+            relevant &= np.isin(sa, source.source_address_filters)
+        rows = np.flatnonzero(relevant)
+        if len(rows) == 0:
+            return
 
-        # Sign extension
-        if setting.value_type == 'signed':
-            # check sign bit
-            if raw & (1 << (length - 1)):
-                raw -= (1 << length)
-                
-        # Scale and offset
-        phys = (raw * setting.factor) + setting.offset
-        return float(phys)
+        # Several raw ids (priorities, destination addresses) share one (PGN, SA) key;
+        # grouping by the key keeps their frames in file order. Batches of one raw id
+        # each (FrameStore) are merged by time when appended to the columns
+        keys = (pgn[rows] << 8) | sa[rows]
+        for key, group in FrameBatch.group_rows(keys):
+            group_rows = rows[group]
+            mapping = plan.get(key >> 8)
 
+            # Decode raw fields; the store keeps one column set per (PGN, SA) to split results by SA
+            timestamps = batch.timestamp[group_rows]
+            raw = mapping.decode_raw(batch.payload[group_rows])
+            store.columns(mapping.order, int(key >> 8), int(key & 0xFF), mapping).append(
+                timestamps, raw, batch.dlc[group_rows] == 0)
@@ -0,0 +1,249 @@
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from ..models.convertor import Convertor
+from ..models.fetch_rule import DataSourceFetchRule
+from .conversion import run_job, EXIT_OK, EXIT_ERROR
+
+# Job callback: (summary entry of a converted file)
+JobReport = Callable[[Dict], None]
+
+
+class IngestLedger:
+    """
+    Small on-disk record of the files a watch folder already converted.
+    Every entry remembers the size and mtime the file had when it was converted,
+    so a file that is overwritten later is converted again.
+    """
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.entries = data.get('files', {})
+        except (OSError, ValueError) as e:
+            # A damaged ledger only means some files are converted again
+            print(f"Ledger {self.path} could not be read, starting empty: {e}", file=sys.stderr)
+            self.entries = {}
+
+    def save(self):
+        # Write a sibling temp file and swap it in, so a crash never leaves half a ledger
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'files': self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, path: str, stamp: Tuple[int, int], retry_failed: bool = False) -> bool:
+        entry = self.entries.get(path)
+        if entry is None or (entry['size'], entry['mtime_ns']) != stamp:
+            return False
+        return not retry_failed or entry['exit_code'] == EXIT_OK
+
+    def record(self, path: str, stamp: Tuple[int, int], job: Dict):
+        self.entries[path] = {
+            'size': stamp[0],
+            'mtime_ns': stamp[1],
+            'status': job['status'],
+            'exit_code': job['exit_code'],
+            'output_folder': job['output_folder'],
+            'error': job.get('error', ''),
+            'converted_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self.save()
+
+
+class FolderWatcher:
+    """
+    Watches a folder for data files of the fetch rule's type and converts every
+    new or changed file once it is finished, in a pool of `jobs` processes.
+
+    The folder is polled, so it works the same on local disks and network shares.
+    A file counts as finished when its size and mtime did not change for `settle`
+    seconds, which covers exporters that write a file in several steps.
+    """
+    LEDGER_NAME = '.can_parser_ledger.json'
+
+    def __init__(self, convertor: Convertor, fetch_rule: DataSourceFetchRule, folder: str,
+                 output: Optional[str] = None, ledger_path: Optional[str] = None,
+                 jobs: int = 1, workers: int = 1, recursive: bool = False,
+                 settle: float = 5.0, retry_failed: bool = False, incremental: bool = False,
+                 report: Optional[JobReport] = None):
+        self.convertor = convertor
+        self.fetch_rule = fetch_rule
+        self.folder = os.path.abspath(folder)
+        self.output = output
+        self.ledger = IngestLedger(ledger_path or os.path.join(self.folder, self.LEDGER_NAME))
+        self.jobs = max(1, jobs)
+        self.workers = max(1, workers)
+        self.recursive = recursive
+        self.settle = settle
+        self.retry_failed = retry_failed
+        # Files that grow are continued instead of converted again (Conversion.refresh)
+        self.incremental = incremental
+        self.report = report or (lambda job: None)
+        # path -> (stamp, time the stamp was first seen)
+        self._seen: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        # path -> stamp of the files this watcher already started, a failed file
+        # is only tried again once it changes
+        self._attempted: Dict[str, Tuple[int, int]] = {}
+        self._converted = 0
+
+    def scan(self) -> List[Tuple[str, Tuple[int, int]]]:
+        """
+        Returns the finished files that still need converting, oldest first,
+        as (path, (size, mtime_ns)).
+        """
+        now = time.time()
+        suffix = f".{self.fetch_rule.file_type}".lower()
+        found = {}
+        for root, dirs, names in os.walk(self.folder):
+            if not self.recursive:
+                dirs.clear()
+            else:
+                # Skip hidden folders and our own results
+                dirs[:] = [d for d in dirs if not d.startswith('.') and
+                           not self._is_output(os.path.join(root, d))]
+            for name in names:
+                if name.startswith('.') or not name.lower().endswith(suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # Removed or renamed between listing and stat
+                    continue
+                found[path] = (st.st_size, st.st_mtime_ns)
+
+        ready = []
+        for path, stamp in found.items():
+            previous = self._seen.get(path)
+            if previous is None or previous[0] != stamp:
+                # New or still growing, wait until it stays unchanged for `settle` seconds
+                self._seen[path] = (stamp, now)
+                if self.settle > 0:
+                    continue
+            elif now - previous[1] < self.settle:
+                continue
+            if stamp[0] == 0 or self._attempted.get(path) == stamp:
+                continue
+            if not self.ledger.is_done(path, stamp, self.retry_failed):
+                ready.append((path, stamp))
+        # Forget the files that disappeared
+        for path in set(self._seen) - set(found):
+            del self._seen[path]
+        ready.sort(key=lambda item: (item[1][1], item[0]))
+        return ready
+
+    def output_folder(self, path: str) -> str:
+        """
+        One result subfolder per data file, named after its path relative to the
+        watch folder, under --output, the convertor's folder or <folder>/<convertor>_results.
+        """
+        relative = os.path.splitext(os.path.relpath(path, self.folder))[0]
+        return os.path.join(self._output_base(), relative)
+
+    def run(self, stop_check: Optional[Callable[[], bool]] = None, interval: float = 5.0,
+            once: bool = False) -> int:
+        """
+        Polls the folder every `interval` seconds and converts the finished files
+        until stop_check() becomes True. With once=True, converts what is in the
+        folder now (without waiting for files to settle) and returns.
+        Returns the number of files converted.
+        """
+        stop = stop_check or (lambda: False)
+        if once:
+            self.settle = 0
+        self._converted = 0
+        pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_ignore_interrupt) if self.jobs > 1 else None
+        # future -> (path, stamp)
+        pending: Dict[Future, Tuple[str, Tuple[int, int]]] = {}
+        try:
+            while not stop():
+                queued = self._submit(pool, pending, stop)
+                if pending:
+                    done, _ = wait(pending, timeout=None if once else interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, stamp = pending.pop(future)
+                        self._finish(path, stamp, self._result(future, path))
+                elif once and not queued:
+                    break
+                elif not once:
+                    time.sleep(interval)
+        finally:
+            if pool is not None:
+                # Drop the queued files, let the running ones finish so their ledger entries are written
+                for future in pending:
+                    future.cancel()
+                for future, (path, stamp) in pending.items():
+                    if not future.cancelled():
+                        self._finish(path, stamp, self._result(future, path))
+                pool.shutdown(wait=True)
+        return self._converted
+
+    def _submit(self, pool: Optional[ProcessPoolExecutor], pending: Dict[Future, Tuple[str, Tuple[int, int]]],
+                stop: Callable[[], bool]) -> int:
+        """
+        Starts the files of one scan: converts them here without a pool, otherwise
+        queues at most 2 * jobs of them; the rest is picked up by a later scan.
+        Returns the number of files started.
+        """
+        busy = {path for path, _ in pending.values()}
+        started = 0
+        for path, stamp in self.scan():
+            if stop() or len(pending) >= 2 * self.jobs:
+                break
+            if path in busy:
+                continue
+            self._attempted[path] = stamp
+            started += 1
+            if pool is None:
+                self._finish(path, stamp, run_job(self.convertor, self.fetch_rule, path,
+                                                  self.output_folder(path), self.workers, self.incremental))
+            else:
+                future = pool.submit(run_job, self.convertor, self.fetch_rule, path,
+                                     self.output_folder(path), self.workers, self.incremental)
+                pending[future] = (path, stamp)
+        return started
+
+    def _result(self, future: Future, path: str) -> Dict:
+        try:
+            return future.result()
+        except Exception as e:
+            # The job process itself died (e.g. out of memory)
+            return {'file': path, 'output_folder': self.output_folder(path), 'status': 'error',
+                    'exit_code': EXIT_ERROR, 'error': f"{type(e).__name__}: {e}"}
+
+    def _finish(self, path: str, stamp: Tuple[int, int], job: Dict):
+        self.ledger.record(path, stamp, job)
+        self._converted += 1
+        self.report(job)
+
+    def _output_base(self) -> str:
+        if self.output:
+            return os.path.abspath(self.output)
+        if self.convertor.result_folder:
+            return os.path.abspath(self.convertor.result_folder)
+        # Like the GUI's fallback next to the data file, but one folder for the whole watch folder
+        return os.path.join(self.folder, f"{self.convertor.name}_results")
+
+    def _is_output(self, folder: str) -> bool:
+        return os.path.abspath(folder) == self._output_base()
+
+
+def _ignore_interrupt():
+    # Ctrl+C stops the watcher; the job processes finish their current file
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+
+@dataclass
+class FrameBatch:
+    """
+    Columnar block of CAN frames as produced by DataLoader.
+    - timestamp: (N,) timestamps as read from the source file
+    - message_id: (N,) uint32 CAN identifiers
+    - payload: (N, W) uint8 payload matrix, zero padded, W a multiple of 8
+    - dlc: (N,) payload length of each frame, 0 for unparsable payloads
+    - extended: (N,) extended (29 bit) frame flags, None when unknown
+    - malformed_id_count: rows dropped while loading because the id (or, in text traces,
+      the frame line) could not be parsed, or a spreadsheet row was incomplete
+    """
+    timestamp: np.ndarray
+    message_id: np.ndarray
+    payload: np.ndarray
+    dlc: np.ndarray
+    extended: Optional[np.ndarray] = None
+    malformed_id_count: int = 0
+
+    def __len__(self) -> int:
+        return len(self.message_id)
+
+    def take(self, indices: np.ndarray) -> 'FrameBatch':
+        return FrameBatch(
+            timestamp=self.timestamp[indices],
+            message_id=self.message_id[indices],
+            payload=self.payload[indices],
+            dlc=self.dlc[indices],
+            extended=self.extended[indices] if self.extended is not None else None
+        )
+
+    def slice(self, start: int, stop: int) -> 'FrameBatch':
+        """
+        Rows [start, stop) as views, without copying (memory-mapped arrays stay mapped).
+        """
+        return FrameBatch(
+            timestamp=self.timestamp[start:stop],
+            message_id=self.message_id[start:stop],
+            payload=self.payload[start:stop],
+            dlc=self.dlc[start:stop],
+            extended=self.extended[start:stop] if self.extended is not None else None
+        )
+
+    def group_by_id(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yields (message_id, row indices) for every distinct id in ascending order.
+        Row indices keep the original frame order inside each group.
+        """
+        return FrameBatch.group_rows(self.message_id)
+
+    @staticmethod
+    def group_rows(keys: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yields (key, row indices) for every distinct value of a per-row key column,
+        in ascending key order and original row order inside each group.
+        """
+        if len(keys) == 0:
+            return
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        for start, end in zip(starts, ends):
+            yield int(sorted_keys[start]), order[start:end]
+
+    @staticmethod
+    def from_dataframe(df: pd.DataFrame) -> 'FrameBatch':
+        """
+        Builds a batch from the legacy ['timestamp', 'message_id', 'data'] frame,
+        where 'data' holds one bytes object per row.
+        """
+        payloads = [b if isinstance(b, (bytes, bytearray)) else b'' for b in df['data']]
+        dlc = np.fromiter((len(b) for b in payloads), dtype=np.int64, count=len(payloads))
+        max_len = int(dlc.max()) if len(payloads) else 0
+        width = max(8, -(-max_len // 8) * 8)
+        buffer = b''.join(bytes(b).ljust(width, b'\x00') for b in payloads)
+
+        return FrameBatch(
+            timestamp=df['timestamp'].to_numpy(),
+            message_id=df['message_id'].to_numpy(dtype=np.uint32),
+            payload=np.frombuffer(buffer, dtype=np.uint8).reshape(-1, width),
+            dlc=dlc
+        )
+
+    @staticmethod
+    def concat(batches: List['FrameBatch']) -> 'FrameBatch':
+        """
+        Joins batches in order; payload matrices are padded to the widest batch.
+        """
+        if not batches:
+            return FrameBatch.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        width = max(b.payload.shape[1] for b in batches)
+        payload = np.zeros((sum(len(b) for b in batches), width), dtype=np.uint8)
+        start = 0
+        for b in batches:
+            payload[start:start + len(b), :b.payload.shape[1]] = b.payload
+            start += len(b)
+
+        has_extended = all(b.extended is not None for b in batches)
+        return FrameBatch(
+            timestamp=np.concatenate([b.timestamp for b in batches]),
+            message_id=np.concatenate([b.message_id for b in batches]),
+            payload=payload,
+            dlc=np.concatenate([b.dlc for b in batches]),
+            extended=np.concatenate([b.extended for b in batches]) if has_extended else None,
+            malformed_id_count=sum(b.malformed_id_count for b in batches)
+        )
+
+    @staticmethod
+    def empty() -> 'FrameBatch':
+        return FrameBatch(
+            timestamp=np.zeros(0, dtype=np.float64),
+            message_id=np.zeros(0, dtype=np.uint32),
+            payload=np.zeros((0, 8), dtype=np.uint8),
+            dlc=np.zeros(0, dtype=np.int64),
+            extended=np.zeros(0, dtype=bool)
+        )
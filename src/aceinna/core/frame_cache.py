@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+import numpy as np
+from typing import Generator, List, Optional
+from ..models.fetch_rule import DataSourceFetchRule
+from .frame_batch import FrameBatch
+
+
+def _default_cache_dir() -> str:
+    # Same per-user location as the matplotlib config of the app
+    if sys.platform == 'win32':
+        return os.path.join(os.getenv('APPDATA') or os.path.expanduser('~'), 'can-data-parser', 'frame_cache')
+    return os.path.join(os.path.expanduser('~'), '.cache', 'can-data-parser', 'frame_cache')
+
+
+class FrameCache:
+    """
+    Persistent binary cache of parsed frames, so re-running convertors on the same
+    log skips the CSV/XLSX parse and hex decode.
+
+    An entry is a directory named after the cache key, holding one set of .npy files
+    (timestamp, message_id, payload, dlc, extended) per loaded chunk and a meta.json.
+    Entries are opened memory-mapped. The key covers the file size, mtime, content
+    hash, the fetch-rule columns and FORMAT_VERSION, so edited files, changed rules
+    or entries written by an older parser never hit.
+    The directory is kept below MAX_BYTES by evicting the least recently used entries.
+
+    The cache is turned off with `frame_cache: false` in config.json, `cli.py --no-cache`
+    or CAN_PARSER_FRAME_CACHE=0 in the environment.
+    """
+    enabled = os.getenv('CAN_PARSER_FRAME_CACHE', '1') != '0'
+    cache_dir = _default_cache_dir()
+    MAX_BYTES = 4 << 30
+    # Bump whenever a reader parses the same file into different frames
+    FORMAT_VERSION = 2
+
+    _ARRAYS = ('timestamp', 'message_id', 'payload', 'dlc', 'extended')
+    _META = 'meta.json'
+
+    @staticmethod
+    def key_of(file_path: str, rule: DataSourceFetchRule) -> str:
+        stat = os.stat(file_path)
+        content = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(8 << 20), b''):
+                content.update(block)
+
+        key = json.dumps({
+            'version': FrameCache.FORMAT_VERSION,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'content': content.hexdigest(),
+            'file_type': rule.file_type,
+            'columns': [rule.timestamp_col_index, rule.message_id_col_index, rule.message_data_col_index]
+        }, sort_keys=True)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        # Also through the environment, so job processes started afterwards follow
+        cls.enabled = enabled
+        os.environ['CAN_PARSER_FRAME_CACHE'] = '1' if enabled else '0'
+
+    @classmethod
+    def read(cls, key: str) -> Optional[List[FrameBatch]]:
+        """
+        Returns the memory-mapped chunks of a cache entry, or None on a miss.
+        """
+        entry = os.path.join(cls.cache_dir, key)
+        try:
+            with open(os.path.join(entry, cls._META), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            batches = []
+            for index, malformed in enumerate(meta['malformed_id_counts']):
+                arrays = {name: np.load(os.path.join(entry, f"{index}.{name}.npy"), mmap_mode='r')
+                          for name in cls._ARRAYS}
+                batches.append(FrameBatch(malformed_id_count=malformed, **arrays))
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.isdir(entry):
+                print(f"Ignoring damaged frame cache entry {entry}: {e}")
+                shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        # Mark as recently used for the LRU eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return batches
+
+    @classmethod
+    def write_through(cls, key: str, batches) -> Generator[FrameBatch, None, None]:
+        """
+        Passes batches through while writing them to a new cache entry.
+        The entry is only published when the iteration completes; a cancelled or
+        failed load leaves no entry behind.
+        """
+        staging = os.path.join(cls.cache_dir, f".tmp-{key}-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(staging)
+            cacheable = True
+        except OSError as e:
+            print(f"Frame cache disabled for this load: {e}")
+            cacheable = False
+
+        malformed_counts = []
+        try:
+            for batch in batches:
+                # Text timestamps (object arrays) cannot be memory-mapped
+                if cacheable and batch.timestamp.dtype != object:
+                    cacheable = cls._save_batch(staging, len(malformed_counts), batch)
+                    malformed_counts.append(batch.malformed_id_count)
+                else:
+                    cacheable = False
+                yield batch
+
+            if cacheable:
+                with open(os.path.join(staging, cls._META), 'w', encoding='utf-8') as f:
+                    json.dump({'malformed_id_counts': malformed_counts, 'created': time.time()}, f)
+                cls._publish(staging, os.path.join(cls.cache_dir, key))
+                cls.evict()
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @classmethod
+    def _save_batch(cls, staging: str, index: int, batch: FrameBatch) -> bool:
+        arrays = {
+            'timestamp': batch.timestamp,
+            'message_id': batch.message_id,
+            'payload': batch.payload,
+            'dlc': batch.dlc,
+            'extended': batch.extended if batch.extended is not None else np.zeros(len(batch), dtype=bool)
+        }
+        try:
+            for name in cls._ARRAYS:
+                np.save(os.path.join(staging, f"{index}.{name}.npy"), np.ascontiguousarray(arrays[name]))
+        except OSError as e:
+            # A full disk must not fail the conversion itself
+            print(f"Could not write frame cache: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _publish(staging: str, entry: str):
+        try:
+            os.replace(staging, entry)
+        except OSError:
+            # Another process published the same key first
+            pass
+
+    @staticmethod
+    def _entry_size(entry: str) -> int:
+        return sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+
+    @classmethod
+    def evict(cls, max_bytes: Optional[int] = None):
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        """
+        limit = cls.MAX_BYTES if max_bytes is None else max_bytes
+        if not os.path.isdir(cls.cache_dir):
+            return
+
+        entries = []
+        for e in os.scandir(cls.cache_dir):
+            if e.is_dir() and not e.name.startswith('.tmp-'):
+                entries.append((e.stat().st_mtime, cls._entry_size(e.path), e.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @classmethod
+    def clear(cls):
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
@@ -0,0 +1,169 @@
+import os
+import struct
+import numpy as np
+from typing import Generator, Iterable, Optional
+from ..models.fetch_rule import DataSourceFetchRule
+from .data_loader import DataLoader
+from .frame_batch import FrameBatch
+
+# One fixed-size record per frame, CAN FD payloads fit in 64 bytes
+FRAME_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('message_id', '<u4'),
+    ('flags', 'u1'),
+    ('dlc', 'u1'),
+    ('payload', 'u1', (64,))
+])
+FLAG_EXTENDED = 0x01
+
+# Index entry: the records of one message id are stored contiguously in [start, stop)
+INDEX_DTYPE = np.dtype([('message_id', '<u4'), ('start', '<u8'), ('stop', '<u8')])
+
+_MAGIC = b'CANFRMS1'
+# magic, record count, index entry count, offset of the first record
+_HEADER = struct.Struct('<8sQQQ')
+_HEADER_SIZE = 64
+
+
+class FrameStore:
+    """
+    On-disk frame store: a header, an index by message id and a FRAME_DTYPE record
+    array sorted by (message_id, timestamp), opened with np.memmap.
+
+    Slicing by message id and time range returns views on the mapping, so several
+    worker processes can decode the same log through the shared page cache
+    without loading it into their own memory.
+    """
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Frame store not found: {path}")
+
+        with open(path, 'rb') as f:
+            magic, count, index_count, data_offset = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Not a frame store: {path}")
+
+        self.path = path
+        self.index = np.fromfile(path, dtype=INDEX_DTYPE, count=index_count, offset=_HEADER_SIZE)
+        if count:
+            self.records = np.memmap(path, dtype=FRAME_DTYPE, mode='r', offset=data_offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=FRAME_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def message_ids(self) -> np.ndarray:
+        return self.index['message_id']
+
+    def select(self, message_id: int, start_time: Optional[float] = None,
+               end_time: Optional[float] = None) -> np.ndarray:
+        """
+        Records of one message id with start_time <= timestamp < end_time, as a view.
+        """
+        position = np.searchsorted(self.index['message_id'], message_id)
+        if position >= len(self.index) or self.index['message_id'][position] != message_id:
+            return self.records[0:0]
+
+        entry = self.index[position]
+        records = self.records[int(entry['start']):int(entry['stop'])]
+        if start_time is not None or end_time is not None:
+            timestamps = records['timestamp']
+            first = np.searchsorted(timestamps, start_time, side='left') if start_time is not None else 0
+            last = np.searchsorted(timestamps, end_time, side='left') if end_time is not None else len(records)
+            records = records[first:last]
+        return records
+
+    @staticmethod
+    def to_batch(records: np.ndarray) -> FrameBatch:
+        """
+        FrameBatch over a record slice; the columns are strided views of the records.
+        """
+        return FrameBatch(
+            timestamp=records['timestamp'],
+            message_id=records['message_id'],
+            payload=records['payload'],
+            dlc=records['dlc'],
+            extended=(records['flags'] & FLAG_EXTENDED) != 0
+        )
+
+    def iter_batches(self, message_ids: Optional[Iterable[int]] = None, start_time: Optional[float] = None,
+                     end_time: Optional[float] = None) -> Generator[FrameBatch, None, None]:
+        """
+        Yields one FrameBatch per message id (all ids of the store by default),
+        restricted to the time range.
+        """
+        ids = self.message_ids() if message_ids is None else sorted(set(int(i) for i in message_ids))
+        for message_id in ids:
+            records = self.select(int(message_id), start_time, end_time)
+            if len(records):
+                yield FrameStore.to_batch(records)
+
+    @staticmethod
+    def write(path: str, batches: Iterable[FrameBatch]) -> 'FrameStore':
+        """
+        Writes batches (e.g. DataLoader.iter_batches) to a new store at path.
+        Records are spooled to a temporary file first and then copied in
+        (message_id, timestamp) order, so memory stays bounded by the id column.
+        """
+        spool_path = f"{path}.spool"
+        count = 0
+        try:
+            with open(spool_path, 'wb') as spool:
+                for batch in batches:
+                    spool.write(FrameStore._to_records(batch).tobytes())
+                    count += len(batch)
+
+            spooled = np.memmap(spool_path, dtype=FRAME_DTYPE, mode='r', shape=(count,)) if count \
+                else np.zeros(0, dtype=FRAME_DTYPE)
+            order = np.lexsort((spooled['timestamp'], spooled['message_id']))
+
+            sorted_ids = spooled['message_id'][order]
+            starts = np.flatnonzero(np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1]))) if count \
+                else np.zeros(0, dtype=np.int64)
+            index = np.zeros(len(starts), dtype=INDEX_DTYPE)
+            index['message_id'] = sorted_ids[starts]
+            index['start'] = starts
+            index['stop'] = np.append(starts[1:], count)
+
+            # Records start on a 64 byte boundary after the index
+            data_offset = -(-(_HEADER_SIZE + index.nbytes) // 64) * 64
+            with open(path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, count, len(index), data_offset).ljust(_HEADER_SIZE, b'\x00'))
+                f.write(index.tobytes())
+                f.write(b'\x00' * (data_offset - _HEADER_SIZE - index.nbytes))
+                block = 1 << 18
+                for start in range(0, count, block):
+                    f.write(spooled[order[start:start + block]].tobytes())
+            del spooled
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+        return FrameStore(path)
+
+    @staticmethod
+    def _to_records(batch: FrameBatch) -> np.ndarray:
+        if batch.timestamp.dtype == object:
+            raise ValueError("Frame store needs numeric timestamps")
+
+        records = np.zeros(len(batch), dtype=FRAME_DTYPE)
+        records['timestamp'] = batch.timestamp
+        records['message_id'] = batch.message_id
+        if batch.extended is not None:
+            records['flags'] = np.where(batch.extended, FLAG_EXTENDED, 0)
+
+        width = min(batch.payload.shape[1], 64)
+        if batch.payload.shape[1] > 64:
+            print(f"Truncated payloads longer than 64 bytes in {int((batch.dlc > 64).sum())} frames")
+        records['payload'][:, :width] = batch.payload[:, :width]
+        records['dlc'] = np.minimum(batch.dlc, 64)
+        return records
+
+    @staticmethod
+    def from_file(file_path: str, rule: DataSourceFetchRule, store_path: Optional[str] = None) -> 'FrameStore':
+        """
+        Converts a CSV/XLSX log to a frame store next to it (<file>.frames by default).
+        """
+        store_path = store_path or f"{file_path}.frames"
+        return FrameStore.write(store_path, DataLoader.iter_batches(file_path, rule))
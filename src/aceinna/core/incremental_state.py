@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+from dataclasses import asdict
+from typing import Dict, Optional, Set
+from ..models.convertor import Convertor
+from ..models.fetch_rule import DataSourceFetchRule
+from .data_loader import LoadCheckpoint
+from .signal_store import MessageColumns, MessageKey, SignalStore
+
+
+class IncrementalState:
+    """
+    What an incremental conversion of a growing log keeps between runs, in a hidden
+    folder next to the results: the load checkpoint, the signals decoded so far and
+    the last Timestamp written to every data list.
+
+    The signals are kept as flat binary files, one per column of every message
+    (timestamps, raw values, empty-payload flags), and each save only appends the
+    frames decoded since the previous one. state.json records how many frames of
+    every message are valid; the files are grown before state.json is swapped, so
+    an interrupted save leaves the previous state intact. Messages whose saved frames
+    changed order, or with text timestamps, are written to new files instead.
+    """
+    FOLDER = '.incremental'
+    STATE_FILE = 'state.json'
+    VERSION = 2
+
+    def __init__(self, key: str):
+        # Hash of the convertor, fetch rule and data file the state was built with
+        self.key = key
+        self.checkpoint = LoadCheckpoint()
+        self.store = SignalStore()
+        self.data_list_ends: Dict[str, float] = {}
+        # state.json entry of every message as last saved
+        self._saved: Dict[MessageKey, Dict] = {}
+        # Messages whose saved frames were reordered by a merge and have to be rewritten
+        self._rewrite: Set[MessageKey] = set()
+
+    @staticmethod
+    def key_of(convertor: Convertor, fetch_rule: DataSourceFetchRule, data_file_path: str) -> str:
+        payload = json.dumps({
+            'convertor': asdict(convertor),
+            'fetch_rule': asdict(fetch_rule),
+            'file': os.path.abspath(data_file_path)
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def extend(self, results: SignalStore):
+        """
+        Appends the signals decoded from the new lines to the store.
+        """
+        for key, columns in results.messages.items():
+            existing = self.store.messages.get(key)
+            if existing is None or not existing.size or not columns.size:
+                continue
+            if existing.timestamps.dtype != object and columns.timestamps.dtype != object \
+                    and columns.timestamps[0] < existing.timestamps[existing.size - 1]:
+                # Merged in by time (see MessageColumns.append), so frames already saved move
+                self._rewrite.add(key)
+        self.store.extend(results)
+
+    @classmethod
+    def load(cls, output_folder: str) -> Optional['IncrementalState']:
+        """
+        Returns the state saved in the result folder, or None when there is none
+        or it cannot be read (the conversion then starts from the beginning).
+        """
+        folder = os.path.join(output_folder, cls.FOLDER)
+        path = os.path.join(folder, cls.STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                return None
+            state = cls(data['key'])
+            state.checkpoint = LoadCheckpoint(**data['checkpoint'])
+            state.data_list_ends = data['data_list_ends']
+            for entry in data['messages']:
+                columns = cls._load_message(folder, entry)
+                state.store.add(columns)
+                state._saved[(columns.order, columns.sa)] = entry
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring damaged incremental state in {folder}: {e}")
+            return None
+        return state
+
+    def save(self, output_folder: str):
+        folder = os.path.join(output_folder, self.FOLDER)
+        os.makedirs(folder, exist_ok=True)
+        entries = [self._save_message(folder, key, columns)
+                   for key, columns in self.store.messages.items() if columns.size]
+
+        tmp_path = os.path.join(folder, f"{self.STATE_FILE}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.VERSION,
+                'key': self.key,
+                'checkpoint': asdict(self.checkpoint),
+                'data_list_ends': self.data_list_ends,
+                'messages': entries
+            }, f, indent=2)
+        os.replace(tmp_path, os.path.join(folder, self.STATE_FILE))
+        self._saved = {(entry['order'], entry['sa']): entry for entry in entries}
+        self._rewrite.clear()
+
+        # Files of rewritten messages, of earlier states and of interrupted saves
+        used = {name for entry in entries for name in self._files(entry).values()}
+        for name in os.listdir(folder):
+            if name != self.STATE_FILE and name not in used:
+                try:
+                    os.remove(os.path.join(folder, name))
+                except OSError:
+                    pass
+
+    def _save_message(self, folder: str, key: MessageKey, columns: MessageColumns) -> Dict:
+        size = columns.size
+        text = columns.timestamps.dtype == object
+        entry = {
+            'order': columns.order,
+            'message': columns.message,
+            'sa': columns.sa,
+            'names': columns.names,
+            'factors': columns.factors,
+            'offsets': columns.offsets,
+            'timestamp_dtype': 'text' if text else str(columns.timestamps.dtype),
+            'dtypes': [str(columns.raw_dtype(k)) for k in range(len(columns.names))],
+            'blank': columns.blank is not None,
+            'size': size
+        }
+
+        saved = self._saved.get(key)
+        append = saved is not None and key not in self._rewrite and not text and saved['size'] <= size \
+            and all(saved[field] == entry[field] for field in ('names', 'timestamp_dtype', 'dtypes', 'blank'))
+        # Only the frames after the saved ones are written when appending
+        start = saved['size'] if append else 0
+        entry['file'] = saved['file'] if append else f"m-{uuid.uuid4().hex}"
+
+        arrays = {'timestamp': columns.timestamps[start:size]}
+        arrays.update((str(k), columns.raw_column(k, start)) for k in range(len(columns.names)))
+        if columns.blank is not None:
+            arrays['blank'] = columns.blank[start:size]
+
+        for name, path in self._files(entry).items():
+            full_path = os.path.join(folder, path)
+            if name == 'timestamp' and text:
+                np.save(full_path, arrays[name].astype(str), allow_pickle=False)
+                continue
+            if append:
+                # Drops what an interrupted save left after the saved frames
+                os.truncate(full_path, start * arrays[name].itemsize)
+            with open(full_path, 'ab' if append else 'wb') as f:
+                f.write(np.ascontiguousarray(arrays[name]).tobytes())
+        return entry
+
+    @classmethod
+    def _load_message(cls, folder: str, entry: Dict) -> MessageColumns:
+        size = entry['size']
+        files = {name: os.path.join(folder, path) for name, path in cls._files(entry).items()}
+        if entry['timestamp_dtype'] == 'text':
+            timestamps = np.load(files['timestamp'], allow_pickle=False).astype(object)
+            if len(timestamps) != size:
+                raise ValueError(f"{files['timestamp']} does not hold {size} frames")
+        else:
+            timestamps = cls._read(files['timestamp'], entry['timestamp_dtype'], size)
+        raw = [cls._read(files[str(k)], dtype, size) for k, dtype in enumerate(entry['dtypes'])]
+        blank = cls._read(files['blank'], 'bool', size) if entry['blank'] else None
+
+        columns = MessageColumns(entry['order'], entry['message'], entry['sa'], entry['names'],
+                                 entry['factors'], entry['offsets'], [np.dtype(dtype) for dtype in entry['dtypes']])
+        columns.append(timestamps, raw, blank)
+        return columns
+
+    @staticmethod
+    def _read(path: str, dtype: str, size: int) -> np.ndarray:
+        values = np.fromfile(path, dtype=np.dtype(dtype), count=size)
+        if len(values) != size:
+            raise ValueError(f"{path} does not hold {size} frames")
+        return values
+
+    @staticmethod
+    def _files(entry: Dict) -> Dict[str, str]:
+        # Column name -> file name of a message
+        prefix = entry['file']
+        text = entry['timestamp_dtype'] == 'text'
+        files = {'timestamp': f"{prefix}.timestamp.npy" if text else f"{prefix}.timestamp.bin"}
+        files.update((str(k), f"{prefix}.{k}.bin") for k in range(len(entry['dtypes'])))
+        if entry['blank']:
+            files['blank'] = f"{prefix}.blank.bin"
+        return files
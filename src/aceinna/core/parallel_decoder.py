@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional
+from ..models.data_source import DataSource
+from .decoder import Decoder
+from .frame_batch import FrameBatch
+from .shared_arrays import SharedArrays, SharedHandle
+from .signal_store import SignalStore
+
+# Row ranges smaller than this are not worth a round trip to a worker process
+MIN_ROWS_PER_TASK = 50_000
+
+
+def _decode_range(handle: SharedHandle, start: int, stop: int,
+                  data_source: DataSource, signals: Optional[List[str]]) -> SignalStore:
+    """
+    Worker side: attaches to the shared batch columns and decodes rows [start, stop).
+    Returns the decoded columns, trimmed to their size.
+    """
+    with SharedArrays.attach(handle) as columns:
+        batch = FrameBatch(**{name: column[start:stop] for name, column in columns.items()})
+        store = Decoder.decode_columns([batch], data_source, signals=signals).trim()
+        # Drop the views before the block is closed
+        del batch, columns
+    return store
+
+
+class ParallelDecoder:
+    """
+    Multi-process variant of Decoder.decode_stream.
+    Each batch is copied once into shared memory and split into contiguous row
+    ranges that worker processes decode in parallel; no payload is pickled.
+    The per-range results are merged in row order, so the output is identical
+    to the single process decode.
+    """
+    @staticmethod
+    def default_workers() -> int:
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def decode_stream(batches: Iterable[FrameBatch], data_source: DataSource, workers: int,
+                      cancel_check: Optional[Callable[[], bool]] = None,
+                      signals: Optional[Iterable[str]] = None, compact: bool = True) -> SignalStore:
+        if workers <= 1:
+            return Decoder.decode_stream(batches, data_source, cancel_check=cancel_check, signals=signals,
+                                         compact=compact)
+
+        signals = None if signals is None else sorted(signals)
+
+        store = SignalStore()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = None
+            try:
+                for batch in batches:
+                    if cancel_check and cancel_check():
+                        return SignalStore()
+                    if batch.timestamp.dtype == object:
+                        # Text timestamps cannot live in shared memory, decode them here
+                        store.extend(Decoder.decode_columns([batch], data_source, signals=signals))
+                        continue
+
+                    # Submit this batch before collecting the previous one, so loading
+                    # the next chunk overlaps with decoding
+                    submitted = ParallelDecoder._submit(pool, batch, data_source, workers, signals)
+                    if pending is not None:
+                        ParallelDecoder._collect(pending, store)
+                    pending = submitted
+
+                if pending is not None:
+                    ParallelDecoder._collect(pending, store)
+                    pending = None
+            finally:
+                if pending is not None:
+                    pending[1].release()
+
+        if cancel_check and cancel_check():
+            return SignalStore()
+        store.trim()
+        return store.compact() if compact else store
+
+    @staticmethod
+    def _submit(pool: ProcessPoolExecutor, batch: FrameBatch, data_source: DataSource, workers: int,
+                signals: Optional[List[str]]):
+        columns = {name: getattr(batch, name) for name in ('timestamp', 'message_id', 'payload', 'dlc', 'extended')}
+        shared = SharedArrays({name: array for name, array in columns.items() if array is not None})
+
+        rows = len(batch)
+        tasks = max(1, min(workers, rows // MIN_ROWS_PER_TASK))
+        bounds = np.linspace(0, rows, tasks + 1).astype(int)
+        futures = [pool.submit(_decode_range, shared.handle, int(start), int(stop), data_source, signals)
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        return futures, shared
+
+    @staticmethod
+    def _collect(pending, store: SignalStore):
+        futures, shared = pending
+        try:
+            # Merge in row order, whatever order the workers finish in
+            for future in futures:
+                store.extend(future.result())
+        finally:
+            shared.release()
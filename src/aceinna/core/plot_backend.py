@@ -0,0 +1,243 @@
+import math
+import numpy as np
+from typing import Dict, List, Tuple
+from ..models.convert_rule import PlotRule
+from ..utils.raster_canvas import RasterCanvas
+
+# (legend label, x values, y values) of one plotted line
+PlotLine = Tuple[str, np.ndarray, np.ndarray]
+
+
+class PlotBackend:
+    """
+    Renders the lines of one PlotRule to a PNG file.
+    Register further implementations with register_plot_backend().
+    """
+    name = ''
+
+    def render(self, rule: PlotRule, lines: List[PlotLine], path: str):
+        raise NotImplementedError
+
+
+class MatplotlibBackend(PlotBackend):
+    """
+    Publication-quality output through matplotlib's object-oriented API on an Agg canvas.
+    """
+    name = 'matplotlib'
+
+    def render(self, rule: PlotRule, lines: List[PlotLine], path: str):
+        # Imported on first use, so runs that only use the raster backend never load matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        # Object-oriented figure on an Agg canvas: no global pyplot state, safe in any thread or process
+        fig = Figure(figsize=rule.figure_figsize, dpi=rule.figure_dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+
+        for label, x, y in lines:
+            ax.plot(x, y, label=label)
+
+        ax.set_title(rule.title)
+        ax.grid(linestyle=rule.grid_linestyle, alpha=rule.grid_alpha)
+        ax.tick_params(labelsize=rule.tick_labelsize)
+        ax.legend([label for label, _, _ in lines], loc=rule.legend_loc, fontsize=rule.legend_fontsize)
+        fig.savefig(path)
+
+
+class RasterBackend(PlotBackend):
+    """
+    Quick-look plots rasterized straight into a NumPy RGBA canvas and encoded as PNG,
+    without matplotlib. Follows matplotlib's default layout and colors and honors the
+    title, grid, tick label size and legend settings of the rule.
+    """
+    name = 'raster'
+
+    # matplotlib's default color cycle (tab10)
+    COLORS = [(31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+              (140, 86, 75), (227, 119, 194), (127, 127, 127), (188, 189, 34), (23, 190, 207)]
+    # Legend locations by name and by matplotlib's numeric code; 'best' is tried in this order
+    LEGEND_LOCATIONS = ['best', 'upper right', 'upper left', 'lower left', 'lower right', 'right',
+                        'center left', 'center right', 'lower center', 'upper center', 'center']
+    # Dash patterns in multiples of the grid line width, as in matplotlib
+    DASHES = {'-': (), 'solid': (), '--': (3.7, 1.6), 'dashed': (3.7, 1.6), ':': (1, 1.65),
+              'dotted': (1, 1.65), '-.': (6.4, 1.6, 1, 1.6), 'dashdot': (6.4, 1.6, 1, 1.6)}
+    TITLE_FONTSIZE = 12
+    LINE_WIDTH = 1.5
+    GRID_WIDTH = 0.8
+    GRID_COLOR = (176, 176, 176)
+
+    def render(self, rule: PlotRule, lines: List[PlotLine], path: str):
+        loc = self._legend_location(rule.legend_loc)
+        dpi = rule.figure_dpi
+        width = int(round(rule.figure_figsize[0] * dpi))
+        height = int(round(rule.figure_figsize[1] * dpi))
+        canvas = RasterCanvas(width, height)
+        # matplotlib's default subplot position
+        left, right = int(0.125 * width), int(0.9 * width)
+        top, bottom = int(0.12 * height), int(0.89 * height)
+
+        lines = [(label, self._numeric_x(x), np.asarray(y, dtype=np.float64)) for label, x, y in lines]
+        x_range = self._data_range([x for _, x, _ in lines])
+        y_range = self._data_range([y for _, _, y in lines])
+        x_ticks = self._nice_ticks(*x_range)
+        y_ticks = self._nice_ticks(*y_range)
+
+        def to_px(values, value_range, start, stop):
+            low, high = value_range
+            return start + (values - low) * ((stop - start) / (high - low))
+
+        # Grid and ticks
+        px_per_pt = dpi / 72.0
+        tick_scale = self._text_scale(rule.tick_labelsize, dpi)
+        grid_width = max(1, int(round(self.GRID_WIDTH * px_per_pt)))
+        dashes = self.DASHES.get(rule.grid_linestyle)
+        tick_length = int(round(3.5 * px_per_pt))
+        x_decimals, y_decimals = self._decimals(x_ticks), self._decimals(y_ticks)
+        for tick in x_ticks:
+            col = int(round(to_px(tick, x_range, left, right)))
+            if dashes is not None:
+                canvas.dashed_line((col, top), (col, bottom - 1), self.GRID_COLOR, rule.grid_alpha,
+                                   [max(1, int(round(d * grid_width))) for d in dashes], grid_width)
+            canvas.fill_rect(col, bottom, col + 1, bottom + tick_length, (0, 0, 0))
+            label = f"{tick:.{x_decimals}f}"
+            w, _ = canvas.text_size(label, tick_scale)
+            canvas.text(col - w // 2, bottom + tick_length + 2 * tick_scale, label, tick_scale)
+        for tick in y_ticks:
+            row = int(round(to_px(tick, y_range, bottom, top)))
+            if dashes is not None:
+                canvas.dashed_line((left, row), (right - 1, row), self.GRID_COLOR, rule.grid_alpha,
+                                   [max(1, int(round(d * grid_width))) for d in dashes], grid_width)
+            canvas.fill_rect(left - tick_length, row, left, row + 1, (0, 0, 0))
+            label = f"{tick:.{y_decimals}f}"
+            w, h = canvas.text_size(label, tick_scale)
+            canvas.text(left - tick_length - 2 * tick_scale - w, row - h // 2, label, tick_scale)
+
+        # Lines
+        line_width = self.LINE_WIDTH * px_per_pt
+        covered = np.zeros((height, width), dtype=bool)
+        for i, (label, x, y) in enumerate(lines):
+            covered |= canvas.polyline(to_px(x, x_range, left, right), to_px(y, y_range, bottom, top),
+                                       self.COLORS[i % len(self.COLORS)], line_width, (left, top, right, bottom))
+
+        canvas.rect(left, top, right, bottom, (0, 0, 0), max(1, int(round(0.8 * px_per_pt))))
+
+        # Title
+        title_scale = self._text_scale(self.TITLE_FONTSIZE, dpi)
+        w, h = canvas.text_size(rule.title, title_scale)
+        canvas.text((left + right - w) // 2, top - h - 3 * title_scale, rule.title, title_scale)
+
+        self._draw_legend(canvas, lines, loc, rule.legend_fontsize, dpi, (left, top, right, bottom), covered)
+        canvas.save_png(path)
+
+    def _legend_location(self, loc) -> str:
+        if isinstance(loc, int) and 0 <= loc < len(self.LEGEND_LOCATIONS):
+            return self.LEGEND_LOCATIONS[loc]
+        if loc in self.LEGEND_LOCATIONS:
+            return loc
+        raise ValueError(f"'{loc}' is not a valid value for loc")
+
+    def _draw_legend(self, canvas: RasterCanvas, lines: List[PlotLine], loc: str, fontsize: int, dpi: int,
+                     axes: Tuple[int, int, int, int], covered: np.ndarray):
+        if not lines:
+            return
+        scale = self._text_scale(fontsize, dpi)
+        em = int(round(fontsize * dpi / 72.0))
+        pad = em // 2
+        sample = 2 * em
+        row_height = max(canvas.text_size('A', scale)[1], 1) + pad
+        text_width = max(canvas.text_size(label, scale)[0] for label, _, _ in lines)
+        box_w = pad + sample + pad + text_width + pad
+        box_h = pad + row_height * len(lines)
+
+        left, top, right, bottom = axes
+        positions = {
+            'upper right': (right - pad - box_w, top + pad), 'upper left': (left + pad, top + pad),
+            'lower left': (left + pad, bottom - pad - box_h), 'lower right': (right - pad - box_w, bottom - pad - box_h),
+            'right': (right - pad - box_w, (top + bottom - box_h) // 2),
+            'center left': (left + pad, (top + bottom - box_h) // 2),
+            'center right': (right - pad - box_w, (top + bottom - box_h) // 2),
+            'lower center': ((left + right - box_w) // 2, bottom - pad - box_h),
+            'upper center': ((left + right - box_w) // 2, top + pad),
+            'center': ((left + right - box_w) // 2, (top + bottom - box_h) // 2)
+        }
+        if loc == 'best':
+            # First location, in matplotlib's order, that hides the fewest line pixels
+            loc = min(self.LEGEND_LOCATIONS[1:], key=lambda name: covered[
+                max(positions[name][1], 0):positions[name][1] + box_h,
+                max(positions[name][0], 0):positions[name][0] + box_w].sum())
+        x, y = positions[loc]
+
+        canvas.fill_rect(x, y, x + box_w, y + box_h, (255, 255, 255))
+        canvas.rect(x, y, x + box_w, y + box_h, (204, 204, 204))
+        line_width = max(1, int(round(self.LINE_WIDTH * dpi / 72.0)))
+        for i, (label, _, _) in enumerate(lines):
+            row = y + pad + i * row_height
+            middle = row + row_height // 2 - pad // 2
+            color = self.COLORS[i % len(self.COLORS)]
+            canvas.fill_rect(x + pad, middle - line_width // 2, x + pad + sample, middle - line_width // 2 + line_width, color)
+            canvas.text(x + pad + sample + pad, row, label, scale)
+
+    @staticmethod
+    def _numeric_x(x) -> np.ndarray:
+        x = np.asarray(x)
+        if np.issubdtype(x.dtype, np.number):
+            return x.astype(np.float64)
+        # Text timestamps: plot against the sample position
+        return np.arange(len(x), dtype=np.float64)
+
+    @staticmethod
+    def _data_range(arrays: List[np.ndarray]) -> Tuple[float, float]:
+        finite = [a[np.isfinite(a)] for a in arrays]
+        finite = [a for a in finite if len(a)]
+        if not finite:
+            return 0.0, 1.0
+        low = min(float(a.min()) for a in finite)
+        high = max(float(a.max()) for a in finite)
+        if high == low:
+            spread = abs(low) * 0.05 or 0.5
+            return low - spread, high + spread
+        # 5% margins like matplotlib's autoscale
+        margin = (high - low) * 0.05
+        return low - margin, high + margin
+
+    @staticmethod
+    def _nice_ticks(low: float, high: float, target: int = 6) -> np.ndarray:
+        raw_step = (high - low) / target
+        magnitude = 10 ** math.floor(math.log10(raw_step))
+        step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+        first = math.ceil(low / step) * step
+        return np.arange(first, high + step * 1e-9, step)
+
+    @staticmethod
+    def _decimals(ticks: np.ndarray) -> int:
+        # Fewest decimals that still tell the ticks apart (0.25 steps need two)
+        if len(ticks) < 2:
+            return 0
+        step = float(ticks[1] - ticks[0])
+        decimals = max(0, -int(math.floor(math.log10(step))))
+        while decimals < 10 and abs(round(step, decimals) - step) > step * 1e-6:
+            decimals += 1
+        return decimals
+
+    @staticmethod
+    def _text_scale(fontsize: float, dpi: int) -> int:
+        # The 7 pixel glyphs stand for the ~0.7 em cap height of a font of this size
+        return max(1, int(round(fontsize * dpi / 72.0 * 0.7 / 7)))
+
+
+PLOT_BACKENDS: Dict[str, PlotBackend] = {
+    MatplotlibBackend.name: MatplotlibBackend(),
+    RasterBackend.name: RasterBackend()
+}
+
+
+def register_plot_backend(backend: PlotBackend):
+    PLOT_BACKENDS[backend.name] = backend
+
+
+def get_plot_backend(name: str) -> PlotBackend:
+    backend = PLOT_BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown plot backend: {name}")
+    return backend
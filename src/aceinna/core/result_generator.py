@@ -1,58 +1,165 @@
 import os
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 from ..models.convert_rule import PlotRule, DataListRule, ConvertRule
+from ..utils.downsample import downsample
+from .plot_backend import get_plot_backend
+from .shared_arrays import SharedArrays, SharedHandle
+from .signal_store import SignalStore, SignalView
+from .time_aligner import TimeAligner
+
+
+@dataclass
+class ResultFailure:
+    """
+    A result file that could not be generated.
+    """
+    rule_index: int
+    suffix: str
+    error: str
+
+
+# Plot job for a worker process: (rule index, suffix, rule, binding -> (shared index key, shared values key))
+PlotJob = Tuple[int, str, PlotRule, Dict[str, Tuple[str, str]]]
+
+
+def _render_plot_job(handle: Optional[SharedHandle], inline: Mapping[str, pd.Series], job: PlotJob,
+                     folder: str) -> Optional[str]:
+    """
+    Worker side: rebuilds the series of one plot from shared memory and renders it.
+    Returns the error message on failure.
+    """
+    index, suffix, rule, bindings = job
+    try:
+        if handle is None:
+            ResultGenerator._generate_plot(inline, rule, folder, index, suffix)
+        else:
+            with SharedArrays.attach(handle) as arrays:
+                results = {name: pd.Series(arrays[values_key], index=arrays[index_key], copy=False)
+                           for name, (index_key, values_key) in bindings.items()}
+                results.update(inline)
+                ResultGenerator._generate_plot(results, rule, folder, index, suffix)
+                del results, arrays
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
 
 class ResultGenerator:
     @staticmethod
-    def generate(results: Dict[str, pd.Series], rules: List[ConvertRule], output_folder: str):
+    def generate(results: SignalStore, rules: List[ConvertRule], output_folder: str,
+                 workers: int = 1, data_list_ends: Optional[Dict[str, float]] = None) -> List[ResultFailure]:
+        """
+        Writes the plot and data list files of every rule, per J1939 source address.
+        Each rule looks its signals up by name in the view of one source address.
+        Plots are rendered in `workers` processes when there are several of them.
+        data_list_ends (file name -> last Timestamp written) makes data lists incremental:
+        a file with an entry only gets the rows after it appended, and the entries are
+        updated. Plots are always drawn in full.
+        Returns the failed results; the others are written regardless.
+        """
         if not os.path.exists(output_folder):
             os.makedirs(output_folder)
-        
-        # Analyze available SAs for J1939 splitting
-        # Keys are "Name#SA" or just "Name"
-        sas = set()
-        has_j1939_keys = False
-        
-        plain_results = {} # Name -> Series (for CommonCAN or un-split logic if any)
-        
-        for key in results.keys():
-            if '#' in key:
-                parts = key.split('#')
-                if len(parts) == 2 and parts[1].isdigit():
-                    sas.add(int(parts[1]))
-                    has_j1939_keys = True
-            else:
-                plain_results[key] = results[key]
-        
-        groups = []
-        if has_j1939_keys:
-            # Create a view for each SA
-            for sa in sorted(list(sas)):
-                # Filter results for this SA
-                view = {**plain_results} # Include plain results in all groups?
-                for key, val in results.items():
-                    if key.endswith(f"#{sa}"):
-                        name = key.split('#')[0]
-                        view[name] = val
-                groups.append((f"_SA{sa}", view))
-        else:
-            # Common CAN or no J1939 specific keys
-            groups.append(("", results))
 
-        for suffix, group_results in groups:
+        failures: List[ResultFailure] = []
+        plot_jobs = []
+        for suffix, group_results in results.groups():
             for i, rule in enumerate(rules):
-                try:
-                    if rule.type == 'plot':
-                        ResultGenerator._generate_plot(group_results, rule, output_folder, i, suffix)
-                    elif rule.type == 'data_list':
-                        ResultGenerator._generate_data_list(group_results, rule, output_folder, i, suffix)
-                except Exception as e:
-                    print(f"Error generating result for rule {i} suffix {suffix}: {e}")
+                if rule.type == 'plot':
+                    plot_jobs.append((i, suffix, rule, group_results))
+                elif rule.type == 'data_list':
+                    try:
+                        ResultGenerator._generate_data_list(group_results, rule, output_folder, i, suffix,
+                                                            data_list_ends)
+                    except Exception as e:
+                        failures.append(ResultFailure(i, suffix, f"{type(e).__name__}: {e}"))
+
+        failures.extend(ResultGenerator._render_plots(plot_jobs, output_folder, workers))
+        failures.sort(key=lambda f: (f.suffix, f.rule_index))
+        return failures
+
+    @staticmethod
+    def required_signals(rules: List[ConvertRule]) -> Set[str]:
+        """
+        Names of every signal the rules bind (plot axes, data list fields and references),
+        i.e. the only signals a conversion with these rules has to decode.
+        """
+        signals = set()
+        for rule in rules:
+            if rule.type == 'plot':
+                signals.update(ResultGenerator._plot_bindings(rule))
+            elif rule.type == 'data_list':
+                signals.update(field.binding for field in rule.fields)
+                if rule.reference and rule.align_mode in ('reference', 'nearest'):
+                    signals.add(rule.reference)
+        return signals
+
+    @staticmethod
+    def _plot_bindings(rule: PlotRule) -> List[str]:
+        bindings = [y_axis.binding for y_axis in rule.y_axes]
+        if rule.x_axis:
+            bindings.append(rule.x_axis.binding)
+        return bindings
+
+    @staticmethod
+    def _render_plots(jobs: List[Tuple[int, str, PlotRule, SignalView]], folder: str,
+                      workers: int) -> List[ResultFailure]:
+        if workers <= 1 or len(jobs) <= 1:
+            failures = []
+            for index, suffix, rule, group_results in jobs:
+                error = _render_plot_job(None, group_results, (index, suffix, rule, {}), folder)
+                if error:
+                    failures.append(ResultFailure(index, suffix, error))
+            return failures
+
+        # Every series goes to shared memory once, however many plots and SA groups use it,
+        # and signals of one message share their timestamp array there too.
+        # Series with text timestamps cannot be shared and are pickled with their jobs.
+        arrays: Dict[str, np.ndarray] = {}
+        keys: Dict[int, str] = {}
+        # The store hands out the same Series and Index objects for the whole run, so ids are stable
+        shared_objects = []
+        pool_jobs = []
+        for index, suffix, rule, group_results in jobs:
+            bindings, inline = {}, {}
+            for name in ResultGenerator._plot_bindings(rule):
+                series = group_results.get(name)
+                if series is None:
+                    continue
+                if series.index.dtype == object or series.dtype == object:
+                    inline[name] = series
+                    continue
+                for part in (series.index, series):
+                    if id(part) not in keys:
+                        key = keys[id(part)] = str(len(keys))
+                        arrays[key] = part.to_numpy()
+                        shared_objects.append(part)
+                bindings[name] = (keys[id(series.index)], keys[id(series)])
+            pool_jobs.append(((index, suffix, rule, bindings), inline))
+
+        shared = SharedArrays(arrays)
+        failures = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [(job, pool.submit(_render_plot_job, shared.handle, inline, job, folder))
+                           for job, inline in pool_jobs]
+                for job, future in futures:
+                    try:
+                        error = future.result()
+                    except Exception as e:
+                        # The worker process itself failed (e.g. killed)
+                        error = f"{type(e).__name__}: {e}"
+                    if error:
+                        failures.append(ResultFailure(job[0], job[1], error))
+        finally:
+            shared.release()
+        return failures
 
     @staticmethod
-    def _generate_plot(results: Dict[str, pd.Series], rule: PlotRule, folder: str, index: int, suffix: str = ""):
+    def _generate_plot(results: Mapping[str, pd.Series], rule: PlotRule, folder: str, index: int, suffix: str = ""):
         # Check if we have any data to plot for this rule in this view
         has_data = False
         if rule.x_axis and rule.x_axis.binding in results: has_data = True
@@ -61,9 +168,7 @@ class ResultGenerator:
             
         if not has_data: return
 
-        plt.figure(figsize=rule.figure_figsize, dpi=rule.figure_dpi)
-        
-        legend_labels = []
+        lines = []
         # X Axis
         x_data = None
         if rule.x_axis and rule.x_axis.binding in results:
@@ -74,88 +179,103 @@ class ResultGenerator:
             if y_axis.binding in results:
                 y_data = results[y_axis.binding]
                 
-                # Align X and Y
-                # If x_data is provided, we need to merge/align by timestamp? 
-                # Or scatter plot?
-                # Usually we plot Y vs Time if X is None.
-                # If X is provided (e.g. another signal), we scatter or plot signal vs signal.
-                
                 label = y_axis.binding
-                legend_labels.append(label)
                 if x_data is not None:
-                    # Align based on timestamp? 
-                    # If x_data is another signal, it has its own timestamps.
-                    # We likely need to reindex.
-                    # For simplicity:
-                    # If timestamps match exactly: direct plotting.
-                    # If not, maybe reindex y to x's time?
-                    
-                    # Let's assume common time base or just plot against values.
-                    # Actually complex.
-                    # Fallback: Plot against index if x_data missing.
-                    try:
-                        # Reindex y to x
-                        combined = pd.concat([x_data, y_data], axis=1).dropna()
-                        # Sort by x?
-                        combined = combined.sort_values(by=combined.columns[0])
-                        plt.plot(combined.iloc[:, 0], combined.iloc[:, 1], label=label)
-                    except:
-                        pass
+                    # Signal vs signal: the two signals have their own timestamps,
+                    # so every Y sample is paired with the X signal at that time
+                    # A pairing error fails this plot instead of silently dropping the line
+                    x_values, y_values = ResultGenerator._pair_xy(x_data, y_data, rule)
+                    x_values, y_values = ResultGenerator._level_of_detail(x_values, y_values, rule)
+                    lines.append((label, x_values, y_values))
                 else:
                     # Plot vs Time (Index)
-                    plt.plot(y_data.index, y_data.values, label=label)
-
-        plt.title(rule.title)
-        plt.grid(linestyle=rule.grid_linestyle, alpha=rule.grid_alpha)
-        plt.tick_params(labelsize=rule.tick_labelsize)
-        if hasattr(rule, 'legend_label'): 
-            # The design says "legendStyle: label, loc, fontsize"
-            # The label "legend1" seems to be the default text? 
-            # Usually legend uses the plot labels.
-            plt.legend(legend_labels, loc=rule.legend_loc, fontsize=rule.legend_fontsize)
-        else:
-            plt.legend()
-             
+                    x_values, y_values = ResultGenerator._level_of_detail(y_data.index.to_numpy(), y_data.to_numpy(), rule)
+                    lines.append((label, x_values, y_values))
+
         filename = f"plot_{index}_{rule.title.replace(' ', '_')}{suffix}.png"
-        plt.savefig(os.path.join(folder, filename))
-        plt.close()
+        # Title, grid, tick and legend styles are applied by the backend
+        get_plot_backend(rule.backend).render(rule, lines, os.path.join(folder, filename))
+
+    @staticmethod
+    def _pair_xy(x_data: pd.Series, y_data: pd.Series, rule: PlotRule) -> Tuple[np.ndarray, np.ndarray]:
+        if x_data.index.dtype == object or y_data.index.dtype == object:
+            # Text timestamps have no distance, only exact matches pair up
+            combined = pd.concat([x_data, y_data], axis=1).dropna()
+            combined = combined.sort_values(by=combined.columns[0])
+            return combined.iloc[:, 0].to_numpy(), combined.iloc[:, 1].to_numpy()
+        return TimeAligner.pair(x_data, y_data, rule.xy_pairing, rule.xy_tolerance)
+
+    @staticmethod
+    def _level_of_detail(x: np.ndarray, y: np.ndarray, rule: PlotRule) -> Tuple[np.ndarray, np.ndarray]:
+        # One bucket per horizontal pixel of the figure; numeric x only (not text timestamps)
+        if rule.downsample == 'none' or not (np.issubdtype(x.dtype, np.number) and np.issubdtype(y.dtype, np.number)):
+            return x, y
+        pixels = int(rule.figure_figsize[0] * rule.figure_dpi)
+        return downsample(x, y, rule.downsample, pixels)
 
     @staticmethod
-    def _generate_data_list(results: Dict[str, pd.Series], rule: DataListRule, folder: str, index: int, suffix: str = ""):
-        # Merge all required fields into one DataFrame
+    def _generate_data_list(results: Mapping[str, pd.Series], rule: DataListRule, folder: str, index: int, suffix: str = "",
+                            ends: Optional[Dict[str, float]] = None):
+        if rule.align_mode in ('reference', 'nearest') and rule.reference and \
+                rule.reference not in [field.binding for field in rule.fields]:
+            # A rule error, unlike a reference signal that is only missing in this SA group
+            raise ValueError(f"Reference field '{rule.reference}' is not one of the data list fields")
+
+        # Collect the required fields; fields missing in this view are skipped
+        # Forward filled rows that only change on transitions need nothing but the
+        # transitions of each field, read without expanding change-only storage
+        transitions_only = rule.emit == 'on_change' and rule.align_mode == 'union' and hasattr(results, 'changes')
         series_list = []
+        reference = None
         for field in rule.fields:
             if field.binding in results:
-                s = results[field.binding]
-                series_list.append(s)
+                if reference is None and field.binding == (rule.reference or rule.fields[0].binding):
+                    reference = len(series_list)
+                series = results.changes(field.binding) if transitions_only else results[field.binding]
+                series_list.append(series)
         
         if not series_list:
             return
 
-        # Outer join on execution? 
-        # Signals might come at different timestamps.
-        # We need a unified timeline? Or just a huge table with NaNs?
-        # Usually "Outer Join".
-        
-        df = pd.concat(series_list, axis=1)
-        
-        # Sort by timestamp (index)
-        df.sort_index(inplace=True)
-        
-        # Fill the line with previous values (Forward Fill) to align asynchronous data
-        df.ffill(inplace=True)
+        if rule.align_mode in ('reference', 'nearest') and reference is None:
+            # No reference signal in this view, so there are no rows
+            return
 
-        # Add index as timestamp column?
-        df.reset_index(inplace=True)
-        df.rename(columns={'index': 'Timestamp'}, inplace=True)
-        
         # Use rule.title if available, else standard fallback
         safe_title = rule.title.replace(' ', '_') if getattr(rule, 'title', '') else f"datalist_{index}"
         
         filename = f"{safe_title}{suffix}.csv"
+        path = os.path.join(folder, filename)
+        numeric = all(s.index.dtype != object for s in series_list)
+
+        # Incremental run: only the rows after the last one written, aligned from the
+        # samples around them (text timestamps have no order, those files are rewritten)
+        since = None
+        origin = None
+        if ends is not None and filename in ends and numeric and os.path.exists(path):
+            since = ends[filename]
+            origin = min(s.index.min() for s in series_list if len(s))
+            series_list = [TimeAligner.window(s, since) for s in series_list]
+
+        # Align the asynchronous signals onto one timeline (forward fill onto the union by default)
+        df = TimeAligner.align(series_list, mode=rule.align_mode, rate=rule.resample_rate,
+                               reference=reference or 0, tolerance=rule.tolerance, origin=origin)
+        if rule.emit == 'on_change':
+            df = TimeAligner.changed_rows(df)
+
+        if since is not None:
+            df = df[df['Timestamp'].to_numpy() > since]
+            if len(df) == 0:
+                return
         df.to_csv(
-            os.path.join(folder, filename), 
+            path,
             sep=rule.delimiter, 
             index=False, 
-            header=rule.include_header
+            header=rule.include_header and since is None,
+            mode='w' if since is None else 'a'
         )
+        if ends is not None:
+            if numeric and len(df):
+                ends[filename] = float(df['Timestamp'].iloc[-1])
+            else:
+                ends.pop(filename, None)
@@ -0,0 +1,70 @@
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Tuple
+
+# (offset in the block, dtype, shape) of every packed array
+ArraySpecs = Dict[str, Tuple[int, str, Tuple[int, ...]]]
+# What a worker process needs to find the arrays: (block name, specs)
+SharedHandle = Tuple[str, ArraySpecs]
+
+_ALIGNMENT = 64
+
+
+class SharedArrays:
+    """
+    Named numeric arrays packed into one shared memory block, so worker processes
+    read them in place instead of receiving pickled copies.
+    The creating process owns the block and must call release().
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.specs: ArraySpecs = {}
+        size = 0
+        for name, array in arrays.items():
+            self.specs[name] = (size, array.dtype.str, array.shape)
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self.block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for name, array in arrays.items():
+                SharedArrays._view(self.block, self.specs[name])[...] = array
+        except Exception:
+            self.release()
+            raise
+
+    @property
+    def handle(self) -> SharedHandle:
+        return self.block.name, self.specs
+
+    def release(self):
+        self.block.close()
+        self.block.unlink()
+
+    @staticmethod
+    def _view(block: shared_memory.SharedMemory, spec: Tuple[int, str, Tuple[int, ...]]) -> np.ndarray:
+        offset, dtype, shape = spec
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+
+    @staticmethod
+    @contextmanager
+    def attach(handle: SharedHandle) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Worker side: yields read-only views of the packed arrays.
+        The views must not be used after the block is left.
+        """
+        name, specs = handle
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            arrays = {}
+            for key, spec in specs.items():
+                view = SharedArrays._view(block, spec)
+                view.flags.writeable = False
+                arrays[key] = view
+            yield arrays
+        finally:
+            arrays = None
+            try:
+                block.close()
+            except BufferError:
+                # A caller still holds a view; the mapping goes away with it
+                pass
@@ -0,0 +1,416 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+from .decode_plan import MessagePlan
+
+# (mapping position, J1939 source address or None) of one message's columns
+MessageKey = Tuple[int, Optional[int]]
+
+
+class MessageColumns:
+    """
+    Growable columnar samples of one message: one timestamp array shared by
+    one raw value column per mapped signal. For J1939 there is one per (PGN, SA).
+    Raw values are kept as the narrowest integer type of the field (1 byte for
+    flags and enums instead of 8), with factor and offset as metadata;
+    physical values are computed on demand.
+    After decoding, columns of slowly varying signals can be compacted to
+    change-only runs (see compact()), which keep one entry per value transition.
+    Capacity doubles when full, so appending chunk after chunk costs amortized
+    O(1) per frame and never keeps more than 2x the decoded data.
+    """
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, order: int, message: int, sa: Optional[int], names: List[str],
+                 factors: List[float], offsets: List[float], raw_dtypes: List[np.dtype]):
+        # Position of the mapping in the data source; later mappings win for shared CAN signal names
+        self.order = order
+        # CAN message id or J1939 PGN
+        self.message = message
+        self.sa = sa
+        self.names: List[str] = list(names)
+        self.factors: List[float] = list(factors)
+        self.offsets: List[float] = list(offsets)
+        self.size = 0
+        self.timestamps = np.empty(0, dtype=np.float64)
+        # One contiguous array per signal, in its raw dtype; None while the signal is stored as runs
+        self.raw: List[Optional[np.ndarray]] = [np.empty(0, dtype=dtype) for dtype in raw_dtypes]
+        # Change-only storage per signal: (frame positions where the value changes, raw value from there on)
+        self.runs: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(self.names)
+        # Frames with an empty payload decode to 0.0; only allocated once such a frame is seen
+        self.blank: Optional[np.ndarray] = None
+        self._index: Optional[pd.Index] = None
+
+    @classmethod
+    def for_plan(cls, order: int, message: int, sa: Optional[int], plan: MessagePlan) -> 'MessageColumns':
+        return cls(order, message, sa, plan.names, plan.factors.tolist(), plan.offsets.tolist(), plan.raw_dtypes)
+
+    def append(self, timestamps: np.ndarray, raw: List[np.ndarray], blank: Optional[np.ndarray] = None):
+        """
+        Appends N frames; raw holds one array of N raw values per signal,
+        blank marks the frames with an empty payload.
+        Frames that start before the last stored timestamp (e.g. another raw id of
+        the same J1939 PGN and SA, decoded from a FrameStore) are merged in by time.
+        """
+        count = len(timestamps)
+        if count == 0:
+            return
+        if any(runs is not None for runs in self.runs):
+            self._expand()
+        if self.timestamps.dtype != timestamps.dtype and self.size == 0:
+            self.timestamps = np.empty(0, dtype=timestamps.dtype)
+        # Text timestamps have no order, they stay in file order
+        merge_from = None
+        if self.size and timestamps.dtype != object and timestamps[0] < self.timestamps[self.size - 1]:
+            merge_from = int(np.searchsorted(self.timestamps[:self.size], timestamps[0], side='right'))
+        self._reserve(self.size + count)
+        end = self.size + count
+        self.timestamps[self.size:end] = timestamps
+        for column, values in zip(self.raw, raw):
+            column[self.size:end] = values
+        if blank is not None and (self.blank is not None or blank.any()):
+            if self.blank is None:
+                self.blank = np.zeros(len(self.timestamps), dtype=bool)
+            self.blank[self.size:end] = blank
+        self.size = end
+        self._index = None
+        if merge_from is not None:
+            self._merge_tail(merge_from)
+
+    def _merge_tail(self, start: int):
+        # Stable, so frames with equal timestamps keep the stored ones first
+        order = np.argsort(self.timestamps[start:self.size], kind='stable') + start
+        self.timestamps[start:self.size] = self.timestamps[order]
+        for column in self.raw:
+            column[start:self.size] = column[order]
+        if self.blank is not None:
+            self.blank[start:self.size] = self.blank[order]
+
+    def extend(self, other: 'MessageColumns'):
+        """
+        Appends the frames of another part, e.g. one decoded by a worker process.
+        """
+        blank = None if other.blank is None else other.blank[:other.size]
+        self.append(other.timestamps[:other.size], [other.raw_column(k) for k in range(len(other.names))], blank)
+
+    def trim(self):
+        """
+        Releases the unused capacity, e.g. before the columns are sent to another process.
+        """
+        self.timestamps = self.timestamps[:self.size].copy()
+        self.raw = [None if column is None else column[:self.size].copy() for column in self.raw]
+        if self.blank is not None:
+            self.blank = self.blank[:self.size].copy()
+        self._index = None
+
+    def index(self) -> pd.Index:
+        """
+        Timestamp index shared by the Series of every signal of this message.
+        """
+        if self._index is None:
+            self._index = pd.Index(self.timestamps[:self.size], copy=False)
+        return self._index
+
+    def raw_column(self, k: int, start: int = 0) -> np.ndarray:
+        """
+        Raw values of signal k, one per frame from frame `start` on (expanded from runs if needed).
+        """
+        if self.runs[k] is None:
+            return self.raw[k][start:self.size]
+        starts, values = self.runs[k]
+        first = max(int(np.searchsorted(starts, start, side='right')) - 1, 0)
+        lengths = np.diff(np.append(starts[first:], self.size)).astype(np.int64)
+        if len(lengths):
+            lengths[0] -= start - int(starts[first])
+        return np.repeat(values[first:], lengths)
+
+    def raw_dtype(self, k: int) -> np.dtype:
+        return (self.raw[k] if self.runs[k] is None else self.runs[k][1]).dtype
+
+    def physical(self, k: int) -> np.ndarray:
+        """
+        Physical values of signal k: raw * factor + offset, as float64.
+        """
+        return self._scale(k, self.raw_column(k), self.blank[:self.size] if self.blank is not None else None)
+
+    def changes(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (timestamps, physical values) of the first sample of signal k and of every
+        sample whose value differs from the one before it.
+        """
+        if self.runs[k] is not None:
+            starts, values = self.runs[k]
+        else:
+            starts = self._change_positions(k)
+            values = self.raw[k][starts]
+        blank = self.blank[starts] if self.blank is not None else None
+        return self.timestamps[starts], self._scale(k, values, blank)
+
+    def compact(self, min_saving: float = 4.0):
+        """
+        Stores every signal that changes rarely as runs, when that takes at least
+        `min_saving` times less memory than one raw value per frame.
+        Messages with empty-payload frames stay dense.
+        """
+        if self.blank is not None or self.size == 0:
+            return
+        position_dtype = np.uint32 if self.size < 2 ** 32 else np.int64
+        for k, column in enumerate(self.raw):
+            if column is None:
+                continue
+            dense_bytes = self.size * column.itemsize
+            starts = self._change_positions(k)
+            if len(starts) * (np.dtype(position_dtype).itemsize + column.itemsize) * min_saving > dense_bytes:
+                continue
+            self.runs[k] = (starts.astype(position_dtype), column[starts].copy())
+            self.raw[k] = None
+
+    @property
+    def nbytes(self) -> int:
+        size = self.timestamps.nbytes + sum(column.nbytes for column in self.raw if column is not None)
+        size += sum(starts.nbytes + values.nbytes for starts, values in filter(None, self.runs))
+        return size + (self.blank.nbytes if self.blank is not None else 0)
+
+    def _change_positions(self, k: int) -> np.ndarray:
+        column = self.raw[k][:self.size]
+        if len(column) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.concatenate(([True], column[1:] != column[:-1])))
+
+    def _scale(self, k: int, raw: np.ndarray, blank: Optional[np.ndarray]) -> np.ndarray:
+        values = raw.astype(np.float64)
+        values *= self.factors[k]
+        values += self.offsets[k]
+        if blank is not None:
+            values[blank] = 0.0
+        return values
+
+    def _expand(self):
+        # Back to one raw value per frame, e.g. when frames are appended after compaction
+        for k, runs in enumerate(self.runs):
+            if runs is not None:
+                column = np.empty(len(self.timestamps), dtype=runs[1].dtype)
+                column[:self.size] = self.raw_column(k)
+                self.raw[k] = column
+                self.runs[k] = None
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self.timestamps):
+            return
+        new_capacity = max(capacity, 2 * len(self.timestamps), self.INITIAL_CAPACITY)
+        self.timestamps = self._grow(self.timestamps, new_capacity)
+        self.raw = [self._grow(column, new_capacity) for column in self.raw]
+        if self.blank is not None:
+            self.blank = self._grow(self.blank, new_capacity)
+            self.blank[self.size:] = False
+
+    def _grow(self, array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.empty(capacity, dtype=array.dtype)
+        grown[:self.size] = array[:self.size]
+        return grown
+
+
+class SignalStore:
+    """
+    Decode results keyed by (message, SA, signal).
+    Signals decoded from the same frames share one timestamp array, values are
+    kept raw and scaled to physical units when a signal is looked up, and a
+    name index resolves a signal name (and J1939 source address) without
+    scanning or parsing keys. Series are built on first lookup and cached,
+    so every rule sees the same objects and only used signals are scaled.
+    """
+    def __init__(self):
+        self.messages: Dict[MessageKey, MessageColumns] = {}
+        # (signal name, SA) -> (columns, column number) of every message carrying it
+        self._by_name: Dict[Tuple[str, Optional[int]], List[Tuple[MessageColumns, int]]] = {}
+        self._series: Dict[Tuple[str, Optional[int]], pd.Series] = {}
+
+    def columns(self, order: int, message: int, sa: Optional[int], plan: MessagePlan) -> MessageColumns:
+        """
+        Returns the columns of a message, creating them on first use.
+        """
+        self._series.clear()
+        columns = self.messages.get((order, sa))
+        if columns is None:
+            columns = MessageColumns.for_plan(order, message, sa, plan)
+            self._add(columns)
+        return columns
+
+    def add(self, columns: MessageColumns):
+        """
+        Adds the columns of a message the store does not hold yet, e.g. restored from disk.
+        """
+        self._series.clear()
+        self._add(columns)
+
+    def extend(self, other: 'SignalStore'):
+        """
+        Appends the results decoded from a later range of frames.
+        """
+        self._series.clear()
+        for key, columns in other.messages.items():
+            existing = self.messages.get(key)
+            if existing is None:
+                self._add(columns)
+            else:
+                existing.extend(columns)
+
+    def trim(self) -> 'SignalStore':
+        self._series.clear()
+        for columns in self.messages.values():
+            columns.trim()
+        return self
+
+    def compact(self, min_saving: float = 4.0) -> 'SignalStore':
+        """
+        Switches slowly varying signals (status flags, modes, counters) to change-only
+        storage; lookups are unaffected. See MessageColumns.compact().
+        """
+        self._series.clear()
+        for columns in self.messages.values():
+            columns.compact(min_saving)
+        return self
+
+    def _add(self, columns: MessageColumns):
+        self.messages[(columns.order, columns.sa)] = columns
+        for k, name in enumerate(columns.names):
+            self._by_name.setdefault((name, columns.sa), []).append((columns, k))
+
+    @property
+    def source_addresses(self) -> List[int]:
+        """
+        J1939 source addresses that have decoded frames, ascending.
+        """
+        return sorted({c.sa for c in self.messages.values() if c.sa is not None and c.size})
+
+    def names(self, sa: Optional[int] = None) -> List[str]:
+        """
+        Names of the signals with samples at the source address (None for CAN signals).
+        """
+        return [name for (name, address), entries in self._by_name.items()
+                if address == sa and any(c.size for c, _ in entries)]
+
+    def get(self, name: str, sa: Optional[int] = None) -> Optional[pd.Series]:
+        """
+        Returns the samples of a signal as a Series indexed by timestamp, or None.
+        """
+        key = (name, sa)
+        series = self._series.get(key)
+        if series is not None:
+            return series
+
+        entries = [(c, k) for c, k in self._by_name.get(key, ()) if c.size]
+        if not entries:
+            return None
+        if sa is None:
+            # A CAN signal name used by several mappings: the last mapping wins
+            columns, k = max(entries, key=lambda entry: entry[0].order)
+            series = pd.Series(columns.physical(k), index=columns.index(), name=name, copy=False)
+        elif len(entries) == 1:
+            columns, k = entries[0]
+            series = pd.Series(columns.physical(k), index=columns.index(), name=name, copy=False)
+        else:
+            # The same name in several PGNs of one source address: samples interleave in time
+            timestamps = np.concatenate([c.timestamps[:c.size] for c, _ in entries])
+            values = np.concatenate([c.physical(k) for c, k in entries])
+            order = np.argsort(timestamps, kind='stable')
+            series = pd.Series(values[order], index=timestamps[order], name=name)
+        self._series[key] = series
+        return series
+
+    def changes(self, name: str, sa: Optional[int] = None) -> Optional[pd.Series]:
+        """
+        Like get(), but only the first sample and the samples where the value changes.
+        Read straight from change-only storage, without expanding it.
+        """
+        entries = [(c, k) for c, k in self._by_name.get((name, sa), ()) if c.size]
+        if not entries:
+            return None
+        if sa is None or len(entries) == 1:
+            columns, k = max(entries, key=lambda entry: entry[0].order)
+            timestamps, values = columns.changes(k)
+            return pd.Series(values, index=timestamps, name=name)
+        # Interleaved PGNs: changes of the merged signal
+        series = self.get(name, sa)
+        values = series.to_numpy()
+        keep = np.concatenate(([True], values[1:] != values[:-1])) if len(values) else np.empty(0, dtype=bool)
+        return series[keep]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the decoded columns, without the Series built from them.
+        """
+        return sum(columns.nbytes for columns in self.messages.values())
+
+    def view(self, sa: Optional[int] = None) -> 'SignalView':
+        return SignalView(self, sa)
+
+    def groups(self) -> List[Tuple[str, 'SignalView']]:
+        """
+        Result groups with their file name suffix: one per J1939 source address
+        ('_SA<n>'), or a single unsuffixed group for CAN.
+        """
+        addresses = self.source_addresses
+        if not addresses:
+            return [("", self.view())]
+        return [(f"_SA{sa}", self.view(sa)) for sa in addresses]
+
+    def to_dict(self) -> Dict[str, pd.Series]:
+        """
+        The results as 'SignalName' (CAN) or 'SignalName#SA' (J1939) -> Series.
+        Scales and caches every signal; only for callers that really need them all.
+        """
+        results = {}
+        for name, sa in self._by_name:
+            series = self.get(name, sa)
+            if series is not None:
+                results[name if sa is None else f"{name}#{sa}"] = series
+        return results
+
+    def __len__(self) -> int:
+        # Number of signals with samples, counted without building their Series
+        return sum(1 for entries in self._by_name.values() if any(c.size for c, _ in entries))
+
+
+class SignalView:
+    """
+    Read-only name -> Series mapping over the signals of one source address.
+    CAN signals (without an address) are visible in every view.
+    """
+    def __init__(self, store: SignalStore, sa: Optional[int] = None):
+        self.store = store
+        self.sa = sa
+
+    def get(self, name: str, default=None) -> Optional[pd.Series]:
+        series = self.store.get(name, self.sa)
+        if series is None and self.sa is not None:
+            series = self.store.get(name)
+        return default if series is None else series
+
+    def changes(self, name: str) -> Optional[pd.Series]:
+        series = self.store.changes(name, self.sa)
+        if series is None and self.sa is not None:
+            series = self.store.changes(name)
+        return series
+
+    def __getitem__(self, name: str) -> pd.Series:
+        series = self.get(name)
+        if series is None:
+            raise KeyError(name)
+        return series
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def keys(self) -> List[str]:
+        names = self.store.names(self.sa)
+        if self.sa is not None:
+            names += [name for name in self.store.names() if name not in names]
+        return names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+
+
+class TimeAligner:
+    """
+    Puts signals with unrelated timestamps onto one row timeline.
+    Every signal is sorted once and sampled with searchsorted at the output
+    timestamps (merge_asof semantics), so memory scales with the output rows,
+    and repeated timestamps are handled like any other sample.
+
+    Modes:
+      'union'     - union of all timestamps, last known value of every signal (forward fill)
+      'resample'  - fixed rate timeline, last known value of every signal
+      'reference' - timestamps of the reference signal, last known value of the others
+      'nearest'   - timestamps of the reference signal, closest sample of the others
+    """
+    MODES = ('union', 'resample', 'reference', 'nearest')
+
+    @staticmethod
+    def align(series_list: List[pd.Series], mode: str = 'union', rate: float = 10.0,
+              reference: int = 0, tolerance: Optional[float] = None,
+              origin: Optional[float] = None) -> pd.DataFrame:
+        """
+        Returns a DataFrame with a 'Timestamp' column and one column per series,
+        named after the series. Samples further than `tolerance` seconds from the
+        output timestamp are left empty; None means no limit.
+        origin anchors the 'resample' grid (default: the first sample), so a window
+        of the signals (see window()) gets the same grid points as the whole signals.
+        """
+        if mode not in TimeAligner.MODES:
+            raise ValueError(f"Unknown alignment mode: {mode}")
+
+        signals = [TimeAligner._sorted_samples(s) for s in series_list]
+        numeric = all(np.issubdtype(ts.dtype, np.number) for ts, _ in signals)
+        if not numeric and mode in ('resample', 'nearest'):
+            raise ValueError(f"Alignment mode '{mode}' needs numeric timestamps")
+        if not numeric and tolerance is not None:
+            raise ValueError("An alignment tolerance needs numeric timestamps")
+
+        direction = 'nearest' if mode == 'nearest' else 'backward'
+        if mode == 'union':
+            timeline = np.unique(np.concatenate([ts for ts, _ in signals]))
+        elif mode == 'resample':
+            timeline = TimeAligner._fixed_rate(signals, rate, origin)
+        else:
+            if not 0 <= reference < len(series_list):
+                raise ValueError(f"Reference signal index out of range: {reference}")
+            # Every sample of the reference is a row, repeated timestamps included
+            timeline = series_list[reference].index.to_numpy()
+            if not TimeAligner._is_sorted(timeline):
+                timeline = timeline[np.argsort(timeline, kind='stable')]
+
+        columns = []
+        for i, (timestamps, values) in enumerate(signals):
+            if mode in ('reference', 'nearest') and i == reference:
+                # The reference keeps its own samples row for row
+                s = series_list[i]
+                order = np.argsort(s.index.to_numpy(), kind='stable')
+                columns.append(s.to_numpy()[order])
+            else:
+                columns.append(TimeAligner.sample(timestamps, values, timeline, direction, tolerance))
+
+        df = pd.DataFrame({'Timestamp': timeline, **{i: column for i, column in enumerate(columns)}})
+        df.columns = ['Timestamp'] + [s.name for s in series_list]
+        return df
+
+    @staticmethod
+    def window(series: pd.Series, since: float) -> pd.Series:
+        """
+        The samples after `since`, plus the last one at or before it, which carries
+        the value at `since` for backward and nearest sampling. Rows after `since`
+        aligned from the windows equal those aligned from the whole signals.
+        """
+        if not series.index.is_monotonic_increasing:
+            series = series.sort_index(kind='stable')
+        start = int(series.index.searchsorted(since, side='right')) - 1
+        return series.iloc[max(start, 0):]
+
+    @staticmethod
+    def changed_rows(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keeps the first row and every row where a value column (all but the
+        first, 'Timestamp') differs from the row before; empty equals empty.
+        """
+        if len(df) < 2:
+            return df
+        keep = np.zeros(len(df), dtype=bool)
+        keep[0] = True
+        for column in range(1, df.shape[1]):
+            values = df.iloc[:, column].to_numpy()
+            differs = values[1:] != values[:-1]
+            if np.issubdtype(values.dtype, np.floating):
+                differs &= ~(np.isnan(values[1:]) & np.isnan(values[:-1]))
+            keep[1:] |= differs
+        return df[keep]
+
+    @staticmethod
+    def sample(timestamps: np.ndarray, values: np.ndarray, at: np.ndarray, direction: str = 'backward',
+               tolerance: Optional[float] = None) -> np.ndarray:
+        """
+        Samples a signal at the timestamps `at`. timestamps must be ascending.
+        'backward' takes the last sample at or before each timestamp (the last one
+        of repeated timestamps), 'nearest' the closest one, preferring the earlier on ties.
+        'interpolate' interpolates linearly between the samples around each timestamp.
+        Timestamps without a sample (within tolerance) get NaN.
+        """
+        out = np.full(len(at), np.nan)
+        if len(timestamps) == 0 or len(at) == 0:
+            return out
+
+        after = np.searchsorted(timestamps, at, side='right')
+        pos = after - 1
+        if direction == 'nearest':
+            # Candidates: last sample at or before, first sample after
+            before_ok = pos >= 0
+            after_ok = after < len(timestamps)
+            dist_before = np.where(before_ok, at - timestamps[np.maximum(pos, 0)], np.inf)
+            dist_after = np.where(after_ok, timestamps[np.minimum(after, len(timestamps) - 1)] - at, np.inf)
+            pos = np.where(dist_after < dist_before, after, pos)
+            valid = before_ok | after_ok
+            distance = np.minimum(dist_before, dist_after)
+        elif direction == 'interpolate':
+            # Only between the first and last sample, never extrapolated
+            inside = (at >= timestamps[0]) & (at <= timestamps[-1])
+            if tolerance is not None:
+                # Both neighbours must be close enough
+                before = timestamps[np.clip(pos, 0, len(timestamps) - 1)]
+                following = timestamps[np.minimum(after, len(timestamps) - 1)]
+                inside &= (at - before <= tolerance) & ((following - at <= tolerance) | (before == at))
+            out[inside] = np.interp(at[inside], timestamps, values.astype(np.float64))
+            return out
+        elif direction == 'backward':
+            valid = pos >= 0
+            distance = None
+            if tolerance is not None:
+                distance = at - timestamps[np.maximum(pos, 0)]
+        else:
+            raise ValueError(f"Unknown sampling direction: {direction}")
+
+        if tolerance is not None:
+            valid &= distance <= tolerance
+        out[valid] = values[pos[valid]]
+        return out
+
+    @staticmethod
+    def pair(x: pd.Series, y: pd.Series, method: str = 'nearest',
+             tolerance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs every sample of y with the x signal at the same time, for signal-vs-signal plots.
+        method is 'nearest', 'backward' (last x at or before) or 'interpolate'.
+        Returns (x values, y values) of the samples that found a partner, sorted by x.
+        """
+        x_timestamps, x_values = TimeAligner._sorted_samples(x)
+        y_timestamps, y_values = TimeAligner._sorted_samples(y)
+        paired = TimeAligner.sample(x_timestamps, x_values, y_timestamps, method, tolerance)
+        keep = ~np.isnan(paired)
+        paired, y_values = paired[keep], y_values[keep]
+        order = np.argsort(paired, kind='stable')
+        return paired[order], y_values[order]
+
+    @staticmethod
+    def _sorted_samples(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        # Ascending timestamps without empty samples, so a lookup lands on the last valid value
+        timestamps = series.index.to_numpy()
+        values = series.to_numpy()
+        if np.issubdtype(values.dtype, np.floating):
+            keep = ~np.isnan(values)
+            if not keep.all():
+                timestamps, values = timestamps[keep], values[keep]
+        if not TimeAligner._is_sorted(timestamps):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+        return timestamps, values
+
+    @staticmethod
+    def _is_sorted(timestamps: np.ndarray) -> bool:
+        if len(timestamps) < 2:
+            return True
+        return bool(np.all(timestamps[1:] >= timestamps[:-1]))
+
+    @staticmethod
+    def _fixed_rate(signals: List[Tuple[np.ndarray, np.ndarray]], rate: float,
+                    origin: Optional[float] = None) -> np.ndarray:
+        if not rate > 0:
+            raise ValueError(f"Resample rate must be positive: {rate}")
+        firsts = [ts[0] for ts, _ in signals if len(ts)]
+        lasts = [ts[-1] for ts, _ in signals if len(ts)]
+        if not firsts:
+            return np.empty(0)
+        start, stop = float(min(firsts)), float(max(lasts))
+        first = 0
+        if origin is not None:
+            # Grid points of the origin's grid from the first sample on
+            first = max(0, int(np.ceil((start - origin) * rate - 1e-9)))
+            start = float(origin)
+        # Small epsilon so a last sample exactly on the grid is not lost to rounding
+        count = int(np.floor((stop - start) * rate + 1e-9)) + 1
+        return start + np.arange(first, count) / rate
@@ -0,0 +1,260 @@
+import re
+import numpy as np
+from dataclasses import dataclass
+from typing import Generator, Iterator, Optional, Tuple
+from ..utils.hex_parser import parse_hex_matrix, parse_decimal_matrix
+from ..utils.id_parser import parse_id_digits, MAX_STANDARD_ID
+from .frame_batch import FrameBatch
+
+# Payload bytes after the DLC: two hex digits per token, each after a blank
+_DATA = rb'((?:[ \t]+[0-9A-Fa-f]{2}(?![0-9A-Za-z]))*)'
+# Payload that ends the line: a plain character class is much faster to match,
+# parse_hex_matrix checks the byte layout afterwards
+_DATA_TO_LINE_END = rb'([ \t0-9A-Fa-f]*)\r?$'
+_LINE_END = rb'[ \t]*\r?$'
+# Patterns start at the line break before a line instead of '^': a literal first
+# character lets the regex engine skip to the next line quickly
+_LINE_START = rb'\n[ \t]*'
+
+# ASC payload bytes in decimal ("base dec" files), up to three digits each
+_DEC_DATA = rb'((?:[ \t]+\d{1,3}(?![0-9A-Za-z]))*)'
+# Message flags after the data of classic ASC frames: "Length = ... BitCount = ... ID = ..."
+_ASC_MESSAGE_FLAGS = rb'(?:[ \t]+(?:Length|BitCount|ID)[ \t]*=[^\r\n]*)?'
+# Rest of a frame line that is not laid out as expected: the line is counted as malformed
+_MALFORMED = rb'|([^\r\n]*))'
+
+
+def _asc_frame(dlc: bytes, data: bytes) -> re.Pattern:
+    """
+    Vector ASC: "<time> <channel> <id>[x] Rx|Tx d <dlc> <data> [Length = ... BitCount = ...]"
+    and CAN FD "<time> CANFD <channel> Rx|Tx <id>[x] [<name>] <brs> <esi> <dlc> <data length> <data> <numbers>".
+    dlc and data match the tokens in the base of the file. Lines are matched up to
+    their end; a frame line whose rest does not fit fills the malformed group instead.
+    """
+    return re.compile(
+        _LINE_START + rb'(\d+\.\d+)[ \t]+(?:'
+        rb'\d+[ \t]+([0-9A-Fa-f]+)(x?)[ \t]+(?:Rx|Tx)[ \t]+d[ \t]+(' + dlc + rb')'
+        rb'(?:' + data + _ASC_MESSAGE_FLAGS + _LINE_END + _MALFORMED +
+        rb'|CANFD[ \t]+\d+[ \t]+(?:Rx|Tx)[ \t]+([0-9A-Fa-f]+)(x?)(?:[ \t]+[A-Za-z_]\w*)?'
+        rb'[ \t]+[01][ \t]+[01][ \t]+' + dlc + rb'[ \t]+(\d+)'
+        rb'(?:' + data + rb'(?:[ \t]+[0-9A-Fa-f]+)*' + _LINE_END + _MALFORMED + rb')',
+        re.MULTILINE)
+
+
+_ASC_FRAME_HEX = _asc_frame(rb'[0-9A-Fa-f]', _DATA)
+_ASC_FRAME_DEC = _asc_frame(rb'\d{1,2}', _DEC_DATA)
+# 'dlc' is the DLC of classic frames, 'length' the data length of CAN FD frames
+_ASC_FIELDS = ('time', 'id', 'ext', 'dlc', 'data', 'malformed', 'id', 'ext', 'length', 'data', 'malformed')
+_ASC_SETTINGS = re.compile(rb'^[ \t]*base[ \t]+(hex|dec)[ \t]+timestamps[ \t]+(absolute|relative)', re.MULTILINE)
+
+# SocketCAN candump -l: "(<epoch seconds>) <interface> <id>#<data>", CAN FD "<id>##<flags><data>"
+_CANDUMP_FRAME = re.compile(
+    _LINE_START + rb'\((\d+\.\d+)\)[ \t]+\S+[ \t]+([0-9A-Fa-f]+)#(?:#[0-9A-Fa-f])?([0-9A-Fa-f]*)(?:[ \t]+[RT])?' + _LINE_END,
+    re.MULTILINE)
+_CANDUMP_FIELDS = ('time', 'id', 'data')
+
+# PEAK TRC: the columns of every file version, by the letters of the 2.x ;$COLUMNS header
+_TRC_COLUMNS = {
+    '1.0': 'N,O,I,L,D',
+    '1.1': 'N,O,T,I,L,D',
+    '1.2': 'N,O,B,d,I,L,D',
+    '1.3': 'N,O,B,d,I,R,L,D',
+    '2.0': 'N,O,T,I,d,l,D',
+    '2.1': 'N,O,T,B,I,d,R,L,D'
+}
+_TRC_COLUMN_PATTERNS = {
+    'N': (rb'\d+\)?', None),
+    'O': (rb'(\d+(?:\.\d+)?)', 'time'),
+    # Data frames only: remote, error, status and event lines do not match
+    'T': (rb'(?:Rx|Tx|DT|FD|FB|FE|BI)', None),
+    'B': (rb'\d+', None),
+    'I': (rb'([0-9A-Fa-f]+)', 'id'),
+    'd': (rb'(?:Rx|Tx)', None),
+    'R': (rb'-', None),
+    'L': (rb'\d+', None),
+    'l': (rb'\d+', None)
+}
+_TRC_VERSION = re.compile(rb'^;\$FILEVERSION=(\d+\.\d+)', re.MULTILINE)
+_TRC_COLUMNS_HEADER = re.compile(rb'^;\$COLUMNS=([A-Za-z,]+)', re.MULTILINE)
+
+
+@dataclass
+class _TraceLayout:
+    # Pattern matching one data frame line, and the field of each of its groups
+    pattern: re.Pattern
+    fields: tuple
+    id_base: int = 16
+    # File time units per second; dividing keeps e.g. 13 ms at exactly 0.013 s
+    time_units: float = 1.0
+    # Timestamps relative to the previous frame (ASC "timestamps relative"); lines
+    # that are not data frames, e.g. error frames, are not counted
+    relative: bool = False
+    # Base of the payload bytes, 10 for ASC "base dec"
+    data_base: int = 16
+
+
+class TraceReader:
+    """
+    Streaming readers for the text logs of CAN tools, without an intermediate DataFrame:
+      'asc' - Vector ASCII logging files (CANalyzer / CANoe), classic and CAN FD frames
+      'log' - SocketCAN candump -l files
+      'trc' - PEAK trace files (PCAN-View, PCAN-Explorer), file versions 1.0 to 2.1
+
+    The file is read in blocks of BLOCK_BYTES ending on a line break. One compiled
+    pattern finds every data frame line of a block at once (headers, comments, error,
+    status and remote frame lines do not match), and the captured tokens are converted
+    column by column: timestamps with one astype, ids with parse_id_digits and payloads
+    with parse_hex_matrix (parse_decimal_matrix for ASC "base dec"), so no Python work
+    is done per frame. ASC frame lines that do not fit the layout up to their end, or
+    carry fewer payload bytes than their DLC / data length, are skipped and counted in
+    malformed_id_count.
+    Timestamps are in seconds; TRC time offsets are in milliseconds and converted.
+    """
+    FILE_TYPES = ('asc', 'log', 'trc')
+    BLOCK_BYTES = 16 << 20
+    # Bytes searched for the format settings at the start of the file
+    HEADER_BYTES = 64 << 10
+
+    @staticmethod
+    def iter_batches(file_path: str, file_type: str,
+                     chunk_rows: Optional[int] = None) -> Generator[FrameBatch, None, None]:
+        """
+        Yields the frames of a trace file as FrameBatches of at most chunk_rows frames
+        (one per block when None).
+        """
+        with open(file_path, 'rb') as f:
+            header = f.read(TraceReader.HEADER_BYTES)
+        layout = TraceReader._layout(file_type, header)
+
+        # Time at the end of the previous block, for relative timestamps
+        time_offset = 0.0
+        for block in TraceReader._blocks(file_path, TraceReader.BLOCK_BYTES):
+            batch, time_offset = TraceReader._parse_block(block, layout, time_offset)
+            if batch is None:
+                continue
+            if batch.malformed_id_count:
+                print(f"Skipped {batch.malformed_id_count} malformed frame lines in {file_path}")
+            if chunk_rows is None or len(batch) <= chunk_rows:
+                yield batch
+                continue
+            for start in range(0, len(batch), chunk_rows):
+                chunk = batch.slice(start, start + chunk_rows)
+                if start == 0:
+                    chunk.malformed_id_count = batch.malformed_id_count
+                yield chunk
+
+    @staticmethod
+    def _layout(file_type: str, header: bytes) -> _TraceLayout:
+        if file_type == 'asc':
+            settings = _ASC_SETTINGS.search(header)
+            # "base dec" writes ids, DLCs and payload bytes in decimal
+            base = 10 if settings and settings.group(1) == b'dec' else 16
+            return _TraceLayout(_ASC_FRAME_DEC if base == 10 else _ASC_FRAME_HEX, _ASC_FIELDS,
+                                id_base=base, data_base=base,
+                                relative=bool(settings and settings.group(2) == b'relative'))
+        if file_type == 'log':
+            return _TraceLayout(_CANDUMP_FRAME, _CANDUMP_FIELDS)
+        if file_type == 'trc':
+            return TraceReader._trc_layout(header)
+        raise ValueError(f"Unsupported trace type: {file_type}")
+
+    @staticmethod
+    def _trc_layout(header: bytes) -> _TraceLayout:
+        version = _TRC_VERSION.search(header)
+        version = version.group(1).decode('ascii') if version else '1.1'
+        columns = _TRC_COLUMNS_HEADER.search(header)
+        if columns is not None:
+            letters = columns.group(1).decode('ascii').split(',')
+        elif version in _TRC_COLUMNS:
+            letters = _TRC_COLUMNS[version].split(',')
+        else:
+            raise ValueError(f"Unsupported TRC file version: {version}")
+        if not {'O', 'I'} <= set(letters) or letters[-1] != 'D':
+            raise ValueError(f"TRC columns without time and id, or not ending with the data: {','.join(letters)}")
+
+        parts, fields = [], []
+        for letter in letters[:-1]:
+            pattern, field = _TRC_COLUMN_PATTERNS.get(letter, (rb'\S+', None))
+            parts.append((rb'[ \t]+' if parts else _LINE_START) + pattern)
+            if field:
+                fields.append(field)
+        # Blanks before the data belong to the data group
+        pattern = re.compile(b''.join(parts) + _DATA_TO_LINE_END, re.MULTILINE)
+        return _TraceLayout(pattern, tuple(fields) + ('data',), time_units=1000.0)
+
+    @staticmethod
+    def _blocks(file_path: str, block_bytes: int) -> Iterator[bytes]:
+        # Blocks of whole lines; the partial last line is carried into the next block
+        with open(file_path, 'rb') as f:
+            rest = b''
+            while True:
+                data = f.read(block_bytes)
+                if not data:
+                    if rest:
+                        yield rest
+                    return
+                data = rest + data if rest else data
+                cut = data.rfind(b'\n') + 1
+                if cut == 0:
+                    rest = data
+                    continue
+                rest = data[cut:]
+                yield data[:cut]
+
+    @staticmethod
+    def _parse_block(block: bytes, layout: _TraceLayout,
+                     time_offset: float = 0.0) -> Tuple[Optional[FrameBatch], float]:
+        matches = layout.pattern.findall(b'\n' + block)
+        if not matches:
+            return None, time_offset
+        # (frames, groups) matrix of the captured tokens, zero padded bytes
+        tokens = np.array(matches, dtype='S')
+
+        def column(field: str) -> np.ndarray:
+            # First non-empty group of the field (ASC has one per frame kind)
+            groups = [i for i, name in enumerate(layout.fields) if name == field]
+            values = tokens[:, groups[0]]
+            for group in groups[1:]:
+                values = np.where(values != b'', values, tokens[:, group])
+            return values
+
+        id_tokens = column('id')
+        ids, valid = parse_id_digits(id_tokens, layout.id_base)
+        # Extended ids: "x" suffix (ASC), 8 digit ids (candump, TRC) or values above 11 bits
+        extended = (np.char.str_len(id_tokens) >= 8) | (ids > MAX_STANDARD_ID)
+        if 'ext' in layout.fields:
+            extended |= column('ext') != b''
+
+        # Payload length stated on the line: the DLC of classic ASC frames (at most
+        # 8 bytes), the data length of CAN FD frames; None for the other traces
+        expected = None
+        if 'dlc' in layout.fields:
+            dlc_tokens = column('dlc')
+            classic, _ = parse_id_digits(dlc_tokens, layout.id_base)
+            fd, _ = parse_id_digits(column('length'), 10)
+            expected = np.where(dlc_tokens != b'', np.minimum(classic, 8), fd).astype(np.int64)
+
+        timestamps = column('time').astype(np.float64)
+        if layout.time_units != 1.0:
+            timestamps /= layout.time_units
+        if layout.relative:
+            # Summed before malformed lines are dropped, their time still passes
+            timestamps = np.cumsum(timestamps) + time_offset
+            time_offset = float(timestamps[-1])
+        if layout.data_base == 10:
+            payload, dlc = parse_decimal_matrix(column('data'), expected)
+        else:
+            payload, dlc = parse_hex_matrix(column('data'))
+        if expected is not None:
+            # Fewer bytes than stated, or a line only partly laid out as a frame
+            valid &= (dlc >= expected) & (column('malformed') == b'')
+            # Numbers after the data of CAN FD lines can look like payload bytes
+            payload[np.arange(payload.shape[1]) >= expected[:, None]] = 0
+            dlc = np.minimum(dlc, expected)
+
+        malformed = int((~valid).sum())
+        if malformed:
+            timestamps, ids, extended, payload, dlc = (
+                timestamps[valid], ids[valid], extended[valid], payload[valid], dlc[valid])
+        return FrameBatch(timestamp=timestamps, message_id=ids, payload=payload, dlc=dlc,
+                          extended=extended, malformed_id_count=malformed), time_offset
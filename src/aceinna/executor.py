@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 # Set persistent configuration directory for Matplotlib to avoid rebuilding font cache every time
 if sys.platform == 'win32':
@@ -17,11 +18,15 @@ os.environ['MPLCONFIGDIR'] = mpl_config_dir
 from PySide6.QtWidgets import QApplication
 from aceinna.ui.main_window import MainWindow
 from aceinna.core.config_store import ConfigStore
+from aceinna.core.frame_cache import FrameCache
 
 def main():
     app = QApplication(sys.argv)
     
     config_store = ConfigStore()
+    FrameCache.set_enabled(config_store.frame_cache)
+    # An imported config may switch the frame cache
+    config_store.add_observer(lambda: FrameCache.set_enabled(config_store.frame_cache))
     
     window = MainWindow(config_store)
     window.show()
@@ -29,4 +34,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # Decode worker processes re-enter this module in frozen builds
+    multiprocessing.freeze_support()
     main()
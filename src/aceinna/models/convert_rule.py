@@ -24,6 +24,17 @@ class PlotRule(ConvertRule):
     legend_label: str = "legend1" # This seems weird in design "label, loc, fontsize". Usually legend labels come from data series.
     legend_loc: Union[str, int] = "best"
     legend_fontsize: int = 8
+
+    # Level of detail: reduce long series to the figure's pixel width before plotting
+    # 'none' plots every sample, 'minmax' keeps per-pixel extremes, 'lttb' keeps the visual shape
+    downsample: Literal['none', 'minmax', 'lttb'] = 'none'
+    # Renderer: 'matplotlib' for publication quality, 'raster' for fast quick-look PNGs
+    backend: Literal['matplotlib', 'raster'] = 'matplotlib'
+
+    # Pairing of Y samples with the X signal when x_axis is bound to another signal:
+    # 'nearest' X sample in time, 'backward' for the last X sample at or before, 'interpolate' between X samples
+    xy_pairing: Literal['nearest', 'backward', 'interpolate'] = 'nearest'
+    xy_tolerance: Optional[float] = None # seconds between paired samples, None for no limit
     
     type: Literal['plot'] = 'plot'
 
@@ -37,4 +48,15 @@ class DataListRule(ConvertRule):
     fields: List[DataListField] = field(default_factory=list)
     delimiter: str = ","
     include_header: bool = True
+
+    # Time alignment of the fields onto one row timeline
+    # 'union' forward fills every field onto all timestamps, 'resample' samples at a fixed rate,
+    # 'reference' samples at the reference field's timestamps, 'nearest' takes the closest sample there
+    align_mode: Literal['union', 'resample', 'reference', 'nearest'] = 'union'
+    resample_rate: float = 10.0 # Hz
+    reference: str = "" # binding of the reference field, the first field when empty
+    tolerance: Optional[float] = None # seconds between a sample and its row, None for no limit
+    # 'every_row' writes every aligned row, 'on_change' only rows where a field value changes
+    emit: Literal['every_row', 'on_change'] = 'every_row'
+
     type: Literal['data_list'] = 'data_list'
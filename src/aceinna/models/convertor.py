@@ -9,3 +9,7 @@ class Convertor:
     data_source: Optional[DataSource] = None
     convert_rules: List[ConvertRule] = field(default_factory=list)
     result_folder: str = ""
+    # Decode every mapped field, e.g. for exports; otherwise only the fields the rules bind are decoded
+    decode_all: bool = False
+    # Keep slowly varying signals as value changes only; off keeps one value per frame for every signal
+    compact_signals: bool = True
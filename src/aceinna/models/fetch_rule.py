@@ -4,7 +4,10 @@ from typing import Literal
 @dataclass
 class DataSourceFetchRule:
     name: str
-    file_type: Literal['xlsx', 'csv']
+    # Spreadsheet exports ('xlsx', 'csv'), CAN tool traces: Vector 'asc', candump 'log', PEAK 'trc',
+    # or binary bus logging files: Vector 'blf', ASAM MDF 4 'mf4'
+    file_type: Literal['xlsx', 'csv', 'asc', 'log', 'trc', 'blf', 'mf4']
+    # Column indices of spreadsheet exports, unused for traces
     message_id_col_index: int
     message_data_col_index: int
     timestamp_col_index: int
@@ -1,4 +1,4 @@
-from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit, 
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit, QCheckBox,
                                QDialogButtonBox, QLabel, QWidget, QHBoxLayout, QPushButton, QFileDialog)
 from PySide6.QtCore import Qt
 from ..models.convertor import Convertor
@@ -24,13 +24,21 @@ class ConvertorDialog(QDialog):
         self.btn_browse.clicked.connect(self.browse_folder)
         folder_layout.addWidget(self.folder_edit)
         folder_layout.addWidget(self.btn_browse)
+
+        self.decode_all = QCheckBox("Decode every mapped field (not only the fields bound in rules)")
+        self.compact_signals = QCheckBox("Store rarely changing signals as value changes only")
+        self.compact_signals.setChecked(True)
         
         if convertor:
             self.name_edit.setText(convertor.name)
             self.folder_edit.setText(convertor.result_folder)
+            self.decode_all.setChecked(convertor.decode_all)
+            self.compact_signals.setChecked(convertor.compact_signals)
             
         form.addRow("Name:", self.name_edit)
         form.addRow("Result Folder:", folder_layout)
+        form.addRow("Decoding:", self.decode_all)
+        form.addRow("", self.compact_signals)
         layout.addLayout(form)
         
         # Data Source Editor
@@ -59,7 +67,9 @@ class ConvertorDialog(QDialog):
     def get_convertor(self) -> Convertor:
         c = Convertor(
             name=self.name_edit.text(),
-            result_folder=self.folder_edit.text()
+            result_folder=self.folder_edit.text(),
+            decode_all=self.decode_all.isChecked(),
+            compact_signals=self.compact_signals.isChecked()
         )
         c.data_source = self.ds_editor.get_data_source()
         c.convert_rules = self.rules_editor.get_rules()
@@ -1,6 +1,7 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLineEdit, 
                                QCheckBox, QHBoxLayout, QListWidget, QPushButton, 
-                               QLabel, QInputDialog, QSplitter, QAbstractItemView)
+                               QLabel, QInputDialog, QSplitter, QAbstractItemView,
+                               QComboBox, QDoubleSpinBox)
 from PySide6.QtCore import Qt
 from ..models.convert_rule import DataListRule, DataListField
 from .signal_source_tree import SignalSourceTree
@@ -75,11 +76,87 @@ class DataListRuleEditor(QWidget):
             
         form.addRow("Delimiter:", self.delimiter)
         form.addRow("Header:", self.header)
+
+        # Time alignment
+        self.align_combo = QComboBox()
+        self.align_combo.addItem("Union of timestamps (forward fill)", "union")
+        self.align_combo.addItem("Resample to fixed rate", "resample")
+        self.align_combo.addItem("Reference field timestamps", "reference")
+        self.align_combo.addItem("Nearest sample to reference", "nearest")
+        self.rate = QDoubleSpinBox()
+        self.rate.setRange(0.001, 100000.0)
+        self.rate.setDecimals(3)
+        self.rate.setSuffix(" Hz")
+        self.rate.setValue(10.0)
+        # Reference: one of the field bindings, kept in sync with the field list
+        self.reference = QComboBox()
+        self.reference_note = QLabel()
+        self.reference_note.setStyleSheet("color: red")
+        self.reference_note.setVisible(False)
+        self.tolerance = QDoubleSpinBox()
+        self.tolerance.setRange(0.0, 3600.0)
+        self.tolerance.setDecimals(4)
+        self.tolerance.setSuffix(" s")
+        # 0 stands for "no limit"
+        self.tolerance.setSpecialValueText("No limit")
+
+        if rule:
+            index = self.align_combo.findData(rule.align_mode)
+            if index >= 0:
+                self.align_combo.setCurrentIndex(index)
+            self.rate.setValue(rule.resample_rate)
+            self.tolerance.setValue(rule.tolerance or 0.0)
+
+        form.addRow("Time Alignment:", self.align_combo)
+        form.addRow("Resample Rate:", self.rate)
+        form.addRow("Reference Field:", self.reference)
+        form.addRow("", self.reference_note)
+        form.addRow("Tolerance:", self.tolerance)
+
+        self.on_change = QCheckBox("Write a row only when a value changes")
+        if rule:
+            self.on_change.setChecked(rule.emit == 'on_change')
+        form.addRow("Emit:", self.on_change)
+        # The chosen binding, kept while its field is moved (taken out and inserted again)
+        self.reference_binding = rule.reference if rule else ""
+        self._update_references()
+        if rule and rule.reference and self.reference.currentData() != rule.reference:
+            self.reference_note.setText(f"Reference '{rule.reference}' is not one of the fields, "
+                                        f"the first field is used")
+            self.reference_note.setVisible(True)
+            self.reference_binding = ""
+        self.reference.currentIndexChanged.connect(self._select_reference)
+        model = self.field_list.model()
+        for changed in (model.rowsInserted, model.rowsRemoved, model.rowsMoved):
+            changed.connect(lambda *args: self._update_references())
+        self.align_combo.currentIndexChanged.connect(self._update_align_options)
+        self._update_align_options()
         main_layout.addWidget(QLabel("Options:"))
         main_layout.addLayout(form)
         
         self.setLayout(main_layout)
 
+    def _update_align_options(self):
+        mode = self.align_combo.currentData()
+        self.rate.setEnabled(mode == 'resample')
+        self.reference.setEnabled(mode in ('reference', 'nearest'))
+
+    def _update_references(self):
+        # Empty binding stands for the first field, also while the chosen one is not in the list
+        bindings = [self.field_list.item(i).text() for i in range(self.field_list.count())]
+        self.reference.blockSignals(True)
+        self.reference.clear()
+        self.reference.addItem("First field", "")
+        for binding in bindings:
+            self.reference.addItem(binding, binding)
+        index = self.reference.findData(self.reference_binding) if self.reference_binding in bindings else 0
+        self.reference.setCurrentIndex(max(index, 0))
+        self.reference.blockSignals(False)
+
+    def _select_reference(self):
+        self.reference_binding = self.reference.currentData() or ""
+        self.reference_note.setVisible(False)
+
     def move_up(self):
         row = self.field_list.currentRow()
         if row <= 0: return
@@ -98,7 +175,12 @@ class DataListRuleEditor(QWidget):
         rule = DataListRule(
             title=self.title_edit.text(),
             delimiter=self.delimiter.text(),
-            include_header=self.header.isChecked()
+            include_header=self.header.isChecked(),
+            align_mode=self.align_combo.currentData(),
+            resample_rate=self.rate.value(),
+            reference=self.reference.currentData() or "",
+            tolerance=self.tolerance.value() or None,
+            emit='on_change' if self.on_change.isChecked() else 'every_row'
         )
         fields = []
         for i in range(self.field_list.count()):
@@ -13,7 +13,8 @@ class FetchRuleDialog(QDialog):
         
         self.name_edit = QLineEdit()
         self.type_combo = QComboBox()
-        self.type_combo.addItems(['xlsx', 'csv'])
+        self.type_combo.addItems(['xlsx', 'csv', 'asc', 'log', 'trc', 'blf', 'mf4'])
+        self.type_combo.currentTextChanged.connect(self.update_columns)
         
         self.msg_id_col = QSpinBox()
         self.msg_id_col.setRange(0, 100)
@@ -36,6 +37,7 @@ class FetchRuleDialog(QDialog):
         form.addRow("Timestamp Column Index:", self.time_col)
         
         layout.addLayout(form)
+        self.update_columns(self.type_combo.currentText())
         
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(self.accept)
@@ -44,6 +46,11 @@ class FetchRuleDialog(QDialog):
         
         self.setLayout(layout)
 
+    def update_columns(self, file_type: str):
+        # Traces (asc, log, trc, blf, mf4) have a fixed layout, the column indices only apply to spreadsheets
+        for spin in (self.msg_id_col, self.msg_data_col, self.time_col):
+            spin.setEnabled(file_type in ('xlsx', 'csv'))
+
     def get_rule(self) -> DataSourceFetchRule:
         return DataSourceFetchRule(
             name=self.name_edit.text(),
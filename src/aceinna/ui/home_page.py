@@ -3,9 +3,10 @@ import subprocess
 import platform
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                                QComboBox, QPushButton, QLineEdit, QFileDialog, 
-                               QProgressBar, QMessageBox)
+                               QProgressBar, QMessageBox, QSpinBox)
 from PySide6.QtCore import Qt
 from ..core.convert_engine import ConvertWorker
+from ..core.parallel_decoder import ParallelDecoder
 
 class HomePage(QWidget):
     def __init__(self, config_store):
@@ -38,6 +39,13 @@ class HomePage(QWidget):
         
         layout.addWidget(QLabel("Source Data File:"))
         layout.addLayout(file_layout)
+
+        # Decode Workers (processes), 1 decodes without a process pool
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, ParallelDecoder.default_workers())
+        self.spin_workers.setValue(1)
+        layout.addWidget(QLabel("Decode Workers:"))
+        layout.addWidget(self.spin_workers)
         
         # 4. Buttons
         btn_layout = QHBoxLayout()
@@ -90,7 +98,7 @@ class HomePage(QWidget):
             self.combo_mapping.setCurrentIndex(index)
 
     def browse_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select Data File", "", "Data Files (*.xlsx *.csv);;All Files (*)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Data File", "", "Data Files (*.xlsx *.csv *.asc *.log *.trc *.blf *.mf4);;All Files (*)")
         if file_path:
             self.line_file_path.setText(file_path)
 
@@ -129,7 +137,7 @@ class HomePage(QWidget):
             QMessageBox.warning(self, "Error", "Please select a Source Data File.")
             return
 
-        self.process = ConvertWorker(convertor, mapping, file_path)
+        self.process = ConvertWorker(convertor, mapping, file_path, workers=self.spin_workers.value())
         self.process.progress_update.connect(self.update_progress)
         self.process.finished_signal.connect(self.on_process_finished)
         self.process.error_signal.connect(self.on_process_error)
@@ -138,6 +146,7 @@ class HomePage(QWidget):
         self.btn_cancel.setEnabled(True)
         self.combo_convertor.setEnabled(False)
         self.combo_mapping.setEnabled(False)
+        self.spin_workers.setEnabled(False)
         
         self.process.start()
 
@@ -163,3 +172,4 @@ class HomePage(QWidget):
         self.btn_cancel.setEnabled(False)
         self.combo_convertor.setEnabled(True)
         self.combo_mapping.setEnabled(True)
+        self.spin_workers.setEnabled(True)
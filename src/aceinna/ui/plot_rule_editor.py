@@ -96,6 +96,27 @@ class PlotRuleEditor(QWidget):
         if rule and rule.x_axis:
             self.x_axis_edit.setText(rule.x_axis.binding)
         x_layout.addWidget(self.x_axis_edit)
+
+        # How Y samples find their X partner when X is another signal
+        pairing_form = QFormLayout()
+        self.pairing_combo = QComboBox()
+        self.pairing_combo.addItem("Nearest X sample", "nearest")
+        self.pairing_combo.addItem("Last X sample (as of)", "backward")
+        self.pairing_combo.addItem("Interpolate X", "interpolate")
+        self.pairing_tolerance = QDoubleSpinBox()
+        self.pairing_tolerance.setRange(0.0, 3600.0)
+        self.pairing_tolerance.setDecimals(4)
+        self.pairing_tolerance.setSuffix(" s")
+        # 0 stands for "no limit"
+        self.pairing_tolerance.setSpecialValueText("No limit")
+        if rule:
+            index = self.pairing_combo.findData(rule.xy_pairing)
+            if index >= 0:
+                self.pairing_combo.setCurrentIndex(index)
+            self.pairing_tolerance.setValue(rule.xy_tolerance or 0.0)
+        pairing_form.addRow("X/Y Pairing:", self.pairing_combo)
+        pairing_form.addRow("Pairing Tolerance:", self.pairing_tolerance)
+        x_layout.addLayout(pairing_form)
         x_group.setLayout(x_layout)
         right_layout.addWidget(x_group)
         
@@ -152,6 +173,25 @@ class PlotRuleEditor(QWidget):
             self.dpi.setValue(rule.figure_dpi)
             
         style_form.addRow("Figure Config (W, H, DPI):", self._h_layout([self.fig_w, self.fig_h, self.dpi]))
+
+        self.downsample_combo = QComboBox()
+        self.downsample_combo.addItem("None (all samples)", "none")
+        self.downsample_combo.addItem("Min/Max per pixel", "minmax")
+        self.downsample_combo.addItem("LTTB", "lttb")
+        if rule:
+            index = self.downsample_combo.findData(rule.downsample)
+            if index >= 0:
+                self.downsample_combo.setCurrentIndex(index)
+        style_form.addRow("Downsampling:", self.downsample_combo)
+
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("Matplotlib (publication quality)", "matplotlib")
+        self.backend_combo.addItem("Raster (fast quick-look)", "raster")
+        if rule:
+            index = self.backend_combo.findData(rule.backend)
+            if index >= 0:
+                self.backend_combo.setCurrentIndex(index)
+        style_form.addRow("Renderer:", self.backend_combo)
         style_group.setLayout(style_form)
         main_layout.addWidget(QLabel("Styles:"))
         main_layout.addWidget(style_group)
@@ -185,7 +225,11 @@ class PlotRuleEditor(QWidget):
         rule = PlotRule(
             title=self.title_edit.text(),
             figure_figsize=(self.fig_w.value(), self.fig_h.value()),
-            figure_dpi=self.dpi.value()
+            figure_dpi=self.dpi.value(),
+            downsample=self.downsample_combo.currentData(),
+            backend=self.backend_combo.currentData(),
+            xy_pairing=self.pairing_combo.currentData(),
+            xy_tolerance=self.pairing_tolerance.value() or None
         )
         if self.x_axis_edit.text():
             rule.x_axis = AxisBinding(binding=self.x_axis_edit.text())
@@ -0,0 +1,93 @@
+import numpy as np
+from typing import Tuple
+
+# Below this many points per pixel column downsampling saves nothing
+_MIN_POINTS_PER_BUCKET = 4
+
+
+def _first_per_group(candidates: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    # candidates are ascending row indices; keep the first one of every group
+    if len(candidates) == 0:
+        return candidates
+    g = groups[candidates]
+    return candidates[np.concatenate(([True], g[1:] != g[:-1]))]
+
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keeps the first, last, minimum and maximum sample of every x bucket
+    (one bucket per horizontal pixel), in their original order.
+    A line through the kept points covers the same pixels as the full series,
+    so peaks are never lost. x must be ascending.
+    """
+    if buckets <= 0 or len(x) <= _MIN_POINTS_PER_BUCKET * buckets:
+        return x, y
+
+    span = x[-1] - x[0]
+    if not span > 0:
+        return x, y
+    bucket = np.minimum(((x - x[0]) * (buckets / span)).astype(np.int64), buckets - 1)
+
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], len(x)) - 1
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    min_rows = _first_per_group(np.flatnonzero(y == mins[group]), group)
+    max_rows = _first_per_group(np.flatnonzero(y == maxs[group]), group)
+
+    keep = np.unique(np.concatenate((starts, ends, min_rows, max_rows)))
+    return x[keep], y[keep]
+
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets: keeps `threshold` points, one per bucket,
+    picking the point that spans the largest triangle with the point kept in the
+    previous bucket and the mean of the next bucket. x must be ascending.
+    """
+    n = len(x)
+    if threshold < 3 or n <= threshold:
+        return x, y
+
+    # Bucket edges over the inner points; the first and last point are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    # Mean of each bucket, plus the last point as the "next bucket" of the final bucket
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    previous = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        px, py = x[previous], y[previous]
+        # Twice the triangle area, vectorized over the bucket
+        area = np.abs((px - mean_x[b + 1]) * (y[start:end] - py) - (px - x[start:end]) * (mean_y[b + 1] - py))
+        previous = start + int(np.argmax(area))
+        keep[b + 1] = previous
+    return x[keep], y[keep]
+
+
+def downsample(x: np.ndarray, y: np.ndarray, method: str, pixels: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces a line series to what a plot `pixels` wide can show.
+    method is 'minmax', 'lttb' or 'none'. Non-finite samples are dropped.
+    """
+    if method not in ('minmax', 'lttb') or len(x) <= pixels:
+        return x, y
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+
+    if method == 'minmax':
+        return minmax_downsample(x, y, pixels)
+    return lttb_downsample(x, y, pixels)
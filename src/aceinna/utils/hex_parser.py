@@ -1,3 +1,12 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 def parse_hex_string(hex_str: str) -> bytes:
     if not isinstance(hex_str, str):
         return b''
@@ -14,3 +23,235 @@ def parse_hex_string(hex_str: str) -> bytes:
         return bytes.fromhex(cleaned)
     except ValueError:
         return b''
+
+
+# Character classes used by the bulk parser. Nibble values 0..15 are hex digits.
+_SPACE = 16   # whitespace, or zero padding of the fixed-width string matrix
+_X = 17       # "x" / "X" of the "x|" prefix
+_BAR = 18     # "|" of the "x|" prefix
+_INVALID = 0xFF
+
+_CLASSES = np.full(256, _INVALID, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789abcdef'):
+    _CLASSES[_c] = _i
+for _i, _c in enumerate(b'ABCDEF'):
+    _CLASSES[_c] = 10 + _i
+_CLASSES[list(b'\x00 \t\r\n\v\f')] = _SPACE
+_CLASSES[list(b'xX')] = _X
+_CLASSES[ord('|')] = _BAR
+
+# Layout kind of each character: all hex digits share kind 0, other classes keep their value
+_KINDS = np.where(_CLASSES < 16, 0, _CLASSES).astype(np.uint8)
+
+# Rows are matched against at most this many distinct layouts before the
+# remaining rows go through the generic per-character path
+_MAX_LAYOUTS = 32
+
+
+def _arrow_char_matrix(values) -> Tuple[np.ndarray, Callable[[np.ndarray], List[str]]]:
+    """
+    Builds the (N, L) uint8 character matrix straight from the Arrow string buffers.
+    """
+    if isinstance(values, pd.Series) and not (pd.api.types.is_string_dtype(values.dtype)
+                                               and not pd.api.types.is_object_dtype(values.dtype)):
+        values = values.astype(str)
+    arr = pa.array(values, from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    if not pa.types.is_string(arr.type) and not pa.types.is_large_string(arr.type):
+        arr = arr.cast(pa.string())
+    arr = arr.cast(pa.large_string()).fill_null('')
+
+    rows = len(arr)
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset:arr.offset + rows + 1]
+    data_buffer = arr.buffers()[2]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+    lengths = np.diff(offsets)
+    width = int(lengths.max()) if rows else 0
+
+    if rows and (lengths == width).all():
+        # Well-formed exports: every row has the same length, a plain reshape
+        chars = data[offsets[0]:offsets[-1]].reshape(rows, width)
+    else:
+        chars = np.zeros((rows, width), dtype=np.uint8)
+        for length in np.unique(lengths):
+            if length == 0:
+                continue
+            selected = np.flatnonzero(lengths == length)
+            chars[selected, :length] = data[offsets[selected][:, None] + np.arange(length)]
+
+    return chars, lambda selected: arr.take(pa.array(selected)).to_pylist()
+
+
+def _numpy_char_matrix(values) -> Tuple[np.ndarray, Callable[[np.ndarray], List[str]]]:
+    """
+    Builds the (N, L) uint8 character matrix from a fixed-width unicode array.
+    """
+    if isinstance(values, pd.Series):
+        strings = values.to_numpy(dtype=str)
+    else:
+        strings = np.asarray(values).astype(str)
+
+    if strings.dtype.itemsize == 0 or len(strings) == 0:
+        chars = np.zeros((len(strings), 0), dtype=np.uint8)
+    else:
+        codes = strings.view(np.uint32).reshape(len(strings), -1)
+        # Any code point above 255 lands on the last entry, which is never a valid character
+        chars = np.minimum(codes, 255).astype(np.uint8)
+
+    return chars, lambda selected: strings[selected].tolist()
+
+
+def char_matrix(values) -> Tuple[np.ndarray, Callable[[np.ndarray], List[str]]]:
+    """
+    Converts a text column to an (N, L) uint8 matrix of character codes, zero padded
+    on the right. Also returns a function giving the original strings of selected rows.
+    Characters outside Latin-1 map to 255.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'S':
+        # Fixed-width bytes (e.g. tokens of text traces) already are a zero padded matrix
+        values = np.ascontiguousarray(values)
+        chars = values.view(np.uint8).reshape(len(values), values.dtype.itemsize)
+        return chars, lambda selected: [v.decode('latin-1') for v in values[selected]]
+    if pa is not None:
+        return _arrow_char_matrix(values)
+    return _numpy_char_matrix(values)
+
+
+def _layout_columns(template: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Validates one row layout and returns the columns of the high and low nibbles,
+    or None when rows with this layout are not valid hex payloads.
+    """
+    if (template == _INVALID).any():
+        return None
+
+    content = np.flatnonzero(template != _SPACE)
+    if len(content) >= 2 and template[content[0]] == _X and template[content[0] + 1] == _BAR:
+        content = content[2:]
+    if len(content) and (template[content] > 15).any():
+        return None
+    if len(content) % 2:
+        return None
+    return content[0::2], content[1::2]
+
+
+def _parse_hex_rows(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generic fallback that parses rows with arbitrary layouts one after another.
+    """
+    payloads = [parse_hex_string(x) for x in strings]
+    dlc = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+    width = int(dlc.max()) if len(payloads) else 0
+    buffer = b''.join(p.ljust(width, b'\x00') for p in payloads)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(len(payloads), width).copy(), dlc
+
+
+def parse_hex_matrix(values, pad_to: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bulk version of parse_hex_string for a whole data column.
+    Accepts the same "x| 0A 1B ..." / "0A1B..." formats and returns a zero padded
+    (N, W) uint8 payload matrix plus the DLC (payload length) of each row.
+    W is the longest payload rounded up to a multiple of `pad_to` (at least `pad_to`),
+    so rows can be viewed as uint64 words. Rows that are not valid hex get a DLC of 0.
+
+    Rows are converted to a fixed-width character matrix once (straight from the
+    Arrow string buffers when pyarrow is installed), and rows sharing the same
+    layout (position of digits, spaces and prefix) are decoded together by gathering
+    the digit columns, so no per-row Python work is done for well-formed exports.
+    """
+    chars, row_strings = char_matrix(values)
+    rows = len(chars)
+
+    classes = _CLASSES[chars]
+    kinds = _KINDS[chars]
+    matrix = np.zeros((rows, 0), dtype=np.uint8)
+    dlc = np.zeros(rows, dtype=np.int64)
+
+    def place(target_rows, payload):
+        nonlocal matrix
+        if payload.shape[1] > matrix.shape[1]:
+            width = max(pad_to, -(-payload.shape[1] // pad_to) * pad_to) if pad_to else payload.shape[1]
+            grown = np.zeros((rows, width), dtype=np.uint8)
+            grown[:, :matrix.shape[1]] = matrix
+            matrix = grown
+        matrix[target_rows, :payload.shape[1]] = payload
+        dlc[target_rows] = payload.shape[1]
+
+    remaining = np.arange(rows)
+    layouts = 0
+    while len(remaining) and layouts < _MAX_LAYOUTS:
+        layouts += 1
+        template = classes[remaining[0]]
+        candidates = kinds if len(remaining) == rows else kinds[remaining]
+        same = (candidates == kinds[remaining[0]]).all(axis=1)
+        matched = remaining[same]
+        remaining = remaining[~same]
+
+        columns = _layout_columns(template)
+        if columns is None:
+            continue
+        high, low = columns
+        nibbles = classes if len(matched) == rows else classes[matched]
+        place(matched, (nibbles[:, high] << 4) | nibbles[:, low])
+
+    if len(remaining):
+        payload, lengths = _parse_hex_rows(row_strings(remaining))
+        for length in np.unique(lengths):
+            if length == 0:
+                continue
+            subset = lengths == length
+            place(remaining[subset], payload[subset, :length])
+
+    if matrix.shape[1] < pad_to:
+        padded = np.zeros((rows, pad_to), dtype=np.uint8)
+        padded[:, :matrix.shape[1]] = matrix
+        matrix = padded
+    return matrix, dlc
+
+
+def parse_decimal_matrix(values, lengths: Optional[np.ndarray] = None,
+                         pad_to: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bulk parser for payloads written as blank separated decimal byte values
+    ("1 2 170"), e.g. the data of Vector ASC traces with "base dec".
+    Returns the same (N, W) payload matrix and DLC as parse_hex_matrix.
+    With lengths, only the first lengths[i] values of row i are payload (text traces
+    can have more numbers after the data). Rows with other characters or values
+    above 255 in the payload get a DLC of 0.
+    """
+    chars, _ = char_matrix(values)
+    rows = len(chars)
+    digit = (chars >= ord('0')) & (chars <= ord('9'))
+    previous = np.zeros_like(digit)
+    previous[:, 1:] = digit[:, :-1]
+    starts = digit & ~previous
+
+    # Every digit in row order, with the token it belongs to
+    digit_rows, digit_cols = np.nonzero(digit)
+    is_start = starts[digit_rows, digit_cols]
+    token = np.cumsum(is_start) - 1
+    token_rows = digit_rows[is_start]
+    token_cols = digit_cols[is_start]
+    token_len = np.bincount(token, minlength=len(token_rows))
+    # Place value of every digit inside its token
+    power = token_cols[token] + token_len[token] - 1 - digit_cols
+    digit_values = (chars[digit_rows, digit_cols] - ord('0')).astype(np.float64)
+    token_values = np.bincount(token, weights=digit_values * 10.0 ** np.minimum(power, 18),
+                               minlength=len(token_rows))
+
+    counts = np.bincount(token_rows, minlength=rows)
+    token_index = np.arange(len(token_rows)) - (np.cumsum(counts) - counts)[token_rows]
+    dlc = counts if lengths is None else np.minimum(counts, lengths)
+    in_payload = token_index < dlc[token_rows]
+
+    valid = ~((~digit & (_CLASSES[chars] != _SPACE)).any(axis=1))
+    bad_tokens = in_payload & ((token_values > 255) | (token_len > 3))
+    valid &= np.bincount(token_rows[bad_tokens], minlength=rows) == 0
+    dlc = np.where(valid, dlc, 0).astype(np.int64)
+
+    width = max(pad_to, -(-int(dlc.max(initial=0)) // pad_to) * pad_to)
+    matrix = np.zeros((rows, width), dtype=np.uint8)
+    placed = in_payload & valid[token_rows]
+    matrix[token_rows[placed], token_index[placed]] = token_values[placed]
+    return matrix, dlc
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from .hex_parser import char_matrix
+
+# SocketCAN style flag marking an extended (29 bit) identifier
+CAN_EFF_FLAG = 0x80000000
+MAX_STANDARD_ID = 0x7FF
+
+# Longest digit string accepted: 10 decimal digits / 8 hex digits fit in uint32
+_MAX_DIGITS = 10
+
+
+# Digit value of every character code (either case), 0xFF for non hex digits
+_DIGIT_VALUES = np.full(256, 0xFF, dtype=np.uint8)
+_DIGIT_VALUES[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+_DIGIT_VALUES[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+_DIGIT_VALUES[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+# Padding and whitespace around the id
+_BLANK = np.zeros(256, dtype=bool)
+_BLANK[np.frombuffer(b'\x00 \t\r\n', dtype=np.uint8)] = True
+
+
+class _IdNotation:
+    """
+    Per-row layout of a text id column, worked out on the character matrix:
+    the digit span without blanks, "0x" prefix and "x"/"h" suffix.
+    """
+    def __init__(self, series: pd.Series):
+        chars, _ = char_matrix(series)
+        rows, width = chars.shape
+        lowered = np.where((chars >= ord('A')) & (chars <= ord('Z')), chars | np.uint8(0x20), chars)
+        self.digits = _DIGIT_VALUES[chars]
+
+        filled = ~_BLANK[chars]
+        has_content = filled.any(axis=1) if width else np.zeros(rows, dtype=bool)
+        first = filled.argmax(axis=1) if width else np.zeros(rows, dtype=np.int64)
+        last = width - 1 - filled[:, ::-1].argmax(axis=1) if width else np.zeros(rows, dtype=np.int64)
+
+        row_index = np.arange(rows)
+        if width:
+            first_char = lowered[row_index, first]
+            second_char = lowered[row_index, np.minimum(first + 1, width - 1)]
+            last_char = lowered[row_index, last]
+        else:
+            first_char = second_char = last_char = np.zeros(rows, dtype=np.uint8)
+
+        prefixed = has_content & (first_char == ord('0')) & (second_char == ord('x')) & (last > first)
+        self.suffix_extended = has_content & ~prefixed & (last_char == ord('x'))
+        suffix_hex = has_content & ~prefixed & (last_char == ord('h'))
+        self.explicit_hex = prefixed | self.suffix_extended | suffix_hex
+
+        # Digit span [start, end) of every row
+        self.start = first + 2 * prefixed
+        self.end = np.where(has_content, last + 1 - (self.suffix_extended | suffix_hex), self.start)
+        columns = np.arange(width)
+        self.in_span = (columns >= self.start[:, None]) & (columns < self.end[:, None])
+
+        span_length = self.end - self.start
+        self.sized = (span_length > 0) & (span_length <= _MAX_DIGITS)
+        self.only_hex = (span_length > 0) & ~(self.in_span & (self.digits > 15)).any(axis=1)
+        self.has_letters = (self.in_span & (self.digits > 9)).any(axis=1)
+        self.hex_digits = self.sized & self.only_hex
+        self.decimal_digits = self.hex_digits & ~self.has_letters
+
+    def hex_column(self) -> bool:
+        # Bare rows follow the notation of the rest of the column
+        bare = ~self.explicit_hex
+        return bool(self.explicit_hex.any()) or bool((bare & self.only_hex & self.has_letters).any())
+
+    def values(self, base: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the value of every row in the given base, and a mask of rows that only
+        contained valid digits.
+        """
+        valid = self.decimal_digits.copy() if base == 10 else self.hex_digits.copy()
+        rows, width = self.digits.shape
+        values = np.zeros(rows, dtype=np.uint64)
+        # Accumulate left to right, one character column at a time
+        for column in range(width):
+            step = self.in_span[:, column] & valid
+            if step.any():
+                values[step] = values[step] * np.uint64(base) + self.digits[step, column].astype(np.uint64)
+        return values, valid
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def detect_hex_notation(values) -> Optional[bool]:
+    """
+    Returns True when a text id column is written in hex, False for decimal,
+    and None for numeric columns. Used to keep one notation across the chunks of a file.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if _is_numeric(series):
+        return None
+    return _IdNotation(series).hex_column()
+
+
+def parse_id_column(values, hex_notation: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parses a whole message id column in one vectorized pass.
+    The format is detected once for the column:
+    - numeric columns are used as they are
+    - "0x18F02A80" is hex, "18F02A80x" is hex with the extended-frame suffix,
+      "18F02A80h" is hex
+    - bare values are hex when any row of the column is written in hex
+      (prefix, suffix or a-f digits), and decimal otherwise.
+      Pass hex_notation to force the notation of bare values instead.
+    Returns (ids as uint32, extended-frame flags, valid-row mask).
+    Invalid rows are left as 0 and should be dropped by the caller.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if _is_numeric(series):
+        numbers = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = np.isfinite(numbers) & (numbers >= 0) & (numbers < 2 ** 32) & (numbers == np.floor(numbers))
+        raw = np.where(valid, numbers, 0).astype(np.uint64)
+        suffix_extended = np.zeros(len(raw), dtype=bool)
+    else:
+        notation = _IdNotation(series)
+        suffix_extended = notation.suffix_extended
+        explicit_hex = notation.explicit_hex
+        if hex_notation is None:
+            hex_notation = notation.hex_column()
+
+        if hex_notation or not explicit_hex.any():
+            raw, valid = notation.values(16 if hex_notation else 10)
+        else:
+            # Decimal column with a few explicitly hex rows
+            raw, valid = notation.values(10)
+            hex_raw, hex_valid = notation.values(16)
+            raw[explicit_hex] = hex_raw[explicit_hex]
+            valid[explicit_hex] = hex_valid[explicit_hex]
+        valid &= raw < 2 ** 32
+
+    extended = suffix_extended | ((raw & CAN_EFF_FLAG) != 0) | ((raw & ~np.uint64(CAN_EFF_FLAG)) > MAX_STANDARD_ID)
+    ids = (raw & np.uint64(~CAN_EFF_FLAG & 0xFFFFFFFF)).astype(np.uint32)
+    ids[~valid] = 0
+    extended &= valid
+    return ids, extended, valid
+
+
+def parse_id_digits(values: np.ndarray, base: int = 16) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses a fixed-width bytes array (numpy 'S' dtype) of bare id digits, such as
+    the id tokens of text traces, without building strings.
+    Returns (ids as uint32, valid-row mask); rows that are empty, longer than
+    10 digits or contain other characters are invalid and left as 0.
+    """
+    values = np.ascontiguousarray(values, dtype='S')
+    rows, width = len(values), values.dtype.itemsize
+    ids = np.zeros(rows, dtype=np.uint64)
+    if rows == 0 or width == 0:
+        return ids.astype(np.uint32), np.zeros(rows, dtype=bool)
+
+    chars = values.view(np.uint8).reshape(rows, width)
+    digits = _DIGIT_VALUES[chars]
+    # Shorter values are zero padded on the right
+    used = chars != 0
+    valid = used.any(axis=1) & ~(used & (digits >= base)).any(axis=1) & (used.sum(axis=1) <= _MAX_DIGITS)
+    for column in range(width):
+        step = used[:, column] & valid
+        if step.any():
+            ids[step] = ids[step] * np.uint64(base) + digits[step, column].astype(np.uint64)
+    valid &= ids < 2 ** 32
+    ids[~valid] = 0
+    return ids.astype(np.uint32), valid
@@ -0,0 +1,29 @@
+import numpy as np
+from typing import Tuple
+
+# PDU format values below 240 are PDU1: the PDU specific byte is a destination address
+PDU2_MIN_PF = 240
+
+
+def normalize_pgn(pgn: int) -> int:
+    """
+    Returns the PGN with the destination address cleared for PDU1 formats,
+    e.g. 0xEF80 -> 0xEF00, while PDU2 PGNs (0xF02A) are kept.
+    """
+    pgn = int(pgn) & 0x3FFFF
+    if ((pgn >> 8) & 0xFF) < PDU2_MIN_PF:
+        pgn &= 0x3FF00
+    return pgn
+
+
+def split_ids(raw_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits a column of 29 bit J1939 identifiers into (PGN, source address).
+    Priority bits are dropped and PDU1 PGNs have the destination address masked out.
+    """
+    raw_ids = np.asarray(raw_ids, dtype=np.uint32)
+    pgn = (raw_ids >> 8) & 0x3FFFF
+    pdu1 = ((pgn >> 8) & 0xFF) < PDU2_MIN_PF
+    pgn = np.where(pdu1, pgn & 0x3FF00, pgn)
+    sa = raw_ids & 0xFF
+    return pgn, sa
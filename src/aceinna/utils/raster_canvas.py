@@ -0,0 +1,167 @@
+import struct
+import zlib
+import numpy as np
+from typing import Sequence, Tuple
+
+Color = Tuple[int, int, int]
+
+# Classic 5x7 LCD font for ASCII 0x20..0x7E: five column bytes per glyph, bit 0 is the top row
+_FONT_5X7 = bytes.fromhex(
+    '0000000000' '00005f0000' '0007000700' '147f147f14' '242a7f2a12' '2313086462' '3649552250' '0005030000'
+    '001c224100' '0041221c00' '082a1c2a08' '08083e0808' '0050300000' '0808080808' '0060600000' '2010080402'
+    '3e5149453e' '00427f4000' '4261514946' '2141454b31' '1814127f10' '2745454539' '3c4a494930' '0171090503'
+    '3649494936' '064949291e' '0036360000' '0056360000' '0008142241' '1414141414' '4122140800' '0201510906'
+    '324979413e' '7e1111117e' '7f49494936' '3e41414122' '7f4141221c' '7f49494941' '7f09090101' '3e41415132'
+    '7f0808087f' '00417f4100' '2040413f01' '7f08142241' '7f40404040' '7f0204027f' '7f0408107f' '3e4141413e'
+    '7f09090906' '3e4151215e' '7f09192946' '4649494931' '01017f0101' '3f4040403f' '1f2040201f' '7f2018207f'
+    '6314081463' '0304780403' '6151494543' '00007f4141' '0204081020' '41417f0000' '0402010204' '4040404040'
+    '0001020400' '2054545478' '7f48444438' '3844444420' '384444487f' '3854545418' '087e090102' '081454543c'
+    '7f08040478' '00447d4000' '2040443d00' '007f102844' '00417f4000' '7c04180478' '7c08040478' '3844444438'
+    '7c14141408' '081414187c' '7c08040408' '4854545420' '043f444020' '3c4040207c' '1c2040201c' '3c4030403c'
+    '4428102844' '0c5050503c' '4464544c44' '0008364100' '00007f0000' '0041360800' '08082a1c08'
+)
+_GLYPHS = np.unpackbits(np.frombuffer(_FONT_5X7, dtype=np.uint8).reshape(-1, 5, 1), axis=2,
+                        bitorder='little')[:, :, :7].transpose(0, 2, 1).astype(bool)
+GLYPH_WIDTH, GLYPH_HEIGHT = 5, 7
+
+
+class RasterCanvas:
+    """
+    Minimal RGBA drawing surface on a NumPy array: axis-aligned rectangles,
+    dashed lines, thick polylines and bitmap text, encoded to PNG with zlib.
+    Coordinates are pixels with the origin at the top left.
+    """
+    def __init__(self, width: int, height: int, background: Color = (255, 255, 255)):
+        self.width = width
+        self.height = height
+        self.pixels = np.empty((height, width, 4), dtype=np.uint8)
+        self.pixels[..., :3] = background
+        self.pixels[..., 3] = 255
+
+    def blend(self, rows: np.ndarray, cols: np.ndarray, color: Color, alpha: float = 1.0):
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        rows, cols = rows[inside], cols[inside]
+        if alpha >= 1.0:
+            self.pixels[rows, cols, :3] = color
+        else:
+            current = self.pixels[rows, cols, :3].astype(np.float32)
+            self.pixels[rows, cols, :3] = (current + (np.array(color, dtype=np.float32) - current) * alpha).astype(np.uint8)
+
+    def fill_rect(self, left: int, top: int, right: int, bottom: int, color: Color):
+        left, right = max(left, 0), min(right, self.width)
+        top, bottom = max(top, 0), min(bottom, self.height)
+        if left < right and top < bottom:
+            self.pixels[top:bottom, left:right, :3] = color
+
+    def rect(self, left: int, top: int, right: int, bottom: int, color: Color, width: int = 1):
+        self.fill_rect(left, top, right, top + width, color)
+        self.fill_rect(left, bottom - width, right, bottom, color)
+        self.fill_rect(left, top, left + width, bottom, color)
+        self.fill_rect(right - width, top, right, bottom, color)
+
+    def dashed_line(self, start: Tuple[int, int], end: Tuple[int, int], color: Color, alpha: float,
+                    pattern: Sequence[int], width: int = 1):
+        """
+        Horizontal or vertical line; pattern is (on, off, on, off, ...) in pixels, empty for solid.
+        """
+        (x0, y0), (x1, y1) = start, end
+        length = max(abs(x1 - x0), abs(y1 - y0)) + 1
+        steps = np.arange(length)
+        if pattern:
+            period = sum(pattern)
+            phase = steps % period
+            on = np.zeros(period, dtype=bool)
+            position = 0
+            for i, run in enumerate(pattern):
+                on[position:position + run] = i % 2 == 0
+                position += run
+            steps = steps[on[phase]]
+        xs = x0 + np.sign(x1 - x0) * steps
+        ys = y0 + np.sign(y1 - y0) * steps
+        offsets = np.arange(width) - width // 2
+        if x0 == x1:
+            rows, cols = np.repeat(ys, width), (xs[:, None] + offsets).ravel()
+        else:
+            rows, cols = (ys[:, None] + offsets).ravel(), np.repeat(xs, width)
+        self.blend(rows, cols, color, alpha)
+
+    def polyline(self, xs: np.ndarray, ys: np.ndarray, color: Color, width: float,
+                 clip: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Draws connected segments through (xs, ys) with a round pen, clipped to
+        (left, top, right, bottom). NaN points break the line.
+        Returns a boolean mask of the pixels drawn.
+        """
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        if len(xs) == 0:
+            return mask
+
+        if len(xs) == 1:
+            px, py = xs, ys
+        else:
+            x0, y0, x1, y1 = xs[:-1], ys[:-1], xs[1:], ys[1:]
+            valid = np.isfinite(x0) & np.isfinite(y0) & np.isfinite(x1) & np.isfinite(y1)
+            x0, y0, x1, y1 = x0[valid], y0[valid], x1[valid], y1[valid]
+            # Sample every segment at least once per pixel of its length, all segments at once
+            counts = np.ceil(np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))).astype(np.int64) + 1
+            counts = np.minimum(counts, 4 * (self.width + self.height))
+            segment = np.repeat(np.arange(len(counts)), counts)
+            first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            t = (np.arange(counts.sum()) - first[segment]) / np.maximum(counts[segment] - 1, 1)
+            px = x0[segment] + (x1[segment] - x0[segment]) * t
+            py = y0[segment] + (y1[segment] - y0[segment]) * t
+
+        cols = np.round(px).astype(np.int64)
+        rows = np.round(py).astype(np.int64)
+        left, top, right, bottom = clip
+        inside = (cols >= left) & (cols < right) & (rows >= top) & (rows < bottom)
+        mask[rows[inside], cols[inside]] = True
+
+        # Thicken with a round pen by shifting the centre line mask
+        radius = max(width / 2.0, 0.5)
+        reach = int(np.ceil(radius - 0.5))
+        pen = mask.copy()
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                if (dx or dy) and dx * dx + dy * dy <= radius * radius:
+                    pen |= np.roll(np.roll(mask, dy, axis=0), dx, axis=1)
+        clip_mask = np.zeros_like(pen)
+        clip_mask[max(top, 0):bottom, max(left, 0):right] = True
+        pen &= clip_mask
+        self.pixels[pen, :3] = color
+        return pen
+
+    @staticmethod
+    def text_size(text: str, scale: int) -> Tuple[int, int]:
+        if not text:
+            return 0, GLYPH_HEIGHT * scale
+        return (len(text) * (GLYPH_WIDTH + 1) - 1) * scale, GLYPH_HEIGHT * scale
+
+    def text(self, x: int, y: int, text: str, scale: int, color: Color = (0, 0, 0)):
+        """
+        Draws text with its top left corner at (x, y). Characters outside ASCII show as '?'.
+        """
+        if not text:
+            return
+        codes = np.array([ord(c) - 0x20 if 0x20 <= ord(c) <= 0x7E else ord('?') - 0x20 for c in text])
+        # Glyph row per character, one blank column between characters
+        strip = np.concatenate([np.pad(_GLYPHS[c], ((0, 0), (0, 1))) for c in codes], axis=1)[:, :-1]
+        strip = np.repeat(np.repeat(strip, scale, axis=0), scale, axis=1)
+        rows, cols = np.nonzero(strip)
+        self.blend(rows + y, cols + x, color)
+
+    def to_png(self) -> bytes:
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+        # Filter type 0 (none) in front of every scanline
+        raw = np.zeros((self.height, self.width * 4 + 1), dtype=np.uint8)
+        raw[:, 1:] = self.pixels.reshape(self.height, -1)
+        # 8 bit RGBA (colour type 6)
+        header = struct.pack('>IIBBBBB', self.width, self.height, 8, 6, 0, 0, 0)
+        return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+                + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+    def save_png(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_png())
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from aceinna.core import data_loader
+from aceinna.core.data_loader import DataLoader
+from aceinna.core.frame_cache import FrameCache
+from aceinna.models.fetch_rule import DataSourceFetchRule
+
+
+@pytest.fixture(autouse=True)
+def no_frame_cache(monkeypatch):
+    monkeypatch.setattr(FrameCache, 'enabled', False)
+
+
+def _rule() -> DataSourceFetchRule:
+    return DataSourceFetchRule(name='test', file_type='csv', message_id_col_index=1,
+                               message_data_col_index=2, timestamp_col_index=0)
+
+
+def _write(tmp_path, lines) -> str:
+    path = os.path.join(tmp_path, 'log.csv')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def test_hex_ids_after_a_decimal_chunk_raise(tmp_path):
+    path = _write(tmp_path, ['0.1,256,01 02', '0.2,512,03 04', '0.3,1F0,05 06'])
+
+    with pytest.raises(ValueError, match='hex ids'):
+        list(DataLoader.iter_batches(path, _rule(), chunk_rows=2))
+
+
+def test_id_notation_of_the_first_chunk_is_kept(tmp_path):
+    path = _write(tmp_path, ['0.1,1F0,01 02', '0.2,0x200,03 04', '0.3,256,05 06'])
+
+    batches = list(DataLoader.iter_batches(path, _rule(), chunk_rows=2))
+
+    assert [batch.message_id.tolist() for batch in batches] == [[0x1F0, 0x200], [0x256]]
+
+
+@pytest.mark.parametrize('arrow', [True, False])
+def test_non_numeric_timestamp_in_a_later_chunk(tmp_path, monkeypatch, arrow):
+    if not arrow:
+        monkeypatch.setattr(data_loader, 'pa', None)
+    elif data_loader.pa is None:
+        pytest.skip('pyarrow is not installed')
+    path = _write(tmp_path, ['0.1,100,01', '0.2,101,02', 'n/a,102,03', '0.4,103,04'])
+
+    batches = list(DataLoader.iter_batches(path, _rule(), chunk_rows=2))
+
+    assert batches[0].timestamp.tolist() == [0.1, 0.2]
+    assert np.isnan(batches[1].timestamp[0]) and batches[1].timestamp[1] == 0.4
+    assert [batch.message_id.tolist() for batch in batches] == [[100, 101], [102, 103]]
+
+
+@pytest.mark.parametrize('arrow', [True, False])
+def test_incomplete_rows_are_counted_as_malformed(tmp_path, monkeypatch, arrow):
+    if not arrow:
+        monkeypatch.setattr(data_loader, 'pa', None)
+    elif data_loader.pa is None:
+        pytest.skip('pyarrow is not installed')
+    path = _write(tmp_path, ['0.1,100,01', '0.2,101', '', '0.3,102,03', '0.4', '0.5,zz,05'])
+
+    batches = list(DataLoader.iter_batches(path, _rule(), chunk_rows=2))
+
+    assert [id for batch in batches for id in batch.message_id.tolist()] == [100, 102]
+    assert sum(batch.malformed_id_count for batch in batches) == 3
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+from aceinna.core.decoder import Decoder
+from aceinna.core.frame_batch import FrameBatch
+from aceinna.core.frame_store import FrameStore
+from aceinna.models.data_source import J1939DataSource, MessageMapping, FieldSetting
+
+
+def _two_priorities_batch() -> FrameBatch:
+    # One PGN 0xF02A from SA 0x80, sent with priority 6 and 3 in turns
+    ids = np.array([0x18F02A80, 0x0CF02A80, 0x18F02A80, 0x0CF02A80], dtype=np.uint32)
+    payload = np.zeros((4, 8), dtype=np.uint8)
+    payload[:, 0] = [10, 20, 30, 40]
+    return FrameBatch(np.array([1.0, 2.0, 3.0, 4.0]), ids, payload, np.full(4, 8))
+
+
+def _source() -> J1939DataSource:
+    return J1939DataSource(name='test', pgn_mappings=[MessageMapping(0xF02A, [FieldSetting('speed', 0, 8)])])
+
+
+def test_decode_store_merges_raw_ids_of_one_pgn_and_sa_by_time(tmp_path):
+    batch = _two_priorities_batch()
+    store = FrameStore.write(os.path.join(tmp_path, 'frames.bin'), [batch])
+
+    from_store = Decoder.decode_store(store, _source()).get('speed', 0x80)
+    from_batch = Decoder.decode(batch, _source()).get('speed', 0x80)
+
+    assert from_store.index.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert from_store.tolist() == [10.0, 20.0, 30.0, 40.0]
+    assert from_store.equals(from_batch)
+
+
+def _status_batch() -> FrameBatch:
+    # A status byte that changes twice in 1000 frames
+    ids = np.full(1000, 0x18F02A80, dtype=np.uint32)
+    payload = np.zeros((1000, 8), dtype=np.uint8)
+    payload[400:, 0] = 1
+    payload[700:, 0] = 2
+    return FrameBatch(np.arange(1000, dtype=np.float64), ids, payload, np.full(1000, 8))
+
+
+def test_decode_compacts_slowly_varying_signals_by_default():
+    store = Decoder.decode(_status_batch(), _source())
+
+    columns = next(iter(store.messages.values()))
+    assert columns.raw[0] is None
+    assert columns.runs[0][0].tolist() == [0, 400, 700]
+    assert store.changes('speed', 0x80).tolist() == [0.0, 1.0, 2.0]
+
+
+def test_decode_without_compaction_keeps_every_frame():
+    compacted = Decoder.decode(_status_batch(), _source()).get('speed', 0x80)
+    store = Decoder.decode(_status_batch(), _source(), compact=False)
+
+    columns = next(iter(store.messages.values()))
+    assert columns.runs[0] is None
+    assert len(columns.raw[0]) == 1000
+    assert store.get('speed', 0x80).equals(compacted)
+    assert store.changes('speed', 0x80).tolist() == [0.0, 1.0, 2.0]
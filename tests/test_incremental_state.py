@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+
+from aceinna.core.decoder import Decoder
+from aceinna.core.frame_batch import FrameBatch
+from aceinna.core.incremental_state import IncrementalState
+from aceinna.models.data_source import J1939DataSource, MessageMapping, FieldSetting
+
+
+def _decode(timestamps, values):
+    ids = np.full(len(timestamps), 0x18F02A80, dtype=np.uint32)
+    payload = np.zeros((len(timestamps), 8), dtype=np.uint8)
+    payload[:, 0] = values
+    batch = FrameBatch(np.asarray(timestamps, dtype=np.float64), ids, payload, np.full(len(timestamps), 8))
+    source = J1939DataSource(name='test', pgn_mappings=[MessageMapping(0xF02A, [FieldSetting('speed', 0, 8)])])
+    return Decoder.decode(batch, source)
+
+
+def _files(folder):
+    with open(os.path.join(folder, IncrementalState.FOLDER, IncrementalState.STATE_FILE)) as f:
+        return [(entry['file'], entry['size']) for entry in json.load(f)['messages']]
+
+
+def test_save_appends_only_the_new_frames(tmp_path):
+    state = IncrementalState('key')
+    state.extend(_decode([1.0, 2.0], [10, 20]))
+    state.save(tmp_path)
+    (first_file, _), = _files(tmp_path)
+
+    state = IncrementalState.load(tmp_path)
+    state.extend(_decode([3.0, 4.0], [30, 40]))
+    state.save(tmp_path)
+
+    assert _files(tmp_path) == [(first_file, 4)]
+    speed = IncrementalState.load(tmp_path).store.get('speed', 0x80)
+    assert speed.index.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert speed.tolist() == [10.0, 20.0, 30.0, 40.0]
+
+
+def test_bytes_of_an_interrupted_save_are_ignored(tmp_path):
+    state = IncrementalState('key')
+    state.extend(_decode([1.0, 2.0], [10, 20]))
+    state.save(tmp_path)
+    (prefix, _), = _files(tmp_path)
+    # Frames appended by a save that never swapped state.json
+    with open(os.path.join(tmp_path, IncrementalState.FOLDER, f"{prefix}.timestamp.bin"), 'ab') as f:
+        f.write(np.array([9.0]).tobytes())
+
+    state = IncrementalState.load(tmp_path)
+    assert state.store.get('speed', 0x80).index.tolist() == [1.0, 2.0]
+    state.extend(_decode([3.0], [30]))
+    state.save(tmp_path)
+
+    assert IncrementalState.load(tmp_path).store.get('speed', 0x80).index.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_frames_older_than_the_saved_ones_rewrite_the_message(tmp_path):
+    state = IncrementalState('key')
+    state.extend(_decode([1.0, 3.0], [10, 30]))
+    state.save(tmp_path)
+    (first_file, _), = _files(tmp_path)
+
+    state = IncrementalState.load(tmp_path)
+    state.extend(_decode([2.0], [20]))
+    state.save(tmp_path)
+
+    (second_file, size), = _files(tmp_path)
+    assert second_file != first_file and size == 3
+    assert IncrementalState.load(tmp_path).store.get('speed', 0x80).tolist() == [10.0, 20.0, 30.0]
+    assert not any(name.startswith(first_file) for name in os.listdir(os.path.join(tmp_path, IncrementalState.FOLDER)))
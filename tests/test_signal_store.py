@@ -0,0 +1,22 @@
+import numpy as np
+
+from aceinna.core.decoder import Decoder
+from aceinna.core.frame_batch import FrameBatch
+from aceinna.models.data_source import J1939DataSource, MessageMapping, FieldSetting
+
+
+def test_len_counts_signals_without_building_series():
+    ids = np.array([0x18F02A80, 0x18F02A81], dtype=np.uint32)
+    payload = np.zeros((2, 8), dtype=np.uint8)
+    batch = FrameBatch(np.array([1.0, 2.0]), ids, payload, np.full(2, 8))
+    source = J1939DataSource(name='test', pgn_mappings=[
+        MessageMapping(0xF02A, [FieldSetting('speed', 0, 8), FieldSetting('mode', 8, 4)]),
+        # Mapped, but never sent
+        MessageMapping(0xF02B, [FieldSetting('torque', 0, 16)])])
+
+    store = Decoder.decode(batch, source)
+
+    # speed and mode of SA 0x80 and 0x81
+    assert len(store) == 4
+    assert store._series == {}
+    assert len(store.to_dict()) == 4